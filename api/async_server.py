@@ -0,0 +1,163 @@
+import argparse
+import asyncio
+import http
+import json
+import time
+from typing import Optional, Union
+from urllib.parse import parse_qs, urlparse
+import websockets
+from game_sessions import SessionManager, SessionClient
+from game_rules import GameRules
+from metrics import Metrics
+from policy_table import PolicyTable
+from wire_encoding import ENCODERS, DEFAULT_ENCODING
+
+"""
+
+Asyncio websocket server for the Monopoly simulator.
+
+Serves the same messages and protocols as the Flask-Sock route in sim_socket.py (and can run next to it on
+another port), but a slow client can never stall a game:
+    - games still run at full speed on the session worker pool, and broadcasts are capped at --max-fps frames
+      per second no matter how fast the simulation is
+    - every client has its own bounded send queue, drained by its own writer task. the game thread only ever
+      enqueues, and never waits on a socket
+    - when a client falls behind and its queue fills up, the backlog is dropped. a full state message
+      supersedes everything before it, and a delta client gets a fresh snapshot instead of the missed patches
+
+With --metrics, the server records the metrics listed in metrics.py, plus socket_send_seconds (how long each
+websocket write took) and dropped_messages. They are returned by the get_stats message and served over plain HTTP
+at /metrics on the same port. --profile-dir runs every game under cProfile, --replay-dir saves a replay log of
+every game (see replay.py) and --event-dir streams the events of every game to JSONL files (see game_events.py).
+--policy-table makes games decide from a precomputed policy table (see policy_table.py), built for the same rules
+and for 5 players. --encoding sets the encoding of clients that don't pick one with ?encoding= (see wire_encoding.py).
+
+Run from the api directory:
+    python async_server.py --port 5001 --max-fps 30
+    python async_server.py --metrics --profile-dir profiles
+"""
+
+
+class QueuedSubscriber:
+    """session subscriber that hands messages from the game threads to the event loop through a bounded queue"""
+
+    def __init__(self, loop: asyncio.AbstractEventLoop, protocol: str, queue_size: int, metrics: Optional[Metrics] = None):
+        self.loop = loop
+        self.protocol = protocol
+        self.metrics = metrics
+        self.queue: asyncio.Queue = asyncio.Queue(maxsize=queue_size)
+        self.client = None  # SessionClient, set once the connection is registered
+        self.dropped = 0
+
+    def send(self, message: Union[str, bytes]):
+        # called from game and executor threads, so the queue itself is only touched on the event loop
+        self.loop.call_soon_threadsafe(self._enqueue, message)
+
+    def _enqueue(self, message: Union[str, bytes]):
+        if not self.queue.full():
+            self.queue.put_nowait(message)
+            return
+
+        # slow consumer: throw away the backlog instead of letting it grow
+        dropped = self.dropped
+        while not self.queue.empty():
+            self.queue.get_nowait()
+            self.dropped += 1
+        if self.protocol == 'delta' and self.client and self.client.session:
+            # the dropped patches can't be skipped, so replace them with a snapshot of the latest state.
+            # patches older than the snapshot that are still on their way are ignored by the client
+            self.dropped += 1
+            message = self.client.session.encoded_snapshot(self.client.encoder) or message
+        if self.metrics is not None:
+            self.metrics.increment('dropped_messages', self.dropped - dropped)
+        self.queue.put_nowait(message)
+
+
+async def writer(websocket, subscriber: QueuedSubscriber):
+    """send queued messages to the client, one at a time, at whatever pace the connection allows"""
+    metrics = subscriber.metrics
+    while True:
+        message = await subscriber.queue.get()
+        if metrics is None:
+            await websocket.send(message)
+        else:
+            start = time.perf_counter()
+            await websocket.send(message)
+            metrics.observe('socket_send_seconds', time.perf_counter() - start)
+
+
+def serve_metrics(sessions: SessionManager):
+    """answer plain HTTP requests for /metrics before the websocket handshake"""
+    def process_request(path: str, request_headers):
+        if urlparse(path).path != '/metrics':
+            return None
+        if sessions.metrics is None:
+            return http.HTTPStatus.NOT_FOUND, [('Content-Type', 'text/plain')], b"Metrics are disabled, use --metrics\n"
+        body = sessions.metrics.prometheus_text().encode()
+        return http.HTTPStatus.OK, [('Content-Type', 'text/plain; version=0.0.4')], body
+    return process_request
+
+
+def make_handler(sessions: SessionManager, queue_size: int):
+    async def handle_websocket(websocket):
+        """handle a websocket connection"""
+        loop = asyncio.get_running_loop()
+        query = parse_qs(urlparse(websocket.path).query)
+        protocol = 'delta' if query.get('protocol') == ['delta'] else 'full'
+
+        subscriber = QueuedSubscriber(loop, protocol, queue_size, sessions.metrics)
+        try:
+            client = SessionClient(sessions, subscriber, protocol, query.get('encoding', [None])[0])
+        except ValueError as e:
+            await websocket.send(json.dumps({'type': 'error', 'message': str(e)}))
+            return
+        subscriber.client = client
+        writer_task = asyncio.create_task(writer(websocket, subscriber))
+        client.send_board()
+        try:
+            async for message in websocket:
+                # message handling takes session locks, so it runs off the event loop
+                await loop.run_in_executor(None, client.handle, json.loads(message))
+        except websockets.ConnectionClosed:
+            pass
+        finally:
+            writer_task.cancel()
+            await loop.run_in_executor(None, client.leave)
+
+    return handle_websocket
+
+
+async def serve(host: str, port: int, max_games: int, max_fps: float, queue_size: int, rules: GameRules,
+                metrics: Optional[Metrics] = None, profile_dir: Optional[str] = None, replay_dir: Optional[str] = None,
+                event_dir: Optional[str] = None, policy_table: Optional[PolicyTable] = None, encoding: Optional[str] = None):
+    sessions = SessionManager(max_games=max_games, max_fps=max_fps, rules=rules, metrics=metrics, profile_dir=profile_dir,
+                              replay_dir=replay_dir, event_dir=event_dir, policy_table=policy_table, encoding=encoding)
+    async with websockets.serve(make_handler(sessions, queue_size), host, port, process_request=serve_metrics(sessions)):
+        print(f"Serving on ws://{host}:{port}/ws (max {max_games} games, {max_fps} frames/s)")
+        await asyncio.Future()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Asyncio websocket server for the Monopoly simulator")
+    parser.add_argument('--host', default='0.0.0.0')
+    parser.add_argument('--port', type=int, default=5001)
+    parser.add_argument('--max-games', type=int, default=32, help="maximum number of games running at once")
+    parser.add_argument('--max-fps', type=float, default=30, help="maximum broadcasts per second per game")
+    parser.add_argument('--queue-size', type=int, default=8, help="messages buffered per client before coalescing")
+    parser.add_argument('--rules', choices=['simplified', 'full'], default='simplified', help="rule set games are played with")
+    parser.add_argument('--metrics', action='store_true', help="record metrics, served at /metrics and by get_stats")
+    parser.add_argument('--profile-dir', help="run every game under cProfile and write the profiles here")
+    parser.add_argument('--replay-dir', help="save a replay log of every game here")
+    parser.add_argument('--event-dir', help="stream the events of every game to JSONL files here")
+    parser.add_argument('--policy-table', help="decide from this policy table (.npy, see policy_table.py)")
+    parser.add_argument('--encoding', choices=list(ENCODERS), default=DEFAULT_ENCODING,
+                        help="encoding of clients that don't ask for one")
+    args = parser.parse_args()
+    metrics = Metrics() if args.metrics else None
+    asyncio.run(serve(args.host, args.port, args.max_games, args.max_fps, args.queue_size, GameRules.named(args.rules),
+                      metrics, args.profile_dir, args.replay_dir, args.event_dir,
+                      PolicyTable.load(args.policy_table) if args.policy_table else None, args.encoding))
+
+
+if __name__ == '__main__':
+    main()
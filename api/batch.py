@@ -0,0 +1,203 @@
+import argparse
+import csv
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+from monopoly_sim import MonopolySimulator
+from monpoly_defs import Player
+from game_rules import GameRules
+from replay import ReplayLog
+from game_events import EventLog, JsonlSink
+from policy_table import PolicyTable
+
+"""
+
+Headless batch tournament runner.
+
+Runs many independent games of MonopolySimulator without any logging and streams one row per game to a
+CSV (or Parquet, if pyarrow is installed) file as the games finish:
+    - game: index of the game in the batch
+    - seed: seed the game was played with
+    - winner: name of the last solvent player, empty if max_rounds was reached first
+    - rounds: number of rounds played
+    - purchases: number of properties bought during the game
+    - bankruptcies: number of players that went bankrupt
+    - net_worth_<n>: final net worth of player n
+
+Usage from the api directory:
+    python batch.py --games 1000 --players 4 --seed 7 --output results.csv
+    python batch.py --games 1000 --rules full --output full_rules.csv
+    python batch.py --games 10 --record-dir replays     # also save a replay log of every game (see replay.py)
+    python batch.py --games 10 --events events.jsonl    # also stream every game event (see game_events.py)
+    python batch.py --games 1000 --policy-table policy_simplified.npy   # decide from a policy table
+    python batch.py --games 100 --engine policy --horizon 100 --time-budget-ms 50   # full-game rollouts
+
+or from Python:
+    summary = run_batch(games=1000, players=4, seed=7, output="results.csv")
+"""
+
+
+@dataclass
+class BatchSummary:
+    """totals for a finished batch"""
+    games: int
+    seconds: float
+    wins: Dict[str, int]
+
+    @property
+    def games_per_second(self) -> float:
+        return self.games / self.seconds if self.seconds else 0.0
+
+
+class CsvResultWriter:
+    def __init__(self, path: str, columns: List[str]):
+        self.file = open(path, 'w', newline='')
+        self.writer = csv.DictWriter(self.file, fieldnames=columns)
+        self.writer.writeheader()
+
+    def write(self, row: dict):
+        self.writer.writerow(row)
+        self.file.flush()
+
+    def close(self):
+        self.file.close()
+
+
+class ParquetResultWriter:
+    """buffers rows and writes them to the parquet file one row group at a time"""
+
+    def __init__(self, path: str, columns: List[str], row_group_size: int = 256):
+        try:
+            import pyarrow
+            import pyarrow.parquet
+        except ImportError:
+            raise ImportError("Parquet output requires pyarrow (pip install pyarrow)")
+        self.pyarrow = pyarrow
+        self.columns = columns
+        self.row_group_size = row_group_size
+        self.rows: List[dict] = []
+        self.writer = None
+        self.path = path
+
+    def write(self, row: dict):
+        self.rows.append(row)
+        if len(self.rows) >= self.row_group_size:
+            self._flush()
+
+    def _flush(self):
+        if not self.rows:
+            return
+        table = self.pyarrow.Table.from_pylist([{c: row[c] for c in self.columns} for row in self.rows])
+        if self.writer is None:
+            self.writer = self.pyarrow.parquet.ParquetWriter(self.path, table.schema)
+        self.writer.write_table(table)
+        self.rows = []
+
+    def close(self):
+        self._flush()
+        if self.writer:
+            self.writer.close()
+
+
+def play_headless_game(game: int, seed: int, players: int, max_rounds: int, record_dir: Optional[str] = None,
+                       event_sink: Optional[JsonlSink] = None, **simulator_options) -> dict:
+    """play one game from start to finish without output and return its result row. with a record_dir, the game's
+       replay log is saved there as game-<game>.mprl. with an event_sink, the game's events are written to it"""
+    replay_log = ReplayLog() if record_dir else None
+    simulator = MonopolySimulator(seed=seed, replay_log=replay_log, **simulator_options)
+    simulator.players = [Player(f"Player {i + 1}", 1500, []) for i in range(players)]
+    events = None
+    if event_sink is not None:
+        event_sink.context = {'game': game}
+        events = EventLog(0, sink=event_sink)  # nothing is kept in memory, every event goes straight to the sink
+    try:
+        rounds = simulator.play_game(max_rounds, events)
+    finally:
+        simulator.close()
+    if replay_log is not None:
+        replay_log.save(os.path.join(record_dir, f"game-{game}.mprl"))
+
+    solvent = [p for p in simulator.players if p.money > 0]
+    row = {
+        'game': game,
+        'seed': seed,
+        'winner': solvent[0].name if len(solvent) == 1 else '',
+        'rounds': rounds,
+        'purchases': simulator.purchases,
+        'bankruptcies': len(simulator.players) - len(solvent),
+    }
+    for i, player in enumerate(simulator.players):
+        row[f'net_worth_{i + 1}'] = player.calculate_net_worth()
+    return row
+
+
+def run_batch(games: int, players: int = 4, seed: int = 0, output: Optional[str] = None, output_format: str = 'csv',
+              max_rounds: int = 200, record_dir: Optional[str] = None, events: Optional[str] = None,
+              **simulator_options) -> BatchSummary:
+    """play `games` independent games, streaming one result row per game to `output` as they finish.
+       game i is played with seed `seed + i`, so any single game of a batch can be re-run on its own.
+       extra keyword arguments (engine, iterations, adaptive, ...) are passed on to MonopolySimulator."""
+    columns = ['game', 'seed', 'winner', 'rounds', 'purchases', 'bankruptcies'] + [f'net_worth_{i + 1}' for i in range(players)]
+    writer = None
+    if output:
+        writer = ParquetResultWriter(output, columns) if output_format == 'parquet' else CsvResultWriter(output, columns)
+
+    if record_dir:
+        os.makedirs(record_dir, exist_ok=True)
+    event_sink = JsonlSink(events) if events else None
+    wins: Dict[str, int] = {}
+    start = time.perf_counter()
+    try:
+        for game in range(games):
+            row = play_headless_game(game, seed + game, players, max_rounds, record_dir, event_sink, **simulator_options)
+            if row['winner']:
+                wins[row['winner']] = wins.get(row['winner'], 0) + 1
+            if writer:
+                writer.write(row)
+    finally:
+        if writer:
+            writer.close()
+        if event_sink:
+            event_sink.close()
+
+    return BatchSummary(games, time.perf_counter() - start, wins)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Run a batch of headless Monopoly games")
+    parser.add_argument('--games', type=int, default=100, help="number of games to play")
+    parser.add_argument('--players', type=int, default=4, help="players per game")
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game (game i uses seed + i)")
+    parser.add_argument('--max-rounds', type=int, default=200, help="rounds before a game is called a draw")
+    parser.add_argument('--iterations', type=int, default=1000, help="rollouts per buy/no-buy decision")
+    parser.add_argument('--adaptive', action='store_true', help="stop rollouts early once a decision is clear")
+    parser.add_argument('--engine', choices=['vectorized', 'scalar', 'policy'], default='vectorized')
+    parser.add_argument('--horizon', type=int, default=20, help="turns of the deciding player each rollout lasts")
+    parser.add_argument('--opponent-policy', choices=['greedy', 'threshold', 'heuristic'], default='heuristic',
+                        help="how players buy inside policy rollouts")
+    parser.add_argument('--time-budget-ms', type=float, help="rollout time budget of each decision")
+    parser.add_argument('--rules', choices=['simplified', 'full'], default='simplified', help="rule set to play with")
+    parser.add_argument('--output', help="file to stream per-game results to")
+    parser.add_argument('--format', choices=['csv', 'parquet'], default='csv', help="format of the output file")
+    parser.add_argument('--record-dir', help="save the replay log of every game in this directory")
+    parser.add_argument('--events', help="stream the events of every game to this JSONL file")
+    parser.add_argument('--policy-table', help="decide from this policy table (.npy, see policy_table.py)")
+    args = parser.parse_args()
+    rules = GameRules.named(args.rules)
+    policy_table = PolicyTable.load(args.policy_table) if args.policy_table else None
+    if policy_table is not None:
+        policy_table.check(rules, args.players)
+
+    summary = run_batch(args.games, args.players, args.seed, args.output, args.format, args.max_rounds, args.record_dir, args.events,
+                        engine=args.engine, iterations=args.iterations, adaptive=args.adaptive, horizon=args.horizon,
+                        opponent_policy=args.opponent_policy, time_budget_ms=args.time_budget_ms,
+                        rules=rules, decision_mode='table' if policy_table is not None else 'live',
+                        policy_table=policy_table)
+    print(f"Played {summary.games} games in {summary.seconds:.1f}s ({summary.games_per_second:.2f} games/s)")
+    for name, count in sorted(summary.wins.items()):
+        print(f"{name}: {count} wins")
+
+
+if __name__ == '__main__':
+    main()
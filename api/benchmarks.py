@@ -0,0 +1,280 @@
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import random
+import statistics
+import sys
+import time
+import tracemalloc
+from typing import Callable, List, Optional, Tuple
+from monopoly_sim import MonopolySimulator
+from monpoly_defs import Player
+from game_rules import GameRules
+from game_sessions import GameSession
+from turn_benchmark import saturated_game
+from game_events import PLAYER_MOVED
+from wire_encoding import get_encoder
+
+"""
+
+Benchmark suite for the simulator hot paths.
+
+Every benchmark builds its game from a fixed seed, so two runs measure exactly the same work. For each one the
+suite reports:
+    - ops_per_second: calls per second over all timed samples
+    - p50_us / p99_us: median and 99th percentile latency of one call, in microseconds
+    - peak_memory_bytes: peak memory allocated by one call (measured separately with tracemalloc)
+
+Fast operations are timed in batches of calls, so the timer overhead doesn't dominate. Results are printed as a
+table and can be written to a JSON file. With --compare, the results are checked against a stored baseline and the
+run fails if the median latency of any benchmark grew by more than --threshold.
+
+Run from the api directory:
+    python benchmarks.py                                     # run everything
+    python benchmarks.py --filter make_decision              # only benchmarks whose name contains the filter
+    python benchmarks.py --output results.json               # save machine-readable results
+    python benchmarks.py --save-baseline                     # store the results as the baseline
+    python benchmarks.py --compare --threshold 0.25          # fail on a >25% regression against the baseline
+
+Timings depend on the machine, so the baseline should be regenerated on the machine that runs the comparison.
+"""
+
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'benchmark_baseline.json')
+SEED = 0
+NUM_PLAYERS = 4
+ITERATION_COUNTS = (100, 1000, 5000)
+SATURATION_LEVELS = (0.25, 0.75)  # fraction of the properties owned before the decision
+
+# a benchmark is a name and a setup function that builds its game and returns the operation to time
+Benchmark = Tuple[str, Callable[[], Callable[[], object]]]
+
+
+def partly_owned_game(owned_fraction: float, iterations: int = 1000) -> Tuple[MonopolySimulator, Player]:
+    """a game in which `owned_fraction` of the properties are owned, round robin, with player 1 standing on an
+       unowned property it can afford"""
+    rng = random.Random(SEED)
+    simulator = MonopolySimulator(seed=SEED, iterations=iterations)
+    simulator.players = [Player(f"Player {i + 1}", 1500) for i in range(NUM_PLAYERS)]
+    owned = rng.sample(range(len(simulator.properties) - 1), round(owned_fraction * len(simulator.properties)))
+    for n, index in enumerate(sorted(owned)):
+        simulator.properties[index].owner = simulator.players[n % NUM_PLAYERS]
+    player = simulator.players[0]
+    player.position = next(p.position for p in reversed(simulator.properties) if not p.owner)
+    return simulator, player
+
+
+def expected_value_benchmark():
+    simulator, player = partly_owned_game(0.5)
+    prop = simulator.property_at(player.position)
+    return lambda: simulator.calculate_expected_property_value(prop, player)
+
+
+def count_nearby_benchmark():
+    simulator, player = partly_owned_game(0.5)
+    prop = simulator.property_at(player.position)
+    return lambda: simulator.count_nearby_opponent_properties(prop, player)
+
+
+def future_turns_benchmark():
+    simulator, player = partly_owned_game(0.5)
+    universe = simulator.fork()
+    state = universe.snapshot()
+    universe_player = universe.players[0]
+    rng = random.Random(SEED)
+
+    def rollout():
+        universe.restore(state)
+        return simulator.simulate_future_turns(universe, universe_player, 20, rng)
+    return rollout
+
+
+def simulate_turn_benchmark(iterations: int, owned_fraction: float):
+    def setup():
+        simulator, player = partly_owned_game(owned_fraction, iterations)
+        return lambda: simulator.simulate_turn(player)
+    return setup
+
+
+def make_decision_benchmark():
+    simulator, player = partly_owned_game(0.5)
+    return lambda: simulator.make_decision(player)
+
+
+def take_turn_benchmark(rules: GameRules):
+    def setup():
+        simulator = saturated_game(rules, seed=SEED)
+        players = simulator.players
+        turn = iter(range(10 ** 12))
+        return lambda: simulator.take_turn(players[next(turn) % len(players)])
+    return setup
+
+
+def full_game_benchmark():
+    def play():
+        simulator = MonopolySimulator(seed=SEED, iterations=100)
+        simulator.players = [Player(f"Player {i + 1}", 1500) for i in range(NUM_PLAYERS)]
+        with contextlib.redirect_stdout(io.StringIO()):
+            simulator.run_full_game()
+    return play
+
+
+class NullSocket:
+    """subscriber that throws every message away"""
+    def send(self, message):
+        pass
+
+
+def broadcast_benchmark(protocol: str):
+    def setup():
+        session = GameSession('benchmark')
+        session.new_game(seed=SEED)
+        session.subscribe(NullSocket(), protocol, get_encoder('json'))
+        for _ in range(10):
+            for player in session.simulator.players:
+                session.log_ai(session.simulator.take_turn(player))
+                session.log_game((PLAYER_MOVED, player.name, player.position, player.position))
+        session.broadcast_state()
+        player = session.simulator.players[0]
+
+        def broadcast():
+            # one player's cash changes between frames, so the delta protocol always has a patch to send
+            player.money += 1
+            session.broadcast_state()
+        return broadcast
+    return setup
+
+
+def all_benchmarks() -> List[Benchmark]:
+    benchmarks = [
+        ('calculate_expected_property_value', expected_value_benchmark),
+        ('count_nearby_opponent_properties', count_nearby_benchmark),
+        ('simulate_future_turns', future_turns_benchmark),
+    ]
+    for iterations in ITERATION_COUNTS:
+        for owned_fraction in SATURATION_LEVELS:
+            name = f'simulate_turn[iterations={iterations},owned={owned_fraction:.0%}]'
+            benchmarks.append((name, simulate_turn_benchmark(iterations, owned_fraction)))
+    benchmarks += [
+        ('make_decision', make_decision_benchmark),
+        ('take_turn[simplified]', take_turn_benchmark(GameRules())),
+        ('take_turn[full]', take_turn_benchmark(GameRules.full())),
+        ('run_full_game', full_game_benchmark),
+        ('broadcast_state[full]', broadcast_benchmark('full')),
+        ('broadcast_state[delta]', broadcast_benchmark('delta')),
+    ]
+    return benchmarks
+
+
+def measure(setup: Callable[[], Callable[[], object]], min_time: float, min_samples: int = 5) -> dict:
+    """time an operation: calls per second, latency percentiles and peak memory of one call"""
+    operation = setup()
+
+    # warm up, and pick how many calls each sample times so a sample takes at least ~50us
+    start = time.perf_counter()
+    operation()
+    single = time.perf_counter() - start
+    number = max(1, int(50e-6 / max(single, 1e-9)))
+
+    samples = []
+    total = 0.0
+    while total < min_time or len(samples) < min_samples:
+        start = time.perf_counter()
+        for _ in range(number):
+            operation()
+        elapsed = time.perf_counter() - start
+        samples.append(elapsed / number)
+        total += elapsed
+
+    tracemalloc.start()
+    before = tracemalloc.get_traced_memory()[0]
+    tracemalloc.reset_peak()
+    operation()
+    peak = tracemalloc.get_traced_memory()[1] - before
+    tracemalloc.stop()
+
+    samples.sort()
+    return {
+        'ops_per_second': len(samples) * number / total,
+        'p50_us': statistics.median(samples) * 1e6,
+        'p99_us': samples[min(len(samples) - 1, int(0.99 * len(samples)))] * 1e6,
+        'peak_memory_bytes': peak,
+        'samples': len(samples),
+        'calls_per_sample': number,
+    }
+
+
+def run(filter_text: Optional[str] = None, min_time: float = 1.0) -> dict:
+    results = {}
+    for name, setup in all_benchmarks():
+        if filter_text and filter_text not in name:
+            continue
+        results[name] = measure(setup, min_time)
+        result = results[name]
+        print(f"{name:<48} {result['ops_per_second']:>12,.1f} ops/s  p50 {result['p50_us']:>11,.1f} us  "
+              f"p99 {result['p99_us']:>11,.1f} us  peak {result['peak_memory_bytes'] / 1024:>9,.1f} KiB", flush=True)
+    return {
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'processor': platform.processor(),
+        'seed': SEED,
+        'results': results,
+    }
+
+
+def compare(report: dict, baseline: dict, threshold: float) -> List[str]:
+    """names of the benchmarks whose median latency grew by more than `threshold` over the baseline"""
+    regressions = []
+    print(f"\n{'benchmark':<48} {'baseline p50':>14} {'current p50':>14} {'change':>8}")
+    for name, result in report['results'].items():
+        if name not in baseline['results']:
+            continue
+        before = baseline['results'][name]['p50_us']
+        change = result['p50_us'] / before - 1
+        regressed = change > threshold
+        if regressed:
+            regressions.append(name)
+        print(f"{name:<48} {before:>11,.1f} us {result['p50_us']:>11,.1f} us {change:>+8.1%}"
+              f"{'  REGRESSION' if regressed else ''}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark the simulator hot paths")
+    parser.add_argument('--filter', help="only run benchmarks whose name contains this text")
+    parser.add_argument('--min-time', type=float, default=1.0, help="seconds spent timing each benchmark")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    parser.add_argument('--baseline', default=DEFAULT_BASELINE, help="baseline file for --save-baseline and --compare")
+    parser.add_argument('--save-baseline', action='store_true', help="store the results as the baseline")
+    parser.add_argument('--compare', action='store_true', help="compare the results against the baseline")
+    parser.add_argument('--threshold', type=float, default=0.25, help="allowed growth of the median latency")
+    args = parser.parse_args()
+
+    report = run(args.filter, args.min_time)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+    if args.save_baseline:
+        baseline = {'results': {}}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as f:
+                baseline = json.load(f)
+        # a filtered run only replaces the entries it measured
+        baseline.update({key: value for key, value in report.items() if key != 'results'})
+        baseline['results'].update(report['results'])
+        with open(args.baseline, 'w') as f:
+            json.dump(baseline, f, indent=2)
+    if args.compare:
+        with open(args.baseline) as f:
+            baseline = json.load(f)
+        regressions = compare(report, baseline, args.threshold)
+        if regressions:
+            print(f"\n{len(regressions)} benchmark(s) regressed by more than {args.threshold:.0%}: {', '.join(regressions)}")
+            sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,346 @@
+"""
+
+Board tables precomputed by markov_board.py, so that games start without solving the landing-frequency Markov
+chain. Generated by `python markov_board.py`, do not edit.
+"""
+
+
+# probability of coming to rest on each square after a roll, by movement rules (BoardRules fields, in order)
+LANDING_FREQUENCIES = {
+    (True, True, True): {
+        0: 0.030961230334104424,
+        1: 0.021313773374645604,
+        2: 0.01884880005237172,
+        3: 0.02162402189535372,
+        4: 0.023285230189612434,
+        5: 0.02963103200851233,
+        6: 0.02262139678893011,
+        7: 0.008650478139361536,
+        8: 0.023209601712151782,
+        9: 0.02300335008866781,
+        10: 0.062195146819755125,
+        11: 0.0270165781777099,
+        12: 0.026040375217150996,
+        13: 0.02372090292590741,
+        14: 0.024648884255086746,
+        15: 0.02919969335250793,
+        16: 0.027924168535581547,
+        17: 0.02594464843407428,
+        18: 0.029355854595096893,
+        19: 0.030851688778357943,
+        20: 0.028836012851658974,
+        21: 0.028358431390015225,
+        22: 0.010480329373315249,
+        23: 0.027356858038021875,
+        24: 0.031857662866549785,
+        25: 0.030659047386530067,
+        26: 0.027072038246359564,
+        27: 0.0267885769442763,
+        28: 0.028074183829090722,
+        29: 0.02586048887487652,
+        30: 0.0,
+        31: 0.026773704752817352,
+        32: 0.026251730101095345,
+        33: 0.02366054880846036,
+        34: 0.025006280074660527,
+        35: 0.02432637982706024,
+        36: 0.008668733545006042,
+        37: 0.021863976221719386,
+        38: 0.021798527663545557,
+        39: 0.02625963353000074,
+    },
+    (True, True, False): {
+        0: 0.02277537286471132,
+        1: 0.022911447689548073,
+        2: 0.02312918439180284,
+        3: 0.0233389285832979,
+        4: 0.022980120677362638,
+        5: 0.022749488439732492,
+        6: 0.022690669444033692,
+        7: 0.02266470685712442,
+        8: 0.022734717165744222,
+        9: 0.022774049997568886,
+        10: 0.053304631938917275,
+        11: 0.0228087000745368,
+        12: 0.023639126770728686,
+        13: 0.024431056598025816,
+        14: 0.025282021736910687,
+        15: 0.02616291224615494,
+        16: 0.027145616104153614,
+        17: 0.02822372880359542,
+        18: 0.02774279818482197,
+        19: 0.027404806847557243,
+        20: 0.027155832033743457,
+        21: 0.02694295637548512,
+        22: 0.026704312799757674,
+        23: 0.026404071364794963,
+        24: 0.02680280617976649,
+        25: 0.02701977092278692,
+        26: 0.027072912199327295,
+        27: 0.02706034833973948,
+        28: 0.02696322308451033,
+        29: 0.026879909249950366,
+        30: 0.0,
+        31: 0.026783234994586506,
+        32: 0.026050617234614902,
+        33: 0.02531731711588597,
+        34: 0.024567457292571815,
+        35: 0.023751664715033354,
+        36: 0.02288282852121659,
+        37: 0.02188696774931982,
+        38: 0.022306253305806614,
+        39: 0.022553431104773456,
+    },
+    (True, False, True): {
+        0: 0.03303451114855858,
+        1: 0.02315162022301264,
+        2: 0.020223254512247008,
+        3: 0.022931372356440487,
+        4: 0.025079049704572587,
+        5: 0.0319310584983926,
+        6: 0.024578409062442054,
+        7: 0.009394767881477934,
+        8: 0.025132261735717865,
+        9: 0.024854168513269843,
+        10: 0.037813074196479175,
+        11: 0.028892596369544877,
+        12: 0.027270534468963444,
+        13: 0.02397056617951803,
+        14: 0.024127587515258755,
+        15: 0.028193919819181297,
+        16: 0.0258377333375818,
+        17: 0.02331857922279309,
+        18: 0.026777876991052236,
+        19: 0.028484882538787896,
+        20: 0.026801000428807748,
+        21: 0.026491267328878083,
+        22: 0.009854355742782131,
+        23: 0.025933606869613404,
+        24: 0.030259632929485195,
+        25: 0.028528150284981933,
+        26: 0.025122026746346345,
+        27: 0.0248717601305118,
+        28: 0.02615053848987512,
+        29: 0.02414003659019552,
+        30: 0.02467453327092092,
+        31: 0.025077525128350233,
+        32: 0.025242437557127743,
+        33: 0.023507898401725093,
+        34: 0.025415248357798643,
+        35: 0.02552040855532856,
+        36: 0.009438325879954955,
+        37: 0.024896113502596674,
+        38: 0.024379170990695122,
+        39: 0.028698138538732647,
+    },
+    (True, False, False): {
+        0: 0.024805323912327603,
+        1: 0.024792400523099424,
+        2: 0.02477899735762471,
+        3: 0.024765826984637536,
+        4: 0.024752074863217777,
+        5: 0.02473806877155862,
+        6: 0.02472406202206543,
+        7: 0.02470992592628605,
+        8: 0.024696132805377777,
+        9: 0.024682244046391043,
+        10: 0.028544605479472743,
+        11: 0.024654910553188483,
+        12: 0.024748918287846238,
+        13: 0.024842806148700457,
+        14: 0.024939698562737565,
+        15: 0.025042534504144596,
+        16: 0.02515437715937658,
+        17: 0.0252787018987474,
+        18: 0.025203179824217745,
+        19: 0.025147786993402955,
+        20: 0.025103579387077954,
+        21: 0.02506513194899812,
+        22: 0.025023159424004317,
+        23: 0.024973422035556275,
+        24: 0.025012184737128407,
+        25: 0.025027538768716183,
+        26: 0.02502208140605413,
+        27: 0.02500813664985499,
+        28: 0.024983738794614397,
+        29: 0.02496101937818703,
+        30: 0.024936823005551886,
+        31: 0.024924869820389852,
+        32: 0.0249120580874315,
+        33: 0.024903729005624934,
+        34: 0.024890826052037764,
+        35: 0.02488017006051799,
+        36: 0.024864841463947518,
+        37: 0.02485044307066439,
+        38: 0.024833839298390253,
+        39: 0.02481983098083117,
+    },
+    (False, True, True): {
+        0: 0.031138028172334603,
+        1: 0.021524215848569284,
+        2: 0.018997690635651463,
+        3: 0.02185791454124146,
+        4: 0.023507772262957128,
+        5: 0.029931268564934888,
+        6: 0.02285359459972446,
+        7: 0.008760265657546172,
+        8: 0.023470106510337745,
+        9: 0.023306471017037426,
+        10: 0.05896419868709413,
+        11: 0.02735990818883086,
+        12: 0.026274609086755933,
+        13: 0.023855328143379435,
+        14: 0.024673747662671754,
+        15: 0.029186117197725497,
+        16: 0.027767510329905317,
+        17: 0.025718068109769322,
+        18: 0.029165169938975104,
+        19: 0.03071024294146064,
+        20: 0.028748259330765705,
+        21: 0.028303543623739928,
+        22: 0.010476965369973636,
+        23: 0.027385765578489644,
+        24: 0.031877948620758906,
+        25: 0.030636965006220093,
+        26: 0.027065109440750083,
+        27: 0.026793125867123405,
+        28: 0.02810736814521155,
+        29: 0.025911848517124254,
+        30: 0.0,
+        31: 0.02686591663261462,
+        32: 0.02633846361903798,
+        33: 0.02376569965995074,
+        34: 0.025104695458317297,
+        35: 0.02445895703305684,
+        36: 0.008715029108526435,
+        37: 0.022021782256231297,
+        38: 0.021931069604427807,
+        39: 0.02646925903077717,
+    },
+    (False, True, False): {
+        0: 0.022939611963680148,
+        1: 0.023118074497842204,
+        2: 0.02331311019356597,
+        3: 0.02357188008903391,
+        4: 0.023200349454864336,
+        5: 0.023005690356647776,
+        6: 0.022934412231424044,
+        7: 0.022945294159580385,
+        8: 0.023004082644830542,
+        9: 0.023079022671241844,
+        10: 0.05000000000000002,
+        11: 0.02313801826665124,
+        12: 0.023862834232856213,
+        13: 0.024583726272247704,
+        14: 0.025330552248686095,
+        15: 0.026127689682094727,
+        16: 0.026998035369742015,
+        17: 0.027966756735962762,
+        18: 0.027552099902866972,
+        19: 0.02726789891864094,
+        20: 0.027060388036319903,
+        21: 0.02688192550215799,
+        22: 0.026686889806433797,
+        23: 0.02642811991096627,
+        24: 0.02679965054513566,
+        25: 0.026994309643352237,
+        26: 0.027065587768575917,
+        27: 0.027054705840419607,
+        28: 0.02699591735516945,
+        29: 0.026920977328758137,
+        30: 0.0,
+        31: 0.026861981733348788,
+        32: 0.026137165767143738,
+        33: 0.025416273727752306,
+        34: 0.024669447751313918,
+        35: 0.023872310317905265,
+        36: 0.023001964630257984,
+        37: 0.022033243264037227,
+        38: 0.022447900097132965,
+        39: 0.02273210108135901,
+    },
+    (False, False, True): {
+        0: 0.03324234484491233,
+        1: 0.023363499648124706,
+        2: 0.020402417874065104,
+        3: 0.023166343173609924,
+        4: 0.02532704284581283,
+        5: 0.03224065176400664,
+        6: 0.024839338791436683,
+        7: 0.00950818221201422,
+        8: 0.025423138760452827,
+        9: 0.02516984158251001,
+        10: 0.034352962306067936,
+        11: 0.029252280318816225,
+        12: 0.027530833628182722,
+        13: 0.02410877843470428,
+        14: 0.024161499121120603,
+        15: 0.028174055924286134,
+        16: 0.025673314571505533,
+        17: 0.02307354433492363,
+        18: 0.02657439402592417,
+        19: 0.028331877091991843,
+        20: 0.026705078182808786,
+        21: 0.026431490683892618,
+        22: 0.009848851389168465,
+        23: 0.025963861736612276,
+        24: 0.030273723204142688,
+        25: 0.028502312222050873,
+        26: 0.025102397755554517,
+        27: 0.024872859765246856,
+        28: 0.0261696231317744,
+        29: 0.024188545321961036,
+        30: 0.024741865936035258,
+        31: 0.025165585610766702,
+        32: 0.025332883439766887,
+        33: 0.023611576076865398,
+        34: 0.0255235580596778,
+        35: 0.02565261565535541,
+        36: 0.009491389585650893,
+        37: 0.025058111766672865,
+        38: 0.024535889663768986,
+        39: 0.02891143955775925,
+    },
+    (False, False, False): {
+        0: 0.024999999999999998,
+        1: 0.024999999999999998,
+        2: 0.025000000000000005,
+        3: 0.024999999999999998,
+        4: 0.024999999999999998,
+        5: 0.025,
+        6: 0.024999999999999994,
+        7: 0.024999999999999998,
+        8: 0.025,
+        9: 0.025000000000000005,
+        10: 0.025000000000000005,
+        11: 0.025,
+        12: 0.024999999999999998,
+        13: 0.025000000000000005,
+        14: 0.025,
+        15: 0.025000000000000005,
+        16: 0.025,
+        17: 0.025000000000000005,
+        18: 0.025000000000000005,
+        19: 0.024999999999999998,
+        20: 0.024999999999999998,
+        21: 0.024999999999999998,
+        22: 0.025,
+        23: 0.024999999999999994,
+        24: 0.025,
+        25: 0.025,
+        26: 0.025000000000000005,
+        27: 0.024999999999999998,
+        28: 0.025000000000000203,
+        29: 0.024999999999999935,
+        30: 0.024999999999999932,
+        31: 0.025000000000000036,
+        32: 0.025000000000000022,
+        33: 0.02500000000000001,
+        34: 0.02499999999999999,
+        35: 0.024999999999999998,
+        36: 0.024999999999999984,
+        37: 0.024999999999999998,
+        38: 0.025000000000000005,
+        39: 0.02500000000000002,
+    },
+}
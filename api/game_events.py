@@ -0,0 +1,183 @@
+import itertools
+import json
+import threading
+from collections import deque
+from typing import IO, Iterable, List, Optional
+
+"""
+
+Structured game events.
+
+The simulator reports what happens in a turn as events rather than text: an event is a plain tuple of its kind
+followed by its field values, e.g. (RENT_DUE, "Player 1", 24, "Player 3"). Building a tuple costs next to nothing,
+and the text shown in the frontend logs is only rendered from it when somebody actually reads it (render()).
+
+    - EventLog: fixed-capacity ring buffer of events (a deque), with the lines of text rendered from them on
+      first use, so a log nobody watches is never rendered. optionally streams every event to a sink. a game
+      thread can add events while other threads read the lines
+    - JsonlSink: writes events as JSON lines ({"event": name, <field>: value, ...}) for offline analysis
+    - NO_EVENTS: drops everything. headless games pass it to the turn, which then also skips building the
+      expensive events (the explanation of every buy decision)
+"""
+
+
+# name, field names and text lines of every event kind, indexed by kind
+EVENT_TYPES = []
+
+
+def event_type(name: str, fields: tuple, *lines: str) -> int:
+    """register an event kind and return its number"""
+    EVENT_TYPES.append((name, fields, lines))
+    return len(EVENT_TYPES) - 1
+
+
+# turns
+TURN_START = event_type('turn_start', ('player', 'position', 'money'),
+                        "\n=== {player}'s turn ===", "Starting position: {position}", "Money: ${money}")
+THREE_DOUBLES = event_type('three_doubles', ('player',), "Rolled doubles three times in a row")
+ROLL_AGAIN = event_type('roll_again', ('player',), "Rolled doubles, rolling again")
+PASSED_GO = event_type('passed_go', ('player', 'amount'), "Passed Go, collected ${amount}")
+EMPTY_SQUARE = event_type('empty_square', ('player', 'position'), "Landed on non-property space")
+TAX_PAID = event_type('tax_paid', ('player', 'amount'), "{player} pays ${amount} tax")
+CARD_DRAWN = event_type('card_drawn', ('player', 'card'), "{player} draws: {card}")
+
+# buy decisions
+NO_PROPERTY = event_type('no_property', ('player', 'position'), "No property to buy at current position")
+INSUFFICIENT_FUNDS = event_type('insufficient_funds', ('player', 'money', 'price'), "Insufficient funds (${money} < ${price})")
+DECISION = event_type('decision', ('player', 'decision', 'property', 'value_difference', 'confidence', 'low', 'high',
+                                   'iterations', 'landing_frequency', 'price', 'money', 'color_group', 'owned_in_group',
+                                   'nearby', 'base_rent', 'risk'),
+                      "Decision: {decision} {property}",
+                      "Expected value difference: ${value_difference:.2f}",
+                      "Confidence interval ({confidence:.0%}): ${low:.2f} to ${high:.2f}",
+                      "Simulations run: {iterations}",
+                      "Landing frequency: {landing_frequency:.3f}",
+                      "Property price: ${price}",
+                      "Current money: ${money}",
+                      "Properties owned in {color_group}: {owned_in_group}",
+                      "Nearby opponent properties: {nearby}",
+                      "Base rent: ${base_rent}",
+                      "Risk level: {risk}")
+REPLAYED_DECISION = event_type('replayed_decision', ('player', 'decision', 'property'), "Decision: {decision} {property} (replayed)")
+PROPERTY_BOUGHT = event_type('property_bought', ('player', 'property', 'money'), "Property purchased. Remaining money: ${money}")
+
+# rent, debts and bankruptcy
+RENT_DUE = event_type('rent_due', ('player', 'amount', 'owner'), "{player} must pay ${amount} rent to {owner}")
+RENT_PAID = event_type('rent_paid', ('player', 'money'), "Rent paid. Remaining money: ${money}")
+NO_RENT_MORTGAGED = event_type('no_rent_mortgaged', ('player', 'property'), "{property} is mortgaged, no rent due")
+RAISING_CASH = event_type('raising_cash', ('player',), "{player} cannot afford rent, attempting to raise cash...")
+RAISED_AND_PAID = event_type('raised_and_paid', ('player', 'money'),
+                             "After raising cash and paying rent, {player} has ${money} remaining")
+SELLING_PROPERTIES = event_type('selling_properties', ('player',), "{player} cannot afford rent, attempting to sell properties...")
+CANNOT_SELL_ENOUGH = event_type('cannot_sell_enough', ('player',),
+                                "{player} cannot raise enough money even by selling all properties!")
+SOLD_AND_PAID = event_type('sold_and_paid', ('player', 'money'),
+                           "After selling properties and paying rent, {player} has ${money} remaining")
+CANNOT_PAY = event_type('cannot_pay', ('player', 'amount'), "{player} cannot raise ${amount}!")
+SOLD_PROPERTY = event_type('sold_property', ('player', 'property', 'amount'), "{player} sold {property} for ${amount}")
+SOLD_HOUSE = event_type('sold_house', ('player', 'property', 'amount'), "{player} sold a house on {property} for ${amount}")
+MORTGAGED = event_type('mortgaged', ('player', 'property', 'amount'), "{player} mortgaged {property} for ${amount}")
+MORTGAGE_LIFTED = event_type('mortgage_lifted', ('player', 'property', 'amount'),
+                             "{player} lifted the mortgage on {property} for ${amount}")
+BUILT = event_type('built', ('player', 'building', 'property'), "{player} built {building} on {property}")
+BANKRUPT = event_type('bankrupt', ('player',), "{player} is bankrupt!")
+PROPERTY_FREED = event_type('property_freed', ('property',), "Property {property} is now available for purchase")
+ELIMINATED = event_type('eliminated', ('player',), "{player} has been eliminated from the game")
+
+# jail
+SENT_TO_JAIL = event_type('sent_to_jail', ('player',), "{player} goes to jail")
+JAIL_CARD_USED = event_type('jail_card_used', ('player',), "{player} uses a Get Out of Jail Free card")
+JAIL_DOUBLES = event_type('jail_doubles', ('player',), "{player} rolled doubles and leaves jail")
+JAIL_FINE_PAID = event_type('jail_fine_paid', ('player', 'amount'), "{player} pays the ${amount} jail fine")
+STAYED_IN_JAIL = event_type('stayed_in_jail', ('player',), "{player} stays in jail")
+
+# game flow
+ROUND = event_type('round', ('round',), "@@@@ Round {round} @@@@", "")
+GAME_STARTED = event_type('game_started', (), "Game started!")
+PLAYER_MOVED = event_type('player_moved', ('player', 'start', 'end'), "{player} moved from {start} to {end}")
+GAME_OVER = event_type('game_over', (), "Game Over!")
+
+
+def render(event: tuple) -> List[str]:
+    """the log lines of an event"""
+    _, fields, lines = EVENT_TYPES[event[0]]
+    values = dict(zip(fields, event[1:]))
+    return [line.format_map(values) for line in lines]
+
+
+def event_to_dict(event: tuple) -> dict:
+    name, fields, _ = EVENT_TYPES[event[0]]
+    return {'event': name, **dict(zip(fields, event[1:]))}
+
+
+class JsonlSink:
+    """writes events to a file as one JSON object per line. `context` fields (e.g. the game) are added to every line"""
+
+    def __init__(self, path: str, **context):
+        self.file: IO[str] = open(path, 'w')
+        self.context = context
+
+    def write(self, event: tuple):
+        self.file.write(json.dumps({**self.context, **event_to_dict(event)}) + "\n")
+
+    def close(self):
+        self.file.close()
+
+
+class EventLog:
+    """ring buffer of the newest `capacity` events and of the newest `line_capacity` lines rendered from them"""
+
+    def __init__(self, capacity: int, line_capacity: Optional[int] = None, sink: Optional[JsonlSink] = None):
+        self.events: deque = deque(maxlen=capacity)
+        self.total = 0  # events ever added
+        self.text: deque = deque(maxlen=line_capacity if line_capacity is not None else capacity)
+        self.rendered = 0  # events rendered into the text so far
+        self.text_total = 0  # lines ever rendered, used to find the new lines for state patches
+        self.sink = sink
+        # guards the buffers and counters: rendering iterates the event buffer, which an append would invalidate
+        self.lock = threading.Lock()
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    def append(self, event: tuple):
+        with self.lock:
+            self.events.append(event)
+            self.total += 1
+        if self.sink is not None:
+            self.sink.write(event)
+
+    def extend(self, events: Iterable[tuple]):
+        events = list(events)
+        with self.lock:
+            self.events.extend(events)
+            self.total += len(events)
+        if self.sink is not None:
+            for event in events:
+                self.sink.write(event)
+
+    def lines(self) -> List[str]:
+        """the newest lines of text, oldest first. events are rendered the first time they are asked for, and
+           events that left the buffer before anybody asked are never rendered at all"""
+        with self.lock:
+            pending = self.total - self.rendered
+            if pending:
+                for event in itertools.islice(self.events, max(0, len(self.events) - pending), None):
+                    lines = render(event)
+                    self.text.extend(lines)
+                    self.text_total += len(lines)
+                self.rendered = self.total
+            return list(self.text)
+
+
+class NullLog:
+    """event log that throws everything away"""
+
+    def append(self, event: tuple):
+        pass
+
+    def extend(self, events: Iterable[tuple]):
+        pass
+
+
+NO_EVENTS = NullLog()
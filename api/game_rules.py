@@ -0,0 +1,152 @@
+from dataclasses import dataclass
+
+"""
+
+Rule configuration and rule tables for the Monopoly simulator.
+
+By default the simulator plays the simplified game it has always played: only the 22 streets can be bought,
+nobody builds, nothing happens when passing Go and every other square is empty. GameRules switches the official
+rules on one by one, and GameRules.full() switches all of them on:
+    - Go salary, taxes, Chance and Community Chest
+    - railroads and utilities
+    - double rent on unimproved complete sets, houses and hotels
+    - mortgages (and selling houses back) to raise cash
+    - jail, and rolling again after doubles
+
+The turn itself is table driven (see MonopolySimulator.build_turn_tables): every square gets a handler picked
+from the square's action type, and every property a rent table indexed by its development level.
+
+Simplifications: players leave jail by rolling doubles, with a Get Out of Jail Free card, or by paying the fine on
+their third try. A drawn Get Out of Jail Free card goes straight back under the deck. Bankrupt players return their
+properties to the bank.
+"""
+
+
+@dataclass(frozen=True)
+class GameRules:
+    """which of the official rules a game is played with"""
+    salary: int = 0           # collected when passing Go
+    railroads: bool = False   # railroads can be bought and charge 25/50/100/200 by number owned
+    utilities: bool = False   # utilities can be bought and charge 4x/10x the dice
+    set_rent: bool = False    # unimproved streets of a complete color set charge double rent
+    houses: bool = False      # players build houses and hotels evenly on their complete color sets
+    mortgages: bool = False   # cash is raised by selling houses and mortgaging, instead of selling properties
+    taxes: bool = False       # Income Tax and Luxury Tax
+    cards: bool = False       # Chance and Community Chest
+    jail: bool = False        # Go To Jail, and three doubles in a row send the player to jail
+    doubles: bool = False     # doubles roll again
+    jail_fine: int = 50
+    build_reserve: int = 300  # cash a player keeps in hand when building or lifting mortgages
+
+    @classmethod
+    def full(cls) -> 'GameRules':
+        """the official rules"""
+        return cls(salary=200, railroads=True, utilities=True, set_rent=True, houses=True, mortgages=True,
+                   taxes=True, cards=True, jail=True, doubles=True)
+
+    @classmethod
+    def named(cls, name: str) -> 'GameRules':
+        """rules by name, for command line options: 'simplified' or 'full'"""
+        if name == 'simplified':
+            return cls()
+        if name == 'full':
+            return cls.full()
+        raise ValueError(f"Unknown rule set: {name}")
+
+
+# action type of each square
+NOTHING = 0
+PROPERTY = 1
+TAX = 2
+CHANCE = 3
+COMMUNITY_CHEST = 4
+GO_TO_JAIL = 5
+
+# kind of each property
+STREET = 0
+RAILROAD = 1
+UTILITY = 2
+
+JAIL = 10
+GO_TO_JAIL_SQUARE = 30
+CHANCE_SQUARES = (7, 22, 36)
+COMMUNITY_CHEST_SQUARES = (2, 17, 33)
+TAXES = {4: 200, 38: 100}
+RAILROAD_SQUARES = (5, 15, 25, 35)
+UTILITY_SQUARES = (12, 28)
+HOTEL = 5  # houses on a property with a hotel
+
+# cost of one house on a street of each color group
+HOUSE_COSTS = {
+    "brown": 50,
+    "light_blue": 50,
+    "pink": 100,
+    "orange": 100,
+    "red": 150,
+    "yellow": 150,
+    "green": 200,
+    "dark_blue": 200
+}
+
+# railroads and utilities: name, position, price, rent by number owned (multiplier of the dice for utilities)
+RAILROADS = [
+    ("Reading Railroad", 5, 200, [25, 50, 100, 200], "railroad"),
+    ("Pennsylvania Railroad", 15, 200, [25, 50, 100, 200], "railroad"),
+    ("B. & O. Railroad", 25, 200, [25, 50, 100, 200], "railroad"),
+    ("Short Line", 35, 200, [25, 50, 100, 200], "railroad"),
+]
+UTILITIES = [
+    ("Electric Company", 12, 150, [4, 10], "utility"),
+    ("Water Works", 28, 150, [4, 10], "utility"),
+]
+
+# card actions
+ADVANCE = 0          # move to the square, collecting the salary when passing Go
+BACK = 1             # move back the given number of squares
+NEAREST_RAILROAD = 2 # move to the next railroad, paying twice the rent if it is owned
+NEAREST_UTILITY = 3  # move to the next utility, paying 10x a new roll of the dice if it is owned
+COLLECT = 4          # collect from the bank
+PAY = 5              # pay the bank
+COLLECT_EACH = 6     # collect from every other player
+PAY_EACH = 7         # pay every other player
+REPAIRS = 8          # pay (per house, per hotel)
+JAIL_FREE = 9        # keep a Get Out of Jail Free card
+TO_JAIL = 10         # go directly to jail
+
+# (action, value, text) of every card in each deck
+CHANCE_CARDS = (
+    (ADVANCE, 0, "Advance to Go"),
+    (ADVANCE, 24, "Advance to Illinois Avenue"),
+    (ADVANCE, 11, "Advance to St. Charles Place"),
+    (ADVANCE, 5, "Take a trip to Reading Railroad"),
+    (ADVANCE, 39, "Advance to Boardwalk"),
+    (NEAREST_UTILITY, 0, "Advance to the nearest utility"),
+    (NEAREST_RAILROAD, 0, "Advance to the nearest railroad"),
+    (NEAREST_RAILROAD, 0, "Advance to the nearest railroad"),
+    (BACK, 3, "Go back 3 spaces"),
+    (TO_JAIL, 0, "Go to jail"),
+    (JAIL_FREE, 0, "Get out of jail free"),
+    (COLLECT, 50, "Bank pays you dividend of $50"),
+    (COLLECT, 150, "Your building loan matures, collect $150"),
+    (PAY, 15, "Speeding fine $15"),
+    (PAY_EACH, 50, "Elected chairman of the board, pay each player $50"),
+    (REPAIRS, (25, 100), "General repairs: $25 per house, $100 per hotel"),
+)
+COMMUNITY_CHEST_CARDS = (
+    (ADVANCE, 0, "Advance to Go"),
+    (TO_JAIL, 0, "Go to jail"),
+    (JAIL_FREE, 0, "Get out of jail free"),
+    (COLLECT, 200, "Bank error in your favor, collect $200"),
+    (COLLECT, 50, "From sale of stock you get $50"),
+    (COLLECT, 100, "Holiday fund matures, collect $100"),
+    (COLLECT, 20, "Income tax refund, collect $20"),
+    (COLLECT, 100, "Life insurance matures, collect $100"),
+    (COLLECT, 25, "Receive $25 consultancy fee"),
+    (COLLECT, 10, "Second prize in a beauty contest, collect $10"),
+    (COLLECT, 100, "You inherit $100"),
+    (COLLECT_EACH, 10, "It is your birthday, collect $10 from every player"),
+    (PAY, 50, "Doctor's fee, pay $50"),
+    (PAY, 100, "Hospital fees, pay $100"),
+    (PAY, 50, "School fees, pay $50"),
+    (REPAIRS, (40, 115), "Street repairs: $40 per house, $115 per hotel"),
+)
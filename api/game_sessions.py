@@ -0,0 +1,556 @@
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Tuple, Union
+import dataclasses
+import os
+import threading
+import time
+import uuid
+from monopoly_sim import MonopolySimulator
+from game_rules import GameRules
+from metrics import Metrics, profiled
+from replay import ReplayLog
+from policy_table import PolicyTable
+from game_events import EventLog, JsonlSink, ROUND, GAME_STARTED, PLAYER_MOVED, GAME_OVER
+from monpoly_defs import Player, board_to_dict
+from wire_encoding import Encoder, get_encoder, wire_size
+
+"""
+
+Game sessions for the websocket server.
+
+Every session is one game with its own simulator, log buffers and set of subscribed clients, so any number
+of games can be watched at the same time without stepping on each other. The logs are ring buffers of game events
+(see game_events.py), rendered to text only while somebody is subscribed. Game loops run on a bounded thread
+pool owned by the SessionManager, which refuses to start more than `max_games` games at once.
+
+Broadcasts can be capped at `max_fps` frames per second independently of how fast the game runs. Turns played
+between two frames are coalesced into the next frame, which works for both protocols since a patch is always
+computed against the previous broadcast.
+
+Subscribers can be any connection object with a send(str or bytes) method. Every connection first gets a 'board'
+message: the name, price, rents, color group and landing frequency of every property square, keyed by board
+position (see board_to_dict in monpoly_defs.py). It never changes, so it is encoded once per encoding for the whole
+server, and the game state messages only refer to squares by position:
+    - 'state_update': the whole state
+        - players: [{name, money, position}]
+        - squares: {position: {owner, houses, mortgaged}} for owned squares, owner being the player's index
+        - game_log, ai_log, is_running
+    - 'state_patch': only what changed since the previous broadcast
+        - players: {index: {money, position}} for players whose money or position changed
+        - squares: {position: {owner, houses, mortgaged}} for squares that changed (owner None once unowned)
+        - game_log / ai_log: new log lines only
+        - is_running: only when it changed
+Each subscriber picks a protocol:
+    - 'full': a 'state_update' when it subscribes, then after every turn that changed something
+    - 'delta': one 'state_update' snapshot when it subscribes, then 'state_patch' messages
+Every message carries a sequence number, the version of the state it shows, so a delta client that sees a gap can
+ask for a new snapshot.
+
+Each subscriber also has an encoder (see wire_encoding.py). Messages are encoded at most once per state version
+and encoding, however many subscribers they go to: full clients, delta clients joining or resyncing and slow
+clients getting a snapshot instead of their backlog all share the encoded snapshot of the current version.
+
+Clients can also ask for a 'purchase_evaluations' table: the estimated value of buying every unowned property,
+for every solvent player (or one), from the current state of the game, best buy first. It is computed in one
+batched rollout pass (MonopolySimulator.evaluate_purchases) with a fixed seed, so asking twice about the same state
+gives the same table, and it never touches the game's own random streams.
+
+With a Metrics object (see metrics.py) the sessions record turns, broadcasts, bytes broadcast and per-client send
+latency, and their simulators record decisions and rollouts. With a profile_dir every game loop runs under
+cProfile and its profile is written to <profile_dir>/session-<id>.prof when the game ends. With a replay_dir every
+game records a replay log (see replay.py), saved to <replay_dir>/session-<id>-<game>.mprl when the game ends. With
+an event_dir every game streams its events to <event_dir>/session-<id>-<game>.jsonl. With a policy_table, games
+decide in table mode (see policy_table.py), so turns don't wait on Monte Carlo rollouts.
+"""
+
+
+GAME_LOG_SIZE = 20
+AI_LOG_SIZE = 100
+NUM_PLAYERS = 5
+
+
+def send(ws, message: str) -> bool:
+    """send a message to one client, False if the connection is dead"""
+    try:
+        ws.send(message)
+        return True
+    except Exception:
+        return False
+
+
+class GameSession:
+    """a single game and the clients watching it"""
+
+    def __init__(self, session_id: str, max_fps: Optional[float] = None, rules: Optional[GameRules] = None,
+                 metrics: Optional[Metrics] = None, replay_dir: Optional[str] = None, event_dir: Optional[str] = None,
+                 policy_table: Optional[PolicyTable] = None):
+        self.session_id = session_id
+        self.policy_table = policy_table
+        self.rules = rules
+        self.metrics = metrics
+        self.replay_dir = replay_dir
+        self.event_dir = event_dir
+        self.event_sink: Optional[JsonlSink] = None
+        self.games = 0  # games started in this session
+        self.max_fps = max_fps  # None broadcasts after every turn
+        self.last_broadcast = 0.0
+        self.simulator: Optional[MonopolySimulator] = None
+        self.game_log = EventLog(GAME_LOG_SIZE)
+        self.ai_log = EventLog(AI_LOG_SIZE)
+        self.is_running = False
+        self.subscribers: Dict[object, Tuple[str, Encoder]] = {}  # connection -> protocol, encoder
+        self.seq = 0  # sequence number of the last broadcast, the version of the state the clients were shown
+        self.view: Optional[dict] = None  # compact copy of the state at the last broadcast
+        self.patch: Optional[dict] = None  # patch from the previous version to this one, None after a snapshot
+        self.encoded: Dict[Tuple[int, str, str], Union[str, bytes]] = {}  # (version, message, encoding) -> message
+        self.future: Optional[Future] = None
+        # guards the subscribers, the sequence number and the last broadcast view, which are used by the
+        # game thread and every connection thread
+        self.lock = threading.RLock()
+        # held by the game thread around every turn, so other threads only ever see the game between two turns.
+        # taken inside self.lock when both are needed, never the other way round
+        self.turn_lock = threading.Lock()
+
+    def subscribe(self, ws, protocol: str, encoder: Encoder):
+        with self.lock:
+            self.subscribers[ws] = (protocol, encoder)
+            if self.view is None:
+                # nobody was watching, so there is no up to date state to send yet: broadcast one
+                self.broadcast_state()
+                return
+        # nothing may change for a while (or ever, in a finished game), so every new subscriber gets the current state
+        self.send_snapshot(ws, encoder)
+
+    def unsubscribe(self, ws):
+        with self.lock:
+            self.subscribers.pop(ws, None)
+
+    def new_game(self, seed: Optional[int] = None):
+        """set up a fresh game with NUM_PLAYERS players"""
+        with self.lock:
+            self.games += 1
+            replay_log = ReplayLog() if self.replay_dir else None
+            self.simulator = MonopolySimulator(rules=self.rules, metrics=self.metrics, seed=seed, replay_log=replay_log,
+                                               decision_mode='table' if self.policy_table is not None else 'live',
+                                               policy_table=self.policy_table)
+            self.simulator.players = [Player(f"Player {i + 1}", 1500, []) for i in range(NUM_PLAYERS)]
+            if self.event_dir:
+                os.makedirs(self.event_dir, exist_ok=True)
+                self.event_sink = JsonlSink(os.path.join(self.event_dir, f"session-{self.session_id}-{self.games}.jsonl"))
+            self.game_log = EventLog(GAME_LOG_SIZE, sink=self.event_sink)
+            self.ai_log = EventLog(AI_LOG_SIZE, sink=self.event_sink)
+            self.view = None  # seq keeps counting so delta clients never see a sequence number go backwards
+            self.log_game((GAME_STARTED,))
+            self.is_running = True
+
+    def log_game(self, event: tuple):
+        """add an event to the game log"""
+        self.game_log.append(event)
+
+    def log_ai(self, events: List[tuple]):
+        """add events to the ai log"""
+        self.ai_log.extend(events)
+
+    def capture_view(self) -> dict:
+        """compact copy of everything the clients are shown. renders the log events that are new since the last view"""
+        tables = self.simulator.tables
+        # connection threads broadcast too, so the board is copied between two turns of the game thread
+        with self.turn_lock:
+            players = list(zip(tables.money, tables.positions))
+            properties = [(owner if owner >= 0 else None, houses, mortgaged)
+                          for owner, houses, mortgaged in zip(tables.owners, tables.houses, tables.mortgaged)]
+        return {
+            'players': players,
+            'properties': properties,
+            'game_log': self.game_log.lines()[::-1],  # newest first
+            'ai_log': self.ai_log.lines(),
+            'game_log_total': self.game_log.text_total,  # lines ever rendered, to find the new lines for state patches
+            'ai_log_total': self.ai_log.text_total,
+            'is_running': self.is_running
+        }
+
+    @staticmethod
+    def square_dict(square: tuple) -> dict:
+        owner, houses, mortgaged = square
+        return {'owner': owner, 'houses': houses, 'mortgaged': bool(mortgaged)}
+
+    def snapshot_message(self, view: dict, seq: int) -> dict:
+        """full state message for the given view"""
+        positions = self.simulator.tables.board.positions
+        return {
+            'type': 'state_update',
+            'session_id': self.session_id,
+            'seq': seq,
+            'data': {
+                'players': [{'name': p.name, 'money': money, 'position': position}
+                            for p, (money, position) in zip(self.simulator.players, view['players'])],
+                'squares': {position: self.square_dict(square)
+                            for position, square in zip(positions, view['properties']) if square[0] is not None},
+                'game_log': view['game_log'],
+                'ai_log': view['ai_log'],
+                'is_running': view['is_running']
+            }
+        }
+
+    def patch_message(self, old: dict, new: dict, seq: int) -> Optional[dict]:
+        """state patch from the old view to the new one, None if nothing changed"""
+        patch = {}
+        players = {i: {key: value for key, value, old_value in zip(('money', 'position'), now, before) if value != old_value}
+                   for i, (now, before) in enumerate(zip(new['players'], old['players'])) if now != before}
+        if players:
+            patch['players'] = players
+        positions = self.simulator.tables.board.positions
+        squares = {position: self.square_dict(now)
+                   for position, now, before in zip(positions, new['properties'], old['properties']) if now != before}
+        if squares:
+            patch['squares'] = squares
+        new_game_lines = min(new['game_log_total'] - old['game_log_total'], len(new['game_log']))
+        if new_game_lines:
+            patch['game_log'] = new['game_log'][:new_game_lines]
+        new_ai_lines = min(new['ai_log_total'] - old['ai_log_total'], len(new['ai_log']))
+        if new_ai_lines:
+            patch['ai_log'] = new['ai_log'][-new_ai_lines:]
+        if new['is_running'] != old['is_running']:
+            patch['is_running'] = new['is_running']
+        if not patch:
+            return None
+        return {'type': 'state_patch', 'session_id': self.session_id, 'seq': seq, **patch}
+
+    def encode(self, message: str, encoder: Encoder) -> Union[str, bytes]:
+        """the 'snapshot' or 'patch' message of the current state version, encoded once per version and encoding"""
+        key = (self.seq, message, encoder.name)
+        encoded = self.encoded.get(key)
+        if encoded is not None:
+            if self.metrics is not None:
+                self.metrics.increment('encode_cache_hits')
+            return encoded
+        if self.metrics is not None:
+            start = time.perf_counter()
+        data = self.patch if message == 'patch' else self.snapshot_message(self.view, self.seq)
+        encoded = self.encoded[key] = encoder.encode(data)
+        if self.metrics is not None:
+            self.metrics.increment('encodes')
+            self.metrics.observe('encode_seconds', time.perf_counter() - start)
+        return encoded
+
+    def encoded_snapshot(self, encoder: Encoder) -> Optional[Union[str, bytes]]:
+        """encoded snapshot of the last broadcast state, None before the first broadcast"""
+        with self.lock:
+            if self.simulator and self.view:
+                return self.encode('snapshot', encoder)
+        return None
+
+    def send_snapshot(self, ws, encoder: Encoder):
+        """send the last broadcast state to a single client"""
+        snapshot = self.encoded_snapshot(encoder)
+        if snapshot:
+            send(ws, snapshot)
+
+    def broadcast_state(self):
+        """broadcast the current game state to all subscribed clients"""
+
+        # if the simulator is running, send the current state to the clients
+        if not self.simulator:
+            return
+        metrics = self.metrics
+        with self.lock:
+            if not self.subscribers:
+                # nobody is watching: don't render anything, and start the next subscriber from a fresh snapshot
+                self.view = None
+                return
+            if metrics is not None:
+                start = time.perf_counter()
+            old_view = self.view
+            new_view = self.capture_view()
+
+            # a new version of the state, unless nothing changed since the last broadcast. delta clients get the
+            # patch to it (or a snapshot if there is nothing to compare against yet), full clients a snapshot
+            patch = self.patch_message(old_view, new_view, self.seq + 1) if old_view is not None else None
+            self.view = new_view
+            changed = old_view is None or patch is not None
+            if changed:
+                self.seq += 1
+                self.patch = patch
+                self.encoded = {}  # encodes of the previous version are never sent again
+            if metrics is not None:
+                metrics.increment('broadcasts')
+                metrics.observe('broadcast_seconds', time.perf_counter() - start)
+            if not changed:
+                return
+
+            dead_clients = set()
+            sizes: Dict[Tuple[str, str], int] = {}  # (message, encoding) -> bytes on the wire, measured once
+            for ws, (protocol, encoder) in self.subscribers.items():
+                kind = 'patch' if protocol == 'delta' and patch else 'snapshot'
+                message = self.encode(kind, encoder)
+                if metrics is None:
+                    sent = send(ws, message)
+                else:
+                    start = time.perf_counter()
+                    sent = send(ws, message)
+                    metrics.increment('sends')
+                    metrics.observe('send_seconds', time.perf_counter() - start)
+                    size = sizes.get((kind, encoder.name))
+                    if size is None:
+                        size = sizes[kind, encoder.name] = wire_size(message)
+                    metrics.increment('bytes_broadcast', size)
+                if not sent:
+                    dead_clients.add(ws)
+
+            # Clean up dead connections
+            for ws in dead_clients:
+                self.subscribers.pop(ws, None)
+            if dead_clients and metrics is not None:
+                metrics.increment('dead_clients', len(dead_clients))
+
+    def game_loop(self):
+        """game loop that simulates the game until only one player remains solvent or the game is stopped"""
+        simulator = self.simulator
+        metrics = self.metrics
+
+        # while the game is running, simulate the game
+        while self.is_running:
+            # if only one player remains solvent, end the game
+            if len([p for p in simulator.players if p.money > 0]) <= 1:
+                self.is_running = False
+                self.log_game((GAME_OVER,))
+                break
+
+            # log the current round
+            self.ai_log.append((ROUND, simulator.round))
+            simulator.round += 1
+
+            for player in simulator.players:
+                if player.money > 0:
+                    old_position = player.position
+                    with self.turn_lock:
+                        if metrics is None:
+                            turn_logs = simulator.take_turn(player)
+                        else:
+                            with metrics.timer('turns'):
+                                turn_logs = simulator.take_turn(player)
+
+                    self.log_game((PLAYER_MOVED, player.name, old_position, player.position))
+                    self.log_ai(turn_logs)
+
+                    self.broadcast_frame()
+                    time.sleep(0)
+
+        # always show the final state, even if its frame would have been skipped
+        self.broadcast_state()
+        if simulator.replay_log is not None:
+            os.makedirs(self.replay_dir, exist_ok=True)
+            simulator.replay_log.save(os.path.join(self.replay_dir, f"session-{self.session_id}-{self.games}.mprl"))
+        if self.event_sink is not None:
+            self.event_sink.close()
+            self.event_sink = None
+
+    def broadcast_frame(self):
+        """broadcast unless the last frame was less than 1 / max_fps seconds ago"""
+        now = time.monotonic()
+        if not self.max_fps or now - self.last_broadcast >= 1 / self.max_fps:
+            self.last_broadcast = now
+            self.broadcast_state()
+
+    def evaluate_purchases(self, player_name: Optional[str] = None, seed: int = 0) -> List[dict]:
+        """ranked value of buying each unowned property, for every solvent player or only `player_name`"""
+        if not self.simulator:
+            return []
+        # the rollouts run on a copy of the game taken between two turns, so the game thread doesn't wait for them
+        with self.turn_lock:
+            game = self.simulator.fork()
+        players = [p for p in game.players if p.money > 0 and player_name in (None, p.name)]
+        unowned = [prop.position for prop in game.properties if prop.owner is None]
+        evaluations = game.evaluate_purchases([(player, position) for player in players for position in unowned],
+                                              seed=seed)
+        return [dataclasses.asdict(evaluation) for evaluation in evaluations]
+
+    def status(self) -> dict:
+        return {
+            'session_id': self.session_id,
+            'is_running': self.is_running,
+            'round': self.simulator.round if self.simulator else 0,
+            'subscribers': len(self.subscribers)
+        }
+
+
+class SessionManager:
+    """creates and looks up sessions, and runs their game loops on a bounded worker pool"""
+
+    def __init__(self, max_games: int = 32, max_fps: Optional[float] = None, rules: Optional[GameRules] = None,
+                 metrics: Optional[Metrics] = None, profile_dir: Optional[str] = None, replay_dir: Optional[str] = None,
+                 event_dir: Optional[str] = None, policy_table: Optional[PolicyTable] = None,
+                 encoding: Optional[str] = None):
+        self.max_games = max_games
+        self.max_fps = max_fps
+        self.rules = rules
+        self.metrics = metrics
+        self.profile_dir = profile_dir
+        self.replay_dir = replay_dir
+        self.event_dir = event_dir
+        self.policy_table = policy_table
+        if policy_table is not None:
+            # fail at startup rather than on the first decision of the first game
+            policy_table.check(rules or GameRules(), NUM_PLAYERS)
+        self.encoder = get_encoder(encoding)  # for clients that don't ask for an encoding
+        self.board: Optional[dict] = None
+        self.board_messages: Dict[str, Union[str, bytes]] = {}  # encoding -> encoded board message
+        self.executor = ThreadPoolExecutor(max_workers=max_games, thread_name_prefix='game')
+        self.sessions: Dict[str, GameSession] = {}
+        self.lock = threading.Lock()
+
+    def create(self) -> GameSession:
+        with self.lock:
+            session_id = uuid.uuid4().hex[:8]
+            session = GameSession(session_id, self.max_fps, self.rules, self.metrics, self.replay_dir, self.event_dir,
+                                  self.policy_table)
+            self.sessions[session_id] = session
+            return session
+
+    def get(self, session_id: str) -> Optional[GameSession]:
+        with self.lock:
+            return self.sessions.get(session_id)
+
+    def running_games(self) -> int:
+        with self.lock:
+            return sum(1 for s in self.sessions.values() if s.future and not s.future.done())
+
+    def start(self, session: GameSession) -> Optional[str]:
+        """start a new game in the session. returns an error message if it can't be started"""
+        with self.lock:
+            if session.future and not session.future.done():
+                return "Game is still running in this session"
+            running = sum(1 for s in self.sessions.values() if s.future and not s.future.done())
+            if running >= self.max_games:
+                return f"Server is already running the maximum of {self.max_games} games"
+            session.new_game()
+            if self.profile_dir:
+                path = os.path.join(self.profile_dir, f"session-{session.session_id}.prof")
+                session.future = self.executor.submit(profiled, session.game_loop, path)
+            else:
+                session.future = self.executor.submit(session.game_loop)
+        session.future.add_done_callback(lambda _: self.discard_if_idle(session))
+        return None
+
+    def stop(self, session: GameSession):
+        session.is_running = False
+
+    def discard_if_idle(self, session: GameSession):
+        """forget a session once its game is over and nobody is watching it anymore"""
+        with self.lock:
+            idle = not session.subscribers and not (session.future and not session.future.done())
+            if idle:
+                self.sessions.pop(session.session_id, None)
+
+    def board_message(self, encoder: Encoder) -> Union[str, bytes]:
+        """the static board, encoded once per encoding for the whole server (every game is played on the same board)"""
+        with self.lock:
+            encoded = self.board_messages.get(encoder.name)
+            if encoded is None:
+                if self.board is None:
+                    self.board = board_to_dict(MonopolySimulator(rules=self.rules).tables.board)
+                encoded = self.board_messages[encoder.name] = encoder.encode({'type': 'board', 'squares': self.board})
+            return encoded
+
+    def list(self) -> List[dict]:
+        with self.lock:
+            return [s.status() for s in self.sessions.values()]
+
+    def stats(self) -> dict:
+        """server-wide metrics (None when instrumentation is off) and session counts"""
+        with self.lock:
+            sessions = len(self.sessions)
+            running = sum(1 for s in self.sessions.values() if s.future and not s.future.done())
+        return {
+            'sessions': sessions,
+            'running_games': running,
+            'metrics': self.metrics.snapshot() if self.metrics is not None else None
+        }
+
+
+class SessionClient:
+    """one client connection: handles its messages and tracks the session it is subscribed to.
+       `ws` is anything with a send(str or bytes) method, so every server transport can share this.
+       raises ValueError for an unknown encoding"""
+
+    def __init__(self, sessions: SessionManager, ws, protocol: str, encoding: Optional[str] = None):
+        self.sessions = sessions
+        self.ws = ws
+        self.protocol = protocol
+        self.encoder = get_encoder(encoding) if encoding else sessions.encoder
+        self.session: Optional[GameSession] = None
+
+    def send_message(self, message: dict):
+        send(self.ws, self.encoder.encode(message))
+
+    def send_board(self):
+        """send the static board, once when the client connects"""
+        send(self.ws, self.sessions.board_message(self.encoder))
+
+    def join(self, session: GameSession):
+        self.leave()
+        self.session = session
+        session.subscribe(self.ws, self.protocol, self.encoder)
+
+    def leave(self):
+        if self.session:
+            self.session.unsubscribe(self.ws)
+            self.sessions.discard_if_idle(self.session)
+            self.session = None
+
+    def handle(self, data: dict):
+        """handle one message from the client"""
+        if data['type'] == 'start_game':
+            # start a new game in the client's own session, never touching anyone else's
+            if not self.session:
+                self.join(self.sessions.create())
+                self.send_message({'type': 'session_created', 'session_id': self.session.session_id})
+            error = self.sessions.start(self.session)
+            if error:
+                self.send_message({'type': 'error', 'message': error})
+
+        elif data['type'] == 'stop_game':
+            if self.session:
+                self.sessions.stop(self.session)
+
+        elif data['type'] == 'create_session':
+            self.join(self.sessions.create())
+            self.send_message({'type': 'session_created', 'session_id': self.session.session_id})
+
+        elif data['type'] == 'join_session':
+            target = self.sessions.get(data.get('session_id', ''))
+            if not target:
+                self.send_message({'type': 'error', 'message': f"No session {data.get('session_id')}"})
+                return
+            # acknowledge first: clients drop the previous session's state on session_joined, not its first snapshot
+            self.send_message({'type': 'session_joined', 'session_id': target.session_id})
+            self.join(target)
+
+        elif data['type'] == 'leave_session':
+            self.leave()
+            return
+
+        elif data['type'] == 'list_sessions':
+            self.send_message({'type': 'sessions', 'sessions': self.sessions.list()})
+            return
+
+        elif data['type'] == 'get_stats':
+            self.send_message({'type': 'stats', **self.sessions.stats()})
+            return
+
+        elif data['type'] == 'evaluate_purchases':
+            if not self.session:
+                self.send_message({'type': 'error', 'message': "Not in a session"})
+                return
+            self.send_message({'type': 'purchase_evaluations', 'session_id': self.session.session_id,
+                            'evaluations': self.session.evaluate_purchases(data.get('player'), data.get('seed', 0))})
+            return
+
+        elif data['type'] == 'resync':
+            # the client missed a patch, send it a fresh snapshot instead of broadcasting
+            if self.session:
+                self.session.send_snapshot(self.ws, self.encoder)
+            return
+
+        if self.session:
+            self.session.broadcast_state()
@@ -0,0 +1,191 @@
+import os
+import sys
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, List, Tuple
+import numpy as np
+from game_rules import (GameRules, JAIL, GO_TO_JAIL_SQUARE, CHANCE_SQUARES, COMMUNITY_CHEST_SQUARES, RAILROAD_SQUARES,
+                        UTILITY_SQUARES, CHANCE_CARDS, COMMUNITY_CHEST_CARDS, ADVANCE, BACK, NEAREST_RAILROAD,
+                        NEAREST_UTILITY, TO_JAIL)
+from board_tables import LANDING_FREQUENCIES
+
+"""
+
+Exact landing frequencies for the Monopoly board, solved as the stationary distribution of a Markov chain.
+
+Each step of the chain is one roll of two dice. Without the doubles rule the state is just the square the token
+is on (40 states). With the doubles rule the state also tracks how many doubles have been rolled in a row
+(40 x 3 = 120 states), since a third double in a row sends the player to jail.
+
+The landing frequency of a square is the probability that the token comes to rest there after a roll, once
+Go To Jail and (optionally) the Chance/Community Chest movement cards have been applied. Players are assumed to
+leave jail on their next roll. Solving the chain takes a few milliseconds, and results are cached per rule set.
+The squares and the cards come from game_rules.py, and BoardRules.of(rules) picks the movement rules a GameRules
+game is played with.
+
+The frequencies of every BoardRules configuration are also precomputed into board_tables.py, which is what games
+use by default (see landing_frequencies): starting a game (or a worker process) then needs neither the solve nor
+numpy.linalg.
+
+Run from the api directory, after changing the model:
+    python markov_board.py            # regenerate board_tables.py
+    python markov_board.py --check    # exit with status 1 if board_tables.py is out of date
+"""
+
+
+BOARD_SIZE = 40
+SENT_TO_JAIL = -1  # resolved target for tokens sent to jail, as opposed to just visiting square 10
+BOARD_TABLES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'board_tables.py')
+BOARD_TABLES_HEADER = '''"""
+
+Board tables precomputed by markov_board.py, so that games start without solving the landing-frequency Markov
+chain. Generated by `python markov_board.py`, do not edit.
+"""
+
+
+# probability of coming to rest on each square after a roll, by movement rules (BoardRules fields, in order)
+LANDING_FREQUENCIES = {
+'''
+
+
+@dataclass(frozen=True)
+class BoardRules:
+    """movement rules included in the landing-frequency model"""
+    doubles: bool = True     # three doubles in a row send the player to jail (120-state chain)
+    go_to_jail: bool = True  # landing on square 30 sends the player to jail
+    cards: bool = True       # apply the movement cards of the Chance and Community Chest decks
+
+    @classmethod
+    def of(cls, rules: GameRules) -> 'BoardRules':
+        """the movement rules of a game played with `rules`"""
+        return cls(doubles=rules.doubles and rules.jail, go_to_jail=rules.jail, cards=rules.cards)
+
+
+# every BoardRules configuration, the ones board_tables.py holds
+ALL_BOARD_RULES = tuple(BoardRules(doubles, go_to_jail, cards) for doubles in (True, False)
+                        for go_to_jail in (True, False) for cards in (True, False))
+
+
+def _next_after(square: int, targets: Tuple[int, ...]) -> int:
+    """the first of `targets` reached moving forward from `square`"""
+    return min(targets, key=lambda t: (t - square) % BOARD_SIZE)
+
+
+def _resolve(square: int, rules: BoardRules) -> List[Tuple[int, float]]:
+    """where a token that lands on `square` finally comes to rest, as (square, probability) pairs"""
+    if rules.go_to_jail and square == GO_TO_JAIL_SQUARE:
+        return [(SENT_TO_JAIL, 1.0)]
+    if not rules.cards:
+        return [(square, 1.0)]
+
+    if square in CHANCE_SQUARES:
+        deck = CHANCE_CARDS
+    elif square in COMMUNITY_CHEST_SQUARES:
+        deck = COMMUNITY_CHEST_CARDS
+    else:
+        return [(square, 1.0)]
+    outcomes = []
+    stay = 0.0
+    for action, value, _ in deck:
+        if action == ADVANCE:
+            outcomes.append((value, 1 / len(deck)))
+        elif action == NEAREST_UTILITY:
+            outcomes.append((_next_after(square, UTILITY_SQUARES), 1 / len(deck)))
+        elif action == NEAREST_RAILROAD:
+            outcomes.append((_next_after(square, RAILROAD_SQUARES), 1 / len(deck)))
+        elif action == TO_JAIL:
+            outcomes.append((SENT_TO_JAIL, 1 / len(deck)))
+        elif action == BACK:
+            # going back can land on another card or tax square, so it is resolved again
+            outcomes += [(s, p / len(deck)) for s, p in _resolve((square - value) % BOARD_SIZE, rules)]
+        else:
+            stay += 1 / len(deck)
+    outcomes.append((square, stay))
+    return outcomes
+
+
+def transition_matrix(rules: BoardRules = BoardRules()) -> np.ndarray:
+    """(states, states) transition matrix of one roll. state = square + 40 * doubles rolled in a row"""
+    streaks = 3 if rules.doubles else 1
+    matrix = np.zeros((BOARD_SIZE * streaks, BOARD_SIZE * streaks))
+    for streak in range(streaks):
+        for square in range(BOARD_SIZE):
+            state = square + BOARD_SIZE * streak
+            for die1 in range(1, 7):
+                for die2 in range(1, 7):
+                    is_double = rules.doubles and die1 == die2
+                    if is_double and streak == 2:
+                        # third double in a row: straight to jail, the turn ends
+                        matrix[state, JAIL] += 1 / 36
+                        continue
+                    for target, probability in _resolve((square + die1 + die2) % BOARD_SIZE, rules):
+                        if target == SENT_TO_JAIL:
+                            # going to jail ends the turn, so the doubles streak is reset
+                            matrix[state, JAIL] += probability / 36
+                        else:
+                            next_streak = streak + 1 if is_double else 0
+                            matrix[state, target + BOARD_SIZE * next_streak] += probability / 36
+    return matrix
+
+
+@lru_cache(maxsize=None)
+def _solve(rules: BoardRules) -> Tuple[float, ...]:
+    matrix = transition_matrix(rules)
+    states = len(matrix)
+    # stationary distribution: pi (P - I) = 0 with sum(pi) = 1, solved by replacing one
+    # (redundant) balance equation with the normalization constraint
+    system = matrix.T - np.eye(states)
+    system[-1] = 1.0
+    rhs = np.zeros(states)
+    rhs[-1] = 1.0
+    stationary = np.linalg.solve(system, rhs)
+    return tuple(stationary.reshape(-1, BOARD_SIZE).sum(axis=0))
+
+
+def solve_landing_frequencies(rules: BoardRules = BoardRules()) -> Dict[int, float]:
+    """probability of coming to rest on each square after a roll, under the given rules"""
+    return dict(enumerate(_solve(rules)))
+
+
+def landing_frequencies(rules: GameRules) -> Dict[int, float]:
+    """landing frequencies of a game played with `rules`, precomputed in board_tables.py"""
+    board_rules = BoardRules.of(rules)
+    return LANDING_FREQUENCIES[(board_rules.doubles, board_rules.go_to_jail, board_rules.cards)]
+
+
+def board_tables() -> Dict[Tuple[bool, bool, bool], Dict[int, float]]:
+    """the landing frequencies of every BoardRules configuration, as board_tables.py holds them"""
+    return {(rules.doubles, rules.go_to_jail, rules.cards):
+            {square: float(frequency) for square, frequency in solve_landing_frequencies(rules).items()}
+            for rules in ALL_BOARD_RULES}
+
+
+def write_board_tables(path: str = BOARD_TABLES):
+    """write the landing frequencies of every BoardRules configuration to board_tables.py, which games load at
+       startup"""
+    lines = []
+    for key, frequencies in board_tables().items():
+        lines.append(f"    {key!r}: {{")
+        lines += [f"        {square}: {frequency!r}," for square, frequency in frequencies.items()]
+        lines.append("    },")
+    with open(path, 'w') as f:
+        f.write(BOARD_TABLES_HEADER + "\n".join(lines) + "\n}\n")
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Regenerate (or check) the precomputed board tables")
+    parser.add_argument('--check', action='store_true', help="exit with status 1 if board_tables.py is out of date")
+    args = parser.parse_args()
+    if args.check:
+        if LANDING_FREQUENCIES != board_tables():
+            print(f"{BOARD_TABLES} is out of date, run python markov_board.py")
+            sys.exit(1)
+        print(f"{BOARD_TABLES} is up to date")
+        return
+    write_board_tables()
+    print(f"Wrote {BOARD_TABLES}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,158 @@
+import bisect
+import cProfile
+import os
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence
+
+"""
+
+Instrumentation for the simulator and the websocket servers.
+
+A Metrics object holds named counters and histograms. It is off unless one is created and handed to the
+simulator (MonopolySimulator(metrics=...)) or to the SessionManager, which passes it on to every game it runs.
+Without one, the instrumented code paths only check `metrics is not None` once per decision or broadcast, and
+nothing is counted or timed.
+
+What is recorded:
+    - decisions, decisions_seconds: buy decisions made and how long each took
+    - rollouts, rollout_seconds, iterations: rollout runs, their duration and the iterations each one used
+      (fewer than the budget in adaptive mode)
+    - cache_hits, cache_misses: decision cache lookups
+    - table_hits, table_misses: policy table lookups (table decision mode)
+    - batch_rollouts, batch_queries, batch_rollout_seconds: batched purchase evaluations (evaluate_purchases), the
+      queries they answered and how long their rollouts took
+    - turns, turns_seconds: turns played by the session game loops
+    - broadcasts, broadcast_seconds, bytes_broadcast: state broadcasts, time spent diffing them and bytes sent
+    - encodes, encode_seconds, encode_cache_hits: state messages encoded, how long each encode took, and sends
+      that reused a message already encoded for the same state version and encoding
+    - sends, send_seconds, dead_clients: messages handed to each client and how long sending them took
+    - dropped_messages: messages thrown away for slow clients (async server)
+
+Histograms use fixed exponential buckets, so recording is a bisect and two additions, and percentiles are
+estimated from the bucket bounds. Metrics.snapshot() returns everything as a dict (the websocket 'stats'
+message) and Metrics.prometheus_text() in the Prometheus text format (the /metrics endpoints).
+
+profiled() runs a function under cProfile and dumps the profile to a file, for the servers' profiling switch.
+Open the dumps with `python -m pstats` or snakeviz.
+"""
+
+
+# upper bounds of the time buckets, in seconds: 1us to ~8s, doubling
+TIME_BUCKETS = tuple(1e-6 * 2 ** i for i in range(24))
+# upper bounds of the count buckets: 1 to ~1M, doubling
+COUNT_BUCKETS = tuple(float(2 ** i) for i in range(21))
+
+
+class Histogram:
+    """distribution of observed values over fixed buckets"""
+
+    def __init__(self, bounds: Sequence[float] = TIME_BUCKETS):
+        self.bounds = tuple(bounds)
+        self.counts = [0] * (len(self.bounds) + 1)  # the last bucket holds everything above the largest bound
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.bounds, value)] += 1
+        self.count += 1
+        self.sum += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        """upper bound of the bucket holding the q-th quantile (the largest value seen, for the last bucket)"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for bound, count in zip(self.bounds, self.counts):
+            seen += count
+            if seen >= rank:
+                return min(bound, self.max)
+        return self.max
+
+    def summary(self) -> dict:
+        return {
+            'count': self.count,
+            'sum': self.sum,
+            'mean': self.sum / self.count if self.count else 0.0,
+            'p50': self.percentile(0.5),
+            'p90': self.percentile(0.9),
+            'p99': self.percentile(0.99),
+            'max': self.max
+        }
+
+
+class Metrics:
+    """thread-safe named counters and histograms"""
+
+    def __init__(self, prefix: str = 'monopoly'):
+        self.prefix = prefix
+        self.counters: Dict[str, float] = {}
+        self.histograms: Dict[str, Histogram] = {}
+        self.started = time.time()
+        self.lock = threading.Lock()
+
+    def increment(self, name: str, amount: float = 1):
+        with self.lock:
+            self.counters[name] = self.counters.get(name, 0) + amount
+
+    def observe(self, name: str, value: float, bounds: Sequence[float] = TIME_BUCKETS):
+        with self.lock:
+            histogram = self.histograms.get(name)
+            if histogram is None:
+                histogram = self.histograms[name] = Histogram(bounds)
+            histogram.observe(value)
+
+    @contextmanager
+    def timer(self, name: str):
+        """count a call and record its duration in the `name`_seconds histogram"""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            self.increment(name)
+            self.observe(f"{name}_seconds", elapsed)
+
+    def snapshot(self) -> dict:
+        """every counter, and a summary of every histogram"""
+        with self.lock:
+            return {
+                'uptime_seconds': time.time() - self.started,
+                'counters': dict(self.counters),
+                'histograms': {name: histogram.summary() for name, histogram in self.histograms.items()}
+            }
+
+    def prometheus_text(self) -> str:
+        """everything in the Prometheus text exposition format"""
+        lines: List[str] = []
+        with self.lock:
+            for name, value in sorted(self.counters.items()):
+                metric = f"{self.prefix}_{name}_total"
+                lines += [f"# TYPE {metric} counter", f"{metric} {value}"]
+            for name, histogram in sorted(self.histograms.items()):
+                metric = f"{self.prefix}_{name}"
+                lines.append(f"# TYPE {metric} histogram")
+                cumulative = 0
+                for bound, count in zip(histogram.bounds, histogram.counts):
+                    cumulative += count
+                    lines.append(f'{metric}_bucket{{le="{bound:g}"}} {cumulative}')
+                lines.append(f'{metric}_bucket{{le="+Inf"}} {histogram.count}')
+                lines += [f"{metric}_sum {histogram.sum}", f"{metric}_count {histogram.count}"]
+        return "\n".join(lines) + "\n"
+
+
+def profiled(function, path: str, *args, **kwargs):
+    """run function(*args, **kwargs) under cProfile and write the profile to `path`"""
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    profile = cProfile.Profile()
+    try:
+        return profile.runcall(function, *args, **kwargs)
+    finally:
+        profile.dump_stats(path)
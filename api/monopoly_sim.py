@@ -1,7 +1,32 @@
 import random
-from typing import List, Dict, Tuple
+from typing import Iterable, List, Dict, Tuple, Optional, TYPE_CHECKING
 import copy
-from monpoly_defs import Player, Property
+import dataclasses
+import os
+import time
+from operator import itemgetter
+from collections import Counter, OrderedDict, deque
+import numpy as np
+from monpoly_defs import (Player, Property, GameState, DecisionEstimate, PurchaseEvaluation, Strategy, DEFAULT_STRATEGY,
+                          BoardTable, GameTables)
+from game_rules import (GameRules, NOTHING, PROPERTY, TAX, CHANCE, COMMUNITY_CHEST, GO_TO_JAIL, STREET, RAILROAD, UTILITY,
+                        JAIL, GO_TO_JAIL_SQUARE, CHANCE_SQUARES, COMMUNITY_CHEST_SQUARES, TAXES, RAILROAD_SQUARES,
+                        UTILITY_SQUARES, HOTEL, HOUSE_COSTS, RAILROADS, UTILITIES, CHANCE_CARDS, COMMUNITY_CHEST_CARDS,
+                        ADVANCE, BACK, NEAREST_RAILROAD, NEAREST_UTILITY, COLLECT, PAY, COLLECT_EACH, PAY_EACH, REPAIRS,
+                        JAIL_FREE, TO_JAIL)
+from markov_board import landing_frequencies as rules_landing_frequencies
+from rollout_engine import build_board_arrays, plan_chunks, run_chunks, run_batch, ChunkTotals, PairedEstimate
+from replay import stream_random
+from game_events import (NO_EVENTS, EventLog, render, TURN_START, THREE_DOUBLES, ROLL_AGAIN, PASSED_GO, EMPTY_SQUARE,
+                         TAX_PAID, CARD_DRAWN, NO_PROPERTY, INSUFFICIENT_FUNDS, DECISION, REPLAYED_DECISION,
+                         PROPERTY_BOUGHT, RENT_DUE, RENT_PAID, NO_RENT_MORTGAGED, RAISING_CASH, RAISED_AND_PAID,
+                         SELLING_PROPERTIES, CANNOT_SELL_ENOUGH, SOLD_AND_PAID, CANNOT_PAY, SOLD_PROPERTY, SOLD_HOUSE,
+                         MORTGAGED, MORTGAGE_LIFTED, BUILT, BANKRUPT, PROPERTY_FREED, ELIMINATED, SENT_TO_JAIL,
+                         JAIL_CARD_USED, JAIL_DOUBLES, JAIL_FINE_PAID, STAYED_IN_JAIL, ROUND)
+if TYPE_CHECKING:
+    from policy_table import PolicyTable
+    from metrics import Metrics
+    from replay import ReplayLog
 
 """
 
@@ -16,84 +41,344 @@ This simulator implements basic decision making logic. Simply put, it attempts t
 the expected value of a property based on landing frequency, color set completion, nearby
 opponent properties, and current cash.
 
+Buy decisions are made in one of three modes:
+    - 'live' (default): every decision runs Monte Carlo rollouts on one of three engines: 'vectorized' (default,
+      see rollout_engine.py), 'scalar' (the original one-rollout-at-a-time loop, kept as the reference) or 'policy'
+      (full-game rollouts, see policy_rollouts.py)
+    - 'table': decisions are looked up in a precomputed PolicyTable (see policy_table.py), and only states outside
+      the table fall back to live rollouts
+    - 'heuristic': buy if calculate_expected_property_value rates the property at least at its base rent, without
+      any rollouts
+
+The rules are set by a GameRules object (see game_rules.py), and the state of the game lives in the arrays of a
+GameTables (see monpoly_defs.py), which players and properties are views of.
+
 """
 
 
+def z_score(confidence: float) -> float:
+    """two-sided z score of a confidence level. statistics is only imported by the first decision that needs it"""
+    from statistics import NormalDist
+    return NormalDist().inv_cdf(0.5 + confidence / 2)
+
+
+class DecisionCache:
+    """bounded LRU cache of buy/no-buy estimates keyed by a canonical game-state signature. a cache can be shared
+       between simulators and saved to disk, so batches of games only pay for each situation once"""
+    
+    def __init__(self, maxsize: int = 100_000, cash_bucket: int = 50, path: Optional[str] = None):
+        self.maxsize = maxsize
+        self.cash_bucket = cash_bucket
+        self.path = path
+        self.entries: 'OrderedDict[tuple, DecisionEstimate]' = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+        
+        # warm up from a previous run if the cache file exists
+        if path and os.path.exists(path):
+            import pickle
+            with open(path, 'rb') as f:
+                self.entries.update(pickle.load(f))
+            while len(self.entries) > maxsize:
+                self.entries.popitem(last=False)
+    
+    def __len__(self) -> int:
+        return len(self.entries)
+    
+    def key(self, square: int, state: GameState, player_index: int, config: tuple = ()) -> tuple:
+        """canonical signature of a decision: players with cash in the same bucket share an entry. `config` is the
+           fingerprint of the rollouts making the estimate (see MonopolySimulator.decision_config), so simulators
+           sharing a cache, or loading its file, only reuse the estimates of their own engine, budget and rules"""
+        cash = tuple(money // self.cash_bucket for money in state.money)
+        return (square, state.owners, state.houses, state.mortgaged, cash, player_index, config)
+    
+    def get(self, key: tuple) -> Optional[DecisionEstimate]:
+        estimate = self.entries.get(key)
+        if estimate is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self.entries.move_to_end(key)
+        return estimate
+    
+    def put(self, key: tuple, estimate: DecisionEstimate):
+        self.entries[key] = estimate
+        self.entries.move_to_end(key)
+        if len(self.entries) > self.maxsize:
+            self.entries.popitem(last=False)
+    
+    def save(self, path: Optional[str] = None):
+        """write the cache to disk (atomically, so a crash mid-write doesn't corrupt an existing file)"""
+        path = path or self.path
+        if not path:
+            raise ValueError("No path to save the decision cache to")
+        import pickle
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            pickle.dump(self.entries, f, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(tmp_path, path)
+
+
 class MonopolySimulator:
     """simulate a game of Monopoly"""
     
-    def __init__(self, landing_frequencies: Dict[int, float]):
-        self.properties = self.initialize_properties(landing_frequencies)
+    def __init__(self, landing_frequencies: Optional[Dict[int, float]] = None, engine: str = "vectorized", workers: int = 1, seed: Optional[int] = None,
+                 adaptive: bool = False, confidence: float = 0.95, decision_cache: Optional[DecisionCache] = None,
+                 iterations: int = 1000, rules: Optional[GameRules] = None, metrics: Optional['Metrics'] = None,
+                 replay_log: Optional['ReplayLog'] = None, replay: Optional['ReplayLog'] = None,
+                 decision_mode: str = "live", policy_table: Optional['PolicyTable'] = None, check_totals: bool = False,
+                 horizon: int = 20, opponent_policy: str = "heuristic", time_budget_ms: Optional[float] = None,
+                 strategies: Optional[Dict[str, Strategy]] = None):
+        if engine not in ("vectorized", "scalar", "policy"):
+            raise ValueError(f"Unknown rollout engine: {engine}")
+        if engine == "policy":
+            # the opponent policies only play in policy rollouts, so only games using them import them
+            from policy_rollouts import OPPONENT_POLICIES
+            if opponent_policy not in OPPONENT_POLICIES:
+                raise ValueError(f"Unknown opponent policy: {opponent_policy}")
+        strategies = strategies or {}
+        for mode in [decision_mode] + [s.decision_mode for s in strategies.values() if s.decision_mode is not None]:
+            if mode not in ("live", "table", "heuristic"):
+                raise ValueError(f"Unknown decision mode: {mode}")
+            if mode == "table" and policy_table is None:
+                raise ValueError("The table decision mode requires a policy table")
+        if workers > 1 and engine != "vectorized":
+            raise ValueError("Parallel rollouts require the vectorized engine")
+        self.rules = rules or GameRules()
+        # by default, use the exact landing frequencies of the game's movement rules, precomputed (see markov_board.py)
+        if landing_frequencies is None:
+            landing_frequencies = rules_landing_frequencies(self.rules)
+        self.replay_log = replay_log  # records this game's dice and decisions
+        self.replay = replay  # recorded game being played back
+        # players and properties are views into the game's arrays (see GameTables in monpoly_defs.py)
+        self.tables = GameTables(self.initialize_board(landing_frequencies))
         self.num_properties = len(self.properties)
         self.players: List[Player] = []
         self.round = 1
+        self.engine = engine
+        self.board = build_board_arrays(self.properties)
+        self.build_board_index()
+        self.build_turn_tables()
+        # independent streams for the real dice and for the rollouts of every decision
+        root_seed = np.random.SeedSequence(seed)
+        dice_seed, self.seed_sequence = root_seed.spawn(2)
+        self.dice = stream_random(dice_seed)
+        if replay_log is not None:
+            replay_log.metadata.update(seed=root_seed.entropy, rules=dataclasses.asdict(self.rules))
+        # Chance and Community Chest decks, shuffled once per game
+        self.decks = {}
+        if self.rules.cards:
+            self.decks = {CHANCE: deque(self.dice.sample(CHANCE_CARDS, len(CHANCE_CARDS))),
+                          COMMUNITY_CHEST: deque(self.dice.sample(COMMUNITY_CHEST_CARDS, len(COMMUNITY_CHEST_CARDS)))}
+        self.workers = workers
+        self.adaptive = adaptive
+        self.confidence = confidence
+        self.decision_cache = decision_cache
+        self.iterations = iterations
+        self.horizon = horizon  # turns of the deciding player per rollout, 40-200 is realistic for the policy engine
+        self.opponent_policy = opponent_policy
+        self.time_budget_ms = time_budget_ms
+        self.rollout_policy = None  # buy policy replacing decisions inside a policy rollout's universe
+        self.strategies = strategies  # player name -> Strategy, for players who don't play DEFAULT_STRATEGY
+        self.purchases = 0
+        self.decision_mode = decision_mode
+        self.policy_table = policy_table
+        if policy_table is not None:
+            policy_table.check(self.rules)
+            if policy_table.num_properties != self.num_properties:
+                raise ValueError(f"Policy table is for a board of {policy_table.num_properties} properties, "
+                                 f"this game has {self.num_properties}")
+        self.metrics = metrics
+        self.check_totals = check_totals  # check the running totals against a full recount after every turn (slow)
+        self._pool = None
+        
+        
+    def close(self):
+        """shut down the rollout worker pool, if one was started"""
+        if self._pool:
+            self._pool.close()
+            self._pool = None
+            
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc_info):
+        self.close()
         
         
-    def initialize_properties(self, landing_frequencies: Dict[int, float]) -> List[Property]:
-        # property values in the order of the board
+    def initialize_board(self, landing_frequencies: Dict[int, float]) -> BoardTable:
+        # property values in the order of the board: name, position, price, rent, color group
         properties = [
-            Property(name="Mediterranean Avenue", position=1, price=60, rent=[2, 10, 30, 90, 160, 250], color_group="brown"),
-            Property(name="Baltic Avenue", position=3, price=60, rent=[4, 20, 60, 180, 320, 450], color_group="brown"),
-            Property(name="Oriental Avenue", position=6, price=100, rent=[6, 30, 90, 270, 400, 550], color_group="light_blue"),
-            Property(name="Vermont Avenue", position=8, price=100, rent=[6, 30, 90, 270, 400, 550], color_group="light_blue"),
-            Property(name="Connecticut Avenue", position=9, price=120, rent=[8, 40, 100, 300, 450, 600], color_group="light_blue"),
-            Property(name="St. Charles Place", position=11, price=140, rent=[10, 50, 150, 450, 625, 750], color_group="pink"),
-            Property(name="States Avenue", position=13, price=140, rent=[10, 50, 150, 450, 625, 750], color_group="pink"),
-            Property(name="Virginia Avenue", position=14, price=160, rent=[12, 60, 180, 500, 700, 900], color_group="pink"),
-            Property(name="St. James Place", position=16, price=180, rent=[14, 70, 200, 550, 750, 950], color_group="orange"),
-            Property(name="Tennessee Avenue", position=18, price=180, rent=[14, 70, 200, 550, 750, 950], color_group="orange"),
-            Property(name="New York Avenue", position=19, price=200, rent=[16, 80, 220, 600, 800, 1000], color_group="orange"),
-            Property(name="Kentucky Avenue", position=21, price=220, rent=[18, 90, 250, 700, 875, 1050], color_group="red"),
-            Property(name="Indiana Avenue", position=23, price=220, rent=[18, 90, 250, 700, 875, 1050], color_group="red"),
-            Property(name="Illinois Avenue", position=24, price=240, rent=[20, 100, 300, 750, 925, 1100], color_group="red"),
-            Property(name="Atlantic Avenue", position=26, price=260, rent=[22, 110, 330, 800, 975, 1150], color_group="yellow"),
-            Property(name="Ventnor Avenue", position=27, price=260, rent=[22, 110, 330, 800, 975, 1150], color_group="yellow"),
-            Property(name="Marvin Gardens", position=29, price=280, rent=[24, 120, 360, 850, 1025, 1200], color_group="yellow"),
-            Property(name="Pacific Avenue", position=31, price=300, rent=[26, 130, 390, 900, 1100, 1275], color_group="green"),
-            Property(name="North Carolina Avenue", position=32, price=300, rent=[26, 130, 390, 900, 1100, 1275], color_group="green"),
-            Property(name="Pennsylvania Avenue", position=34, price=320, rent=[28, 150, 450, 1000, 1200, 1400], color_group="green"),
-            Property(name="Park Place", position=37, price=350, rent=[35, 175, 500, 1100, 1300, 1500], color_group="dark_blue"),
-            Property(name="Boardwalk", position=39, price=400, rent=[50, 200, 600, 1400, 1700, 2000], color_group= "dark_blue"),
+            ("Mediterranean Avenue", 1, 60, [2, 10, 30, 90, 160, 250], "brown"),
+            ("Baltic Avenue", 3, 60, [4, 20, 60, 180, 320, 450], "brown"),
+            ("Oriental Avenue", 6, 100, [6, 30, 90, 270, 400, 550], "light_blue"),
+            ("Vermont Avenue", 8, 100, [6, 30, 90, 270, 400, 550], "light_blue"),
+            ("Connecticut Avenue", 9, 120, [8, 40, 100, 300, 450, 600], "light_blue"),
+            ("St. Charles Place", 11, 140, [10, 50, 150, 450, 625, 750], "pink"),
+            ("States Avenue", 13, 140, [10, 50, 150, 450, 625, 750], "pink"),
+            ("Virginia Avenue", 14, 160, [12, 60, 180, 500, 700, 900], "pink"),
+            ("St. James Place", 16, 180, [14, 70, 200, 550, 750, 950], "orange"),
+            ("Tennessee Avenue", 18, 180, [14, 70, 200, 550, 750, 950], "orange"),
+            ("New York Avenue", 19, 200, [16, 80, 220, 600, 800, 1000], "orange"),
+            ("Kentucky Avenue", 21, 220, [18, 90, 250, 700, 875, 1050], "red"),
+            ("Indiana Avenue", 23, 220, [18, 90, 250, 700, 875, 1050], "red"),
+            ("Illinois Avenue", 24, 240, [20, 100, 300, 750, 925, 1100], "red"),
+            ("Atlantic Avenue", 26, 260, [22, 110, 330, 800, 975, 1150], "yellow"),
+            ("Ventnor Avenue", 27, 260, [22, 110, 330, 800, 975, 1150], "yellow"),
+            ("Marvin Gardens", 29, 280, [24, 120, 360, 850, 1025, 1200], "yellow"),
+            ("Pacific Avenue", 31, 300, [26, 130, 390, 900, 1100, 1275], "green"),
+            ("North Carolina Avenue", 32, 300, [26, 130, 390, 900, 1100, 1275], "green"),
+            ("Pennsylvania Avenue", 34, 320, [28, 150, 450, 1000, 1200, 1400], "green"),
+            ("Park Place", 37, 350, [35, 175, 500, 1100, 1300, 1500], "dark_blue"),
+            ("Boardwalk", 39, 400, [50, 200, 600, 1400, 1700, 2000], "dark_blue"),
         ]
+        # railroads and utilities are only on the board if the rules include them
+        if self.rules.railroads:
+            properties += RAILROADS
+        if self.rules.utilities:
+            properties += UTILITIES
+        properties.sort(key=lambda prop: prop[1])
+        names, positions, prices, rents, color_groups = zip(*properties)
         
         # letting the landing frequencies be set by caller to play with different board setups
-        for prop in properties:
-            prop.landing_frequency = landing_frequencies.get(prop.position, 0.0)
-            
-        return properties
+        return BoardTable(names, positions, prices, rents, color_groups,
+                          [landing_frequencies.get(position, 0.0) for position in positions])
+
+
+    @property
+    def properties(self) -> List[Property]:
+        return self.tables.properties
+
+
+    @property
+    def players(self) -> List[Player]:
+        return self.tables.players
+
+
+    @players.setter
+    def players(self, players: List[Player]):
+        # the players' money and positions move into this game's arrays
+        self.tables.attach_players(players)
+        if self.replay_log is not None:
+            self.replay_log.metadata['players'] = [(p.name, p.money) for p in players]
+
+
+    def build_board_index(self):
+        """precompute index-based lookup tables for the board. they only hold property indices, so they stay
+           valid for (and are shared with) every fork of this simulator."""
+        
+        # square -> index into self.properties, -1 for squares that aren't properties
+        self.square_to_index = [-1] * 40
+        for i, prop in enumerate(self.properties):
+            self.square_to_index[prop.position] = i
+        
+        # square -> indices of the properties within 5 spaces of it (accounting for board wrap-around)
+        self.nearby_indices = []
+        for square in range(40):
+            nearby = []
+            for i, prop in enumerate(self.properties):
+                distance = min(abs(prop.position - square), 40 - abs(prop.position - square))
+                if distance <= 5:
+                    nearby.append(i)
+            self.nearby_indices.append(nearby)
+    
+    
+    def build_turn_tables(self):
+        """precompute the tables the turn kernel runs on: the action type and handler of every square, and the
+           kind, rent table (by development level) and color group size of every property"""
+        board = self.tables.board
+        rules = self.rules
+        
+        self.property_kinds = [RAILROAD if group == "railroad" else UTILITY if group == "utility" else STREET
+                               for group in board.color_groups]
+        group_sizes = Counter(board.group_ids)
+        self.property_group_sizes = [group_sizes[group] for group in board.group_ids]
+        self.rent_tables = []
+        for rent, kind in zip(board.rents, self.property_kinds):
+            if kind == STREET:
+                # level 0: unimproved, 1: unimproved complete set, 2-6: one to four houses, hotel
+                self.rent_tables.append((rent[0], rent[0] * 2 if rules.set_rent else rent[0]) + rent[1:])
+            else:
+                # level n - 1: owner has n railroads (utilities). utility rents multiply the dice
+                self.rent_tables.append(rent)
+        
+        # (property indices, getter of the group's entries in a per-property array, house cost) of every color group
+        # houses can be built on, by group id
+        self.street_groups = {}
+        for name, group in board.group_index.items():
+            if name in HOUSE_COSTS:
+                members = [i for i, g in enumerate(board.group_ids) if g == group]
+                self.street_groups[group] = (members, itemgetter(*members), HOUSE_COSTS[name])
+        # complete-set bitmask -> (the street groups in it, getter of the entries of all their streets), filled in as
+        # bitmasks come up
+        self.buildable_groups: Dict[int, tuple] = {}
+        
+        # action type of each square, and the handler that resolves landing on it
+        self.square_actions = [NOTHING] * 40
+        for square in range(40):
+            if self.square_to_index[square] >= 0:
+                self.square_actions[square] = PROPERTY
+            elif rules.taxes and square in TAXES:
+                self.square_actions[square] = TAX
+            elif rules.cards and square in CHANCE_SQUARES:
+                self.square_actions[square] = CHANCE
+            elif rules.cards and square in COMMUNITY_CHEST_SQUARES:
+                self.square_actions[square] = COMMUNITY_CHEST
+            elif rules.jail and square == GO_TO_JAIL_SQUARE:
+                self.square_actions[square] = GO_TO_JAIL
+        # plain functions rather than bound methods, so forks of this simulator can share the table
+        handlers = {
+            NOTHING: MonopolySimulator.land_on_nothing,
+            PROPERTY: MonopolySimulator.land_on_property,
+            TAX: MonopolySimulator.land_on_tax,
+            CHANCE: MonopolySimulator.land_on_chance,
+            COMMUNITY_CHEST: MonopolySimulator.land_on_community_chest,
+            GO_TO_JAIL: MonopolySimulator.land_on_go_to_jail,
+        }
+        self.square_handlers = [handlers[action] for action in self.square_actions]
+        self.develops = rules.houses or rules.mortgages
+    
+    
+    def property_at(self, position: int) -> Optional[Property]:
+        """the property on the given square, or None for non-property squares"""
+        index = self.square_to_index[position]
+        return self.properties[index] if index >= 0 else None
 
 
     def calculate_expected_property_value(self, property: Property, player: Player) -> float:
         """Calculate expected value of a property based on rent, landing frequency, color set completion, 
             nearby opponent properties, and current cash"""
             
+        # the weights of the heuristic come from the player's strategy (the defaults are given in the comments)
+        strategy = self.strategies.get(player.name, DEFAULT_STRATEGY)
+        
         # initialize base value of property to 0
         value = 0.0
         
         # creates a landing frequency multiplier that boosts or penalizes the value of the property if it is above or below average (.025).
         # multiply the property's rent by the multiplier to boost or penalize the property value
-        landing_freq_multiplier = (property.landing_frequency / 0.025) ** 2
+        landing_freq_multiplier = (property.landing_frequency / strategy.frequency_baseline) ** 2
         base_rent_value = property.rent[0] * landing_freq_multiplier
         value += base_rent_value
         
         # if the player owns the entire color group, boost the value by 100%
         # if the player owns any properties in the color group, boost the value by 25% for each property
         color_group = property.color_group.lower()
-        owned_in_group = len(player.get_properties_in_color_group(color_group))
+        owned_in_group = player.count_in_color_group(color_group)
         if player.owns_complete_set(color_group):
-            value *= 2.0
+            value *= strategy.complete_set_multiplier
         elif owned_in_group > 0:
-            value *= (1.0 + (0.25 * owned_in_group))  
+            value *= (1.0 + (strategy.group_member_bonus * owned_in_group))
             
         # if there are opponent properties nearby, penalize the value by 10% for each nearby property (within 5 spaces)
         opponent_props_nearby = self.count_nearby_opponent_properties(property, player)
         if opponent_props_nearby > 0:
-            value *= (1.0 - (0.1 * opponent_props_nearby)) 
+            value *= (1.0 - (strategy.nearby_penalty * opponent_props_nearby))
             
         # if the player has less than half of the average starting cash, penalize the value by 20%
         cash_ratio = player.money / 1500 
         if cash_ratio < 0.5:  
-            value *= 0.8 
+            value *= strategy.low_cash_multiplier
             
         return value
 
@@ -101,60 +386,233 @@ class MonopolySimulator:
     def count_nearby_opponent_properties(self, property: Property, player: Player) -> int:
         """count how many properties within 5 spaces are owned by opponents"""
         
-        # initialize count of nearby opponent properties to 0.
-        # iterate through all players and count the number of properties within 5 spaces
-        # return the count
+        # look up the properties within 5 spaces in the precomputed neighbor table
+        # and count the ones owned by other players
+        owners = self.tables.owners
+        players = self.tables.players
         count = 0
-        for other_player in self.players:
-            if other_player.name != player.name:
-                for op in other_player.properties:
-                    distance = min(
-                        abs(op.position - property.position),
-                        40 - abs(op.position - property.position)  # Account for board wrap-around
-                    )
-                    if distance <= 5:
-                        count += 1
+        for i in self.nearby_indices[property.position]:
+            owner = owners[i]
+            if owner >= 0 and players[owner].name != player.name:
+                count += 1
         return count
 
 
-    def simulate_turn(self, player: Player, iterations: int = 1000) -> Tuple[bool, float]:
+    def snapshot(self) -> GameState:
+        """capture the mutable game state (owners, houses, money, positions) as a compact snapshot"""
+        return self.tables.snapshot()
+
+
+    def restore(self, state: GameState):
+        """overwrite the mutable game state with a snapshot taken from this simulator or one of its forks"""
+        self.tables.load(state)
+
+
+    def fork(self, dice: Optional[random.Random] = None) -> 'MonopolySimulator':
+        """create an independent 'universe' of this game. the board definition (names, prices, rent tables)
+           is shared with this simulator, only the owner/houses/money/positions are copied. the universe rolls its
+           dice with `dice`, by default a copy of this game's dice (copying a generator is most of the cost of a fork,
+           so rollouts pass their own)."""
+        universe = copy.copy(self)
+        universe.tables = self.tables.copy()
+        universe.decks = {deck: cards.copy() for deck, cards in self.decks.items()}
+        # the universe never records to (or reads from) the replay log
+        universe.dice = dice if dice is not None else copy.copy(self.dice)
+        universe.replay_log = None
+        universe.replay = None
+        return universe
+
+
+    def roll_dice(self) -> Tuple[int, int]:
+        """roll the two real dice, or read them back from the log being replayed"""
+        if self.replay is not None:
+            code = self.replay.next_roll()
+        else:
+            code = self.dice.randrange(36)
+            if self.replay_log is not None:
+                self.replay_log.record_roll(code)
+        return code // 6 + 1, code % 6 + 1
+
+
+    def simulate_turn(self, player: Player, iterations: Optional[int] = None) -> Tuple[bool, float]:
         """simulate potential outcomes of buying vs not buying the current property."""
+        estimate = self.estimate_purchase(player, iterations)
+        return estimate.should_buy, estimate.value_difference
+
+
+    def estimate_purchase(self, player: Player, iterations: Optional[int] = None) -> DecisionEstimate:
+        """run paired buy/no-buy rollouts for the current property (self.iterations of them by default). in adaptive
+           mode, `iterations` is the maximum budget and sampling stops once the confidence interval of the difference
+           excludes zero. with time_budget_ms, the vectorized and policy engines stop starting new rollouts once the
+           decision has used its budget. where that happens depends on the machine, so budgeted decisions aren't
+           reproducible from the seed alone."""
+        strategy = self.strategies.get(player.name, DEFAULT_STRATEGY)
+        iterations = iterations or strategy.iterations or self.iterations
+        horizon = strategy.horizon or self.horizon
+        decision_mode = strategy.decision_mode or self.decision_mode
         
         # if the property is not valid or the player cannot afford it, do not buy
-        current_property = next((p for p in self.properties if p.position == player.position), None)
+        property_index = self.square_to_index[player.position]
+        current_property = self.properties[property_index] if property_index >= 0 else None
         if not current_property or not player.can_afford(current_property.price):
-            return False, 0.0
+            return DecisionEstimate(False, 0.0, 0, (0.0, 0.0))
+        
+        # the heuristic needs no rollouts: the value difference is by how much it rates the property above its base rent
+        if decision_mode == "heuristic":
+            value = self.calculate_expected_property_value(current_property, player) - current_property.rent[0]
+            return DecisionEstimate(value >= 0, value, 0, (value, value))
+        
+        # in table mode, look the decision up and only simulate states the table doesn't cover
+        if decision_mode == "table":
+            value = self.policy_table.lookup(self, player, property_index)
+            if self.metrics is not None:
+                self.metrics.increment('table_hits' if value is not None else 'table_misses')
+            if value is not None:
+                return DecisionEstimate(value > 0, value, 0, (value, value))
+
+        # snapshot the current game state and derive the state where the player buys the property.
+        # both snapshots are a handful of integers, so every rollout can start from a fresh copy of them
+        player_index = next(i for i, p in enumerate(self.players) if p.name == player.name)
+        no_buy_state = self.snapshot()
+        buy_state = no_buy_state.with_purchase(property_index, player_index, current_property.price)
+        
+        if self.decision_cache is not None:
+            cache_key = self.decision_cache.key(current_property.position, no_buy_state, player_index,
+                                                self.decision_config(iterations, horizon))
+            cached = self.decision_cache.get(cache_key)
+            if self.metrics is not None:
+                self.metrics.increment('cache_hits' if cached is not None else 'cache_misses')
+            if cached is not None:
+                return cached
+        
+        rollout_start = time.perf_counter()
+        deadline = rollout_start + self.time_budget_ms / 1000 if self.time_budget_ms is not None else None
+        z = z_score(self.confidence)
+        estimate = PairedEstimate()
+        if self.engine == "vectorized":
+            # each decision gets its own child seed, split further into one seed per chunk of rollouts
+            chunks = plan_chunks(iterations, self.seed_sequence.spawn(1)[0])
+            if self.workers > 1 and not self._pool:
+                from parallel_rollouts import RolloutPool
+                self._pool = RolloutPool(self.board, self.workers)
+            # without early stopping or a time budget everything runs in one batch, otherwise one chunk (or one
+            # chunk per worker) at a time. the stopping rule is checked chunk by chunk in chunk order, so where it
+            # stops doesn't depend on the worker count either
+            batch_size = self.workers if self.adaptive or deadline is not None else len(chunks)
+            decided = False
+            for start in range(0, len(chunks), batch_size):
+                batch = chunks[start:start + batch_size]
+                if self._pool:
+                    totals = self._pool.run(buy_state, no_buy_state, player_index, horizon, batch)
+                else:
+                    totals = run_chunks(self.board, buy_state, no_buy_state, player_index, horizon, batch)
+                for chunk_totals in totals:
+                    estimate.add(chunk_totals)
+                    decided = self.adaptive and estimate.is_decided(z)
+                    if decided:
+                        break
+                if decided or (deadline is not None and time.perf_counter() >= deadline):
+                    break
+        elif self.engine == "policy":
+            from policy_rollouts import run_policy_rollouts
+            rng = stream_random(self.seed_sequence.spawn(1)[0])
+            estimate.add(run_policy_rollouts(self, buy_state, no_buy_state, player_index, iterations, horizon,
+                                             self.opponent_policy, rng, deadline))
+        else:
+            estimate.add(self._scalar_rollouts(buy_state, no_buy_state, player_index, iterations, horizon))
+        
+        if self.metrics is not None:
+            from metrics import COUNT_BUCKETS
+            self.metrics.increment('rollouts')
+            self.metrics.observe('rollout_seconds', time.perf_counter() - rollout_start)
+            self.metrics.observe('iterations', estimate.iterations, COUNT_BUCKETS)
+        
+        value_difference = estimate.mean_difference
+        result = DecisionEstimate(value_difference > 0, value_difference, estimate.iterations, estimate.interval(z))
+        if self.decision_cache is not None:
+            self.decision_cache.put(cache_key, result)
+        return result
+
 
-        # create two 'simulations' of the game, one where the player buys the property and one where they don't, and copy the current game state into each
-        # within each game state, get the respective player instance
-        buy_universe = copy.deepcopy(self) 
-        no_buy_universe = copy.deepcopy(self)
-        buy_player = next(p for p in buy_universe.players if p.name == player.name)
-        no_buy_player = next(p for p in no_buy_universe.players if p.name == player.name)
+    def decision_config(self, iterations: int, horizon: int) -> tuple:
+        """everything besides the game state that the estimate of a decision depends on"""
+        return (self.engine, iterations, horizon, self.adaptive, self.confidence, self.time_budget_ms,
+                self.opponent_policy if self.engine == "policy" else None, self.rules)
+
+
+    def evaluate_purchases(self, queries: Iterable[Tuple[Player, int]], iterations: Optional[int] = None,
+                           seed: Optional[int] = None) -> List[PurchaseEvaluation]:
+        """estimate the buy/no-buy value difference of every (player, board position) query, as if the player had just
+           landed on the square, and return them ranked from the best buy down. the rollouts of every query run
+           together on the vectorized engine, with a fixed budget of `iterations` (self.iterations by default).
+           they draw from the game's rollout stream unless a `seed` is given. properties that are owned or the player
+           can't afford are never worth buying and get no rollouts"""
+        iterations = iterations or self.iterations
+        state = self.snapshot()
+        evaluations = []
+        batch = []  # (row of evaluations, player index, property index) of the queries that need rollouts
+        for player, position in queries:
+            property_index = self.square_to_index[position]
+            if property_index < 0:
+                raise ValueError(f"There is no property at position {position}")
+            prop = self.properties[property_index]
+            evaluations.append(PurchaseEvaluation(player.name, position, prop.name, False, 0.0, 0, (0.0, 0.0)))
+            if state.owners[property_index] < 0 and player.can_afford(prop.price):
+                batch.append((len(evaluations) - 1, player.index, property_index))
+        
+        if batch:
+            rollout_start = time.perf_counter() if self.metrics is not None else 0.0
+            seed_sequence = np.random.SeedSequence(seed) if seed is not None else self.seed_sequence.spawn(1)[0]
+            totals = run_batch(self.board, state, [(player, prop) for _, player, prop in batch], self.horizon,
+                               plan_chunks(iterations, seed_sequence))
+            z = z_score(self.confidence)
+            for query, (row, _, _) in enumerate(batch):
+                estimate = PairedEstimate()
+                estimate.add(ChunkTotals(0, totals.size, float(totals.buy_sum[query]), float(totals.no_buy_sum[query]),
+                                         float(totals.difference_sq_sum[query])))
+                value_difference = estimate.mean_difference
+                evaluations[row] = dataclasses.replace(evaluations[row], should_buy=value_difference > 0,
+                                                       value_difference=value_difference, iterations=estimate.iterations,
+                                                       interval=estimate.interval(z))
+            if self.metrics is not None:
+                self.metrics.increment('batch_rollouts')
+                self.metrics.increment('batch_queries', len(batch))
+                self.metrics.observe('batch_rollout_seconds', time.perf_counter() - rollout_start)
+        
+        return sorted(evaluations, key=lambda evaluation: evaluation.value_difference, reverse=True)
+
+
+    def _scalar_rollouts(self, buy_state: GameState, no_buy_state: GameState, player_index: int, iterations: int,
+                         horizon: int) -> ChunkTotals:
+        """reference rollout loop: one rollout at a time through simulate_future_turns, returned as a single chunk"""
         
-        # Execute the purchase in buy universe
-        buy_property = next(p for p in buy_universe.properties if p.position == current_property.position)
-        buy_player.pay(buy_property.price)
-        buy_property.owner = buy_player
-        buy_player.properties.append(buy_property)
+        # a single scratch universe is forked once and reset to the right snapshot before each rollout.
+        # the rollouts roll their dice from the decision's own slice of the rollout stream
+        rng = stream_random(self.seed_sequence.spawn(1)[0])
+        universe = self.fork(rng)
+        universe_player = universe.players[player_index]
         
         buy_score = 0
         no_buy_score = 0
+        difference_sq_sum = 0
         
         for _ in range(iterations):
-            # Simulate both universes with full game state
-            buy_result = self.simulate_future_turns(buy_universe, buy_player, 20)
-            no_buy_result = self.simulate_future_turns(no_buy_universe, no_buy_player, 20)
+            # Simulate both universes with full game state, replaying the same dice in the no-buy universe
+            universe.restore(buy_state)
+            dice_state = rng.getstate()
+            buy_result = self.simulate_future_turns(universe, universe_player, horizon, rng)
+            universe.restore(no_buy_state)
+            rng.setstate(dice_state)
+            no_buy_result = self.simulate_future_turns(universe, universe_player, horizon, rng)
             
             buy_score += buy_result
             no_buy_score += no_buy_result
+            difference_sq_sum += (buy_result - no_buy_result) ** 2
         
-        avg_buy_score = buy_score / iterations
-        avg_no_buy_score = no_buy_score / iterations
-        
-        return avg_buy_score > avg_no_buy_score, avg_buy_score - avg_no_buy_score
+        return ChunkTotals(0, iterations, buy_score, no_buy_score, difference_sq_sum)
+
 
-    def simulate_future_turns(self, game_state: 'MonopolySimulator', player: Player, num_turns: int) -> float:
+    def simulate_future_turns(self, game_state: 'MonopolySimulator', player: Player, num_turns: int, rng: random.Random) -> float:
         """simulate future turns considering the full game state - used for game states where property is already bought
            is being evaluated whether to buy or not."""
         
@@ -163,19 +621,20 @@ class MonopolySimulator:
         
         # simulate the future turns by iterating through the number of turns
         # on each turn, roll two dice, add them together to get the roll
-        # if the player lands on a property that is owned by another player, collect rent
+        # if the player lands on an unmortgaged property that is owned by another player, collect rent
         # if the player does not have enough money, attempt to sell properties to pay the rent
         # if the player lands on a property that is unowned, do nothing
         for _ in range(num_turns):
             # Roll dice and move
-            roll1, roll2 = random.randint(1, 6), random.randint(1, 6)
+            roll1, roll2 = rng.randint(1, 6), rng.randint(1, 6)
             roll = roll1 + roll2
             player.position = (player.position + roll) % 40
             
             # Handle property landing
-            current_property = next((p for p in game_state.properties if p.position == player.position), None)
-            if current_property and current_property.owner and current_property.owner != player:
-                rent = current_property.rent[current_property.houses]
+            current_property = game_state.property_at(player.position)
+            if (current_property and current_property.owner and current_property.owner != player
+                    and not current_property.mortgaged):
+                rent = game_state.tables.board.rollout_rents[current_property.index][current_property.houses]
                 if current_property.owner.owns_complete_set(current_property.color_group):
                     rent *= 2
                 if player.money >= rent:
@@ -187,60 +646,72 @@ class MonopolySimulator:
         
         # add the value of the player's properties to the score
         # if the player owns the entire color group, add 50% more value to the property
-        for prop in player.properties:
-            property_value = prop.price
-            if player.owns_complete_set(prop.color_group):
-                property_value *= 1.5  # Premium for complete sets
-            score += property_value
+        # (a running total, see GameTables)
+        tables = game_state.tables
+        if game_state.check_totals:
+            tables.check_totals()
+        score += tables.set_values[player.index]
             
         # add the expected future rent income to the score
-        # expected rent is the rent of the property at its current development level
+        # expected rent is the rent of the property at its current development level, times its landing frequency
         # if the player owns the entire color group, multiply the rent by 2
-        for prop in player.properties:
-            expected_landings = prop.landing_frequency * (len(game_state.players) - 1) * (num_turns / 40)
-            expected_rent = prop.rent[prop.houses]
-            if player.owns_complete_set(prop.color_group):
-                expected_rent *= 2
-            score += expected_landings * expected_rent
+        score += tables.rent_incomes[player.index] * (len(game_state.players) - 1) * (num_turns / 40)
         
         return score
 
 
     def make_decision(self, player: Player) -> Tuple[bool, str]:
         """make a decision to buy or not buy the current property"""
+        should_buy, event = self.decide(player)
+        return should_buy, "\n".join(render(event))
+
+
+    def decide(self, player: Player, explain: bool = True) -> Tuple[bool, Optional[tuple]]:
+        """decide whether to buy the current property. returns the decision and the event explaining it
+           (None if explain is False)"""
         
         # get the current property the player is on
-        current_property = next((p for p in self.properties if p.position == player.position), None)
+        current_property = self.property_at(player.position)
         if not current_property:
-            return False, "No property to buy at current position"
+            return False, (NO_PROPERTY, player.name, player.position) if explain else None
             
         # if the player cannot afford the property, do not buy
         if not player.can_afford(current_property.price):
-            return False, f"Insufficient funds (${player.money} < ${current_property.price})"
+            return False, (INSUFFICIENT_FUNDS, player.name, player.money, current_property.price) if explain else None
+        
+        # a replay takes the recorded decision instead of simulating it again
+        if self.replay is not None:
+            should_buy = self.replay.next_decision()
+            return should_buy, (REPLAYED_DECISION, player.name, 'Buy' if should_buy else 'Dont buy', current_property.name) if explain else None
+        
+        # inside a policy rollout, every player buys by the rollout's cheap policy
+        if self.rollout_policy is not None:
+            return self.rollout_policy(self, player, current_property), None
         
         # simulate the turn to buy or not buy the property
-        should_buy, value_difference = self.simulate_turn(player)
+        if self.metrics is not None:
+            with self.metrics.timer('decisions'):
+                estimate = self.estimate_purchase(player)
+        else:
+            estimate = self.estimate_purchase(player)
+        should_buy, value_difference = estimate.should_buy, estimate.value_difference
+        if self.replay_log is not None:
+            self.replay_log.record_decision(should_buy)
+        if not explain:
+            return should_buy, None
         
         # get the color group of the property
         color_group = current_property.color_group.lower()
         # get the number of properties the player owns in the color group
-        owned_in_group = len(player.get_properties_in_color_group(color_group))
+        owned_in_group = player.count_in_color_group(color_group)
         # count the number of opponent properties within 5 spaces
         nearby_opponent_props = self.count_nearby_opponent_properties(current_property, player)
         
-        reasoning = [
-            f"Decision: {'Buy' if should_buy else 'Dont buy'} {current_property.name}",
-            f"Expected value difference: ${value_difference:.2f}",
-            f"Landing frequency: {current_property.landing_frequency:.3f}",
-            f"Property price: ${current_property.price}",
-            f"Current money: ${player.money}",
-            f"Properties owned in {color_group}: {owned_in_group}",
-            f"Nearby opponent properties: {nearby_opponent_props}",
-            f"Base rent: ${current_property.rent[0]}",
-            f"Risk level: {'High' if player.money - current_property.price < 300 else 'Low'}"
-        ]
-        
-        return should_buy, "\n".join(reasoning)
+        return should_buy, (DECISION, player.name, 'Buy' if should_buy else 'Dont buy', current_property.name,
+                            float(value_difference), self.confidence, float(estimate.interval[0]), float(estimate.interval[1]),
+                            estimate.iterations, current_property.landing_frequency, current_property.price, player.money,
+                            color_group, owned_in_group, nearby_opponent_props, current_property.rent[0],
+                            'High' if player.money - current_property.price < 300 else 'Low')
 
 
     def run_full_game(self):
@@ -269,72 +740,376 @@ class MonopolySimulator:
             print("Game ended in a draw (max rounds reached)")
 
 
-    def play_round(self):
+    def _print_game_status(self):
+        """print the money, position and property count of every player"""
+        for player in self.players:
+            status = "bankrupt" if player.money <= 0 else f"${player.money}, position {player.position}, {len(player.properties)} properties"
+            print(f"{player.name}: {status}")
+
+
+    def play_game(self, max_rounds: int = 200, events: Optional[EventLog] = None) -> int:
+        """play rounds without any output until only one player remains solvent or max_rounds is reached.
+           returns the number of rounds played. the game's events go to `events` if given, and are dropped otherwise."""
+        rounds = 0
+        while rounds < max_rounds and sum(1 for p in self.players if p.money > 0) > 1:
+            self.play_round(events)
+            self.round += 1
+            rounds += 1
+        return rounds
+
+
+    def play_round(self, events: Optional[EventLog] = None):
         """play a single round where each player takes a turn"""
+        if events is not None:
+            events.append((ROUND, self.round))
         for player in self.players:
             if player.money > 0:  # Only active players take turns
-                self.take_turn(player)
+                if events is None:
+                    self.take_turn(player, NO_EVENTS)
+                else:
+                    events.extend(self.take_turn(player))
 
     
-    def take_turn(self, player: Player):
-        """perform a single player's turn"""
-        turn_log = []
-        turn_log.append(f"\n=== {player.name}'s turn ===")
-        turn_log.append(f"Starting position: {player.position}")
-        turn_log.append(f"Money: ${player.money}")
-        
-        # roll two dice, add them together to get the roll
-        roll = random.randint(1, 6) + random.randint(1, 6)
-        player.position = (player.position + roll) % 40
-        # turn_log.append(f"Rolled {roll}, moved to position {player.position}")
-        
-        # check if landed on property
-        current_property = next((p for p in self.properties if p.position == player.position), None)
-        if not current_property:
-            turn_log.append("Landed on non-property space")
-            return turn_log
+    def take_turn(self, player: Player, turn_log: Optional[List[tuple]] = None) -> List[tuple]:
+        """perform a single player's turn and return its events. the events are added to `turn_log` instead if one
+           is given (NO_EVENTS drops them)"""
+        if turn_log is None:
+            turn_log = []
+        # the turn reads the game's arrays directly rather than through the player's properties
+        tables = self.tables
+        rules = self.rules
+        index = player.index
+        turn_log.append((TURN_START, player.name, tables.positions[index], tables.money[index]))
+        
+        # a player in jail has to get out before moving
+        if tables.jail_turns[index]:
+            roll = self.leave_jail(player, turn_log)
+            if roll:
+                self.move(player, roll, turn_log)
+        else:
+            doubles = 0
+            while True:
+                # roll two dice, add them together to get the roll
+                die1, die2 = self.roll_dice()
+                rolled_doubles = rules.doubles and die1 == die2
+                doubles += rolled_doubles
+                if doubles == 3 and rules.jail:
+                    turn_log.append((THREE_DOUBLES, player.name))
+                    self.send_to_jail(player, turn_log)
+                    break
+                self.move(player, die1 + die2, turn_log)
+                # doubles roll again, unless the player went bankrupt or to jail
+                if not rolled_doubles or doubles == 3 or tables.money[index] <= 0 or tables.jail_turns[index]:
+                    break
+                turn_log.append((ROLL_AGAIN, player.name))
+        
+        if self.develops and tables.money[index] > 0:
+            self.develop(player, turn_log)
+        if self.check_totals:
+            self.tables.check_totals()
+        return turn_log
+
+
+    def move(self, player: Player, roll: int, log: List[tuple]):
+        """move the player forward and resolve the square they land on"""
+        tables = self.tables
+        position = tables.positions[player.index] + roll
+        if position >= 40:
+            position %= 40
+            salary = self.rules.salary
+            if salary:
+                tables.money[player.index] += salary
+                log.append((PASSED_GO, player.name, salary))
+        tables.positions[player.index] = position
+        self.square_handlers[position](self, player, roll, log)
+
+
+    def land_on_nothing(self, player: Player, roll: int, log: List[tuple]):
+        log.append((EMPTY_SQUARE, player.name, player.position))
+
+
+    def land_on_property(self, player: Player, roll: int, log: List[tuple]):
+        tables = self.tables
+        index = self.square_to_index[tables.positions[player.index]]
+        current_property = tables.properties[index]
+        owner = tables.owners[index]
             
         # if property is owned, pay rent
-        if current_property.owner and current_property.owner != player:
-            rent = current_property.rent[current_property.houses]
-            rent_log = self.handle_rent_payment(player, current_property, rent)
-            turn_log.extend(rent_log)
+        if owner >= 0 and owner != player.index:
+            rent = self.rent_owed(index, owner, roll)
+            if rent:
+                self.handle_rent_payment(player, current_property, rent, log)
+            else:
+                log.append((NO_RENT_MORTGAGED, player.name, current_property.name))
         
         # if property is unowned, consider buying
-        elif not current_property.owner:
-            should_buy, reasoning = self.make_decision(player)
-            turn_log.extend(reasoning.split('\n'))
+        elif owner < 0:
+            should_buy, explanation = self.decide(player, log is not NO_EVENTS)
+            if explanation:
+                log.append(explanation)
             if should_buy and player.can_afford(current_property.price):
                 current_property.owner = player
-                player.properties.append(current_property)
                 player.pay(current_property.price)
-                turn_log.append(f"Property purchased. Remaining money: ${player.money}")
+                self.purchases += 1
+                log.append((PROPERTY_BOUGHT, player.name, current_property.name, player.money))
+
+
+    def land_on_tax(self, player: Player, roll: int, log: List[tuple]):
+        amount = TAXES[player.position]
+        log.append((TAX_PAID, player.name, amount))
+        self.pay_debt(player, amount, None, log)
+
+
+    def land_on_chance(self, player: Player, roll: int, log: List[tuple]):
+        self.draw_card(CHANCE, player, roll, log)
+
+
+    def land_on_community_chest(self, player: Player, roll: int, log: List[tuple]):
+        self.draw_card(COMMUNITY_CHEST, player, roll, log)
+
+
+    def land_on_go_to_jail(self, player: Player, roll: int, log: List[tuple]):
+        self.send_to_jail(player, log)
+
+
+    def rent_owed(self, index: int, owner: int, roll: int) -> int:
+        """rent owed to the owner of a property, looked up in the property's rent table by development level"""
+        tables = self.tables
+        if tables.mortgaged[index]:
+            return 0
+        owned_in_group = tables.group_counts[owner * tables.board.num_groups + tables.board.group_ids[index]]
+        kind = self.property_kinds[index]
+        if kind == STREET:
+            houses = tables.houses[index]
+            if houses:
+                level = houses + 1
+            else:
+                level = 1 if owned_in_group == self.property_group_sizes[index] else 0
+            return self.rent_tables[index][level]
+        rent = self.rent_tables[index][owned_in_group - 1]
+        return rent * roll if kind == UTILITY else rent
+
+
+    def send_to_jail(self, player: Player, log: List[tuple]):
+        player.position = JAIL
+        player.jail_turns = 1
+        log.append((SENT_TO_JAIL, player.name))
+
+
+    def leave_jail(self, player: Player, log: List[tuple]) -> int:
+        """try to get out of jail. returns the roll to move with, 0 if the player stays in jail"""
+        if player.jail_cards:
+            player.jail_cards -= 1
+            player.jail_turns = 0
+            log.append((JAIL_CARD_USED, player.name))
+            return sum(self.roll_dice())
         
-        return turn_log
+        die1, die2 = self.roll_dice()
+        if die1 == die2:
+            player.jail_turns = 0
+            log.append((JAIL_DOUBLES, player.name))
+            return die1 + die2
+        
+        # the fine has to be paid on the third try
+        if player.jail_turns >= 3:
+            log.append((JAIL_FINE_PAID, player.name, self.rules.jail_fine))
+            if not self.pay_debt(player, self.rules.jail_fine, None, log):
+                return 0
+            player.jail_turns = 0
+            return die1 + die2
+        
+        player.jail_turns += 1
+        log.append((STAYED_IN_JAIL, player.name))
+        return 0
 
-    def handle_rent_payment(self, player: Player, current_property: Property, rent_amount: int) -> List[str]:
+
+    def draw_card(self, deck: int, player: Player, roll: int, log: List[tuple]):
+        """draw the top card of a deck, put it back at the bottom and play it"""
+        cards = self.decks[deck]
+        card = cards.popleft()
+        cards.append(card)
+        action, value, text = card
+        log.append((CARD_DRAWN, player.name, text))
+        
+        if action == ADVANCE:
+            self.advance_to(player, value, roll, log)
+        elif action == BACK:
+            player.position = (player.position - value) % 40
+            self.square_handlers[player.position](self, player, roll, log)
+        elif action == NEAREST_RAILROAD or action == NEAREST_UTILITY:
+            self.advance_to_nearest(player, RAILROAD_SQUARES if action == NEAREST_RAILROAD else UTILITY_SQUARES, roll, log)
+        elif action == COLLECT:
+            player.receive(value)
+        elif action == PAY:
+            self.pay_debt(player, value, None, log)
+        elif action == COLLECT_EACH:
+            for other in self.players:
+                if other is not player and other.money > 0:
+                    self.pay_debt(other, value, player, log)
+        elif action == PAY_EACH:
+            for other in self.players:
+                if other is not player and other.money > 0 and not self.pay_debt(player, value, other, log):
+                    break
+        elif action == REPAIRS:
+            per_house, per_hotel = value
+            cost = sum(per_hotel if prop.houses == HOTEL else per_house * prop.houses for prop in player.properties)
+            if cost:
+                self.pay_debt(player, cost, None, log)
+        elif action == JAIL_FREE:
+            player.jail_cards += 1
+        elif action == TO_JAIL:
+            self.send_to_jail(player, log)
+
+
+    def advance_to(self, player: Player, square: int, roll: int, log: List[tuple]):
+        """move the player forward to the given square (collecting the salary when passing Go) and resolve it"""
+        self.move(player, (square - player.position) % 40, log)
+
+
+    def advance_to_nearest(self, player: Player, squares: Tuple[int, ...], roll: int, log: List[tuple]):
+        """card move to the next railroad or utility. an owner is paid twice the railroad rent, or 10x a new roll"""
+        square = min(squares, key=lambda s: (s - player.position) % 40)
+        index = self.square_to_index[square]
+        if index < 0 or self.tables.owners[index] < 0 or self.players[self.tables.owners[index]] is player \
+                or self.tables.mortgaged[index]:
+            self.advance_to(player, square, roll, log)
+            return
+        
+        # pass Go without resolving the square, then charge the card's rent
+        self.move_to(player, square, log)
+        owner = self.tables.owners[index]
+        if self.property_kinds[index] == UTILITY:
+            rent = 10 * sum(self.roll_dice())
+        else:
+            rent = 2 * self.rent_owed(index, owner, roll)
+        self.handle_rent_payment(player, self.properties[index], rent, log)
+
+
+    def move_to(self, player: Player, square: int, log: List[tuple]):
+        """move the player forward to the given square without resolving it"""
+        if square < player.position and self.rules.salary:
+            player.receive(self.rules.salary)
+            log.append((PASSED_GO, player.name, self.rules.salary))
+        player.position = square
+
+
+    def pay_debt(self, player: Player, amount: int, creditor: Optional[Player], log: List[tuple]) -> bool:
+        """pay `amount` to another player or (creditor None) the bank, raising cash if needed.
+           returns False if the player went bankrupt instead"""
+        if player.money < amount:
+            self.raise_cash(player, amount, log)
+        if player.money < amount:
+            log.append((CANNOT_PAY, player.name, amount))
+            self.execute_bankruptcy(player, creditor, log)
+            return False
+        player.pay(amount)
+        if creditor:
+            creditor.receive(amount)
+        return True
+
+
+    def raise_cash(self, player: Player, amount: int, log: List[tuple]):
+        """sell (or with the mortgage rule, sell houses and mortgage) the player's properties until they have
+           `amount` in cash or nothing left to sell"""
+        if not self.rules.mortgages:
+            for prop in player.properties_by_price():
+                if player.money >= amount:
+                    return
+                sale_value = prop.price + (prop.houses * (prop.price // 2))
+                player.money += sale_value
+                prop.owner = None
+                prop.houses = 0
+                log.append((SOLD_PROPERTY, player.name, prop.name, sale_value))
+            return
+        
+        # sell houses back at half price, evenly from the most developed streets
+        streets = [prop for prop in player.properties if prop.houses]
+        while streets and player.money < amount:
+            prop = max(streets, key=lambda p: p.houses)
+            prop.houses -= 1
+            sale_value = HOUSE_COSTS[prop.color_group] // 2
+            player.money += sale_value
+            log.append((SOLD_HOUSE, player.name, prop.name, sale_value))
+            if not prop.houses:
+                streets.remove(prop)
+        
+        # then mortgage, cheapest first
+        for prop in player.properties_by_price():
+            if player.money >= amount:
+                return
+            if not prop.mortgaged:
+                prop.mortgaged = True
+                player.money += prop.price // 2
+                log.append((MORTGAGED, player.name, prop.name, prop.price // 2))
+
+
+    def develop(self, player: Player, log: List[tuple]):
+        """lift mortgages and build houses with the cash the player doesn't keep in reserve"""
+        tables = self.tables
+        reserve = self.rules.build_reserve
+        
+        # lifting a mortgage costs the mortgage value plus 10% interest
+        if self.rules.mortgages and 1 in tables.mortgaged:
+            for prop in player.properties:
+                cost = prop.price // 2 * 11 // 10
+                if prop.mortgaged and player.money - cost >= reserve:
+                    player.pay(cost)
+                    prop.mortgaged = False
+                    log.append((MORTGAGE_LIFTED, player.name, prop.name, cost))
+        
+        # build evenly on every complete color set without mortgages, up to a hotel on each street
+        complete_sets = tables.complete_sets[player.index]
+        if self.rules.houses and complete_sets:
+            buildable = self.buildable_groups.get(complete_sets)
+            if buildable is None:
+                groups = [self.street_groups[group] for group in self.street_groups if complete_sets >> group & 1]
+                streets = [index for members, _, _ in groups for index in members]
+                buildable = self.buildable_groups[complete_sets] = (groups, itemgetter(*streets) if streets else None)
+            groups, street_entries = buildable
+            houses = tables.houses
+            # later in a game, most turns find a hotel on every street already
+            if street_entries is None or min(street_entries(houses)) == HOTEL:
+                return
+            for members, group_entries, cost in groups:
+                if min(group_entries(houses)) == HOTEL or 1 in group_entries(tables.mortgaged):
+                    continue
+                while player.money - cost >= reserve and min(group_entries(houses)) < HOTEL:
+                    index = min(members, key=houses.__getitem__)
+                    tables.set_houses(index, houses[index] + 1)
+                    player.pay(cost)
+                    building = "a hotel" if houses[index] == HOTEL else "a house"
+                    log.append((BUILT, player.name, building, self.properties[index].name))
+
+    def handle_rent_payment(self, player: Player, current_property: Property, rent_amount: int, log: List[tuple]):
         """rent payment logic with property selling if player is out of money, 
-            return logged actions of player"""
+            adds the player's actions to the log"""
             
-        log = []
-        log.append(f"{player.name} must pay ${rent_amount} rent to {current_property.owner.name}")
+        owner = current_property.owner
+        log.append((RENT_DUE, player.name, rent_amount, owner.name))
         
         # if the player has enough money, pay the rent
-        if player.money >= rent_amount:
-            player.pay(rent_amount)
-            current_property.owner.receive(rent_amount)
-            log.append(f"Rent paid. Remaining money: ${player.money}")
-            return log
+        money = self.tables.money
+        if money[player.index] >= rent_amount:
+            money[player.index] -= rent_amount
+            money[owner.index] += rent_amount
+            log.append((RENT_PAID, player.name, money[player.index]))
+            return
+            
+        # with the mortgage rule, houses are sold back and properties mortgaged instead of sold
+        if self.rules.mortgages:
+            log.append((RAISING_CASH, player.name))
+            if self.pay_debt(player, rent_amount, current_property.owner, log):
+                log.append((RAISED_AND_PAID, player.name, player.money))
+            return
             
         # if the player cannot afford rent, attempt to sell properties
-        log.append(f"{player.name} cannot afford rent, attempting to sell properties...")
+        log.append((SELLING_PROPERTIES, player.name))
         debt_remaining = rent_amount - player.money
         properties_to_sell = []
         
         # sell cheapest properties first
-        sorted_properties = sorted(player.properties, key=lambda p: p.price)
         current_value = 0
-        for prop in sorted_properties:
+        for prop in player.properties_by_price():
             property_value = prop.price + (prop.houses * (prop.price // 2))
             current_value += property_value
             properties_to_sell.append(prop)
@@ -343,41 +1118,39 @@ class MonopolySimulator:
                 break
                 
         # if after selling everything player still can't afford rent, player is bankrupt
-        total_possible_value = sum(p.price + (p.houses * (p.price // 2)) for p in player.properties)
+        total_possible_value = player.property_value()
         if total_possible_value + player.money < rent_amount:
-            log.append(f"{player.name} cannot raise enough money even by selling all properties!")
-            self.execute_bankruptcy(player, current_property.owner)
-            return log
+            log.append((CANNOT_SELL_ENOUGH, player.name))
+            self.execute_bankruptcy(player, current_property.owner, log)
+            return
             
         # sell the properties
         for prop in properties_to_sell:
             sale_value = prop.price + (prop.houses * (prop.price // 2))
             player.money += sale_value
-            player.properties.remove(prop)
+            player.remove_property(prop)
             prop.owner = None
             prop.houses = 0  # Reset development when sold
-            log.append(f"{player.name} sold {prop.name} for ${sale_value}")
+            log.append((SOLD_PROPERTY, player.name, prop.name, sale_value))
             
         # pay the rent
         player.pay(rent_amount)
         current_property.owner.receive(rent_amount)
-        log.append(f"After selling properties and paying rent, {player.name} has ${player.money} remaining")
-        return log
+        log.append((SOLD_AND_PAID, player.name, player.money))
 
-    def execute_bankruptcy(self, bankrupt_player: Player, creditor: Player) -> List[str]:
-        """handle the bankruptcy of a player. returns log of actions."""
-        log = []
-        log.append(f"{bankrupt_player.name} is bankrupt!")
+    def execute_bankruptcy(self, bankrupt_player: Player, creditor: Player, log: List[tuple] = NO_EVENTS):
+        """handle the bankruptcy of a player, adding its events to the log"""
+        log.append((BANKRUPT, bankrupt_player.name))
         
         # free all owned properties
         for prop in bankrupt_player.properties:
-            log.append(f"Property {prop.name} is now available for purchase")
+            log.append((PROPERTY_FREED, prop.name))
             prop.owner = None
             prop.houses = 0  # Reset development when freed
+            prop.mortgaged = False
         
-        bankrupt_player.properties = []
+        bankrupt_player.clear_properties()
         bankrupt_player.money = 0
         
-        log.append(f"{bankrupt_player.name} has been eliminated from the game")
-        return log
+        log.append((ELIMINATED, bankrupt_player.name))
     
\ No newline at end of file
@@ -1,24 +1,441 @@
+from array import array
+import math
 from dataclasses import dataclass
-from typing import List, Optional
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# number of properties in each color group
+COLOR_GROUP_SIZES = {
+    "brown": 2,
+    "light_blue": 3,
+    "pink": 3,
+    "orange": 3,
+    "red": 3,
+    "yellow": 3,
+    "green": 3,
+    "dark_blue": 2,
+    "railroad": 4,
+    "utility": 2
+}
+# rollouts value a utility's rent multiplier at the average roll of two dice
+AVERAGE_ROLL = 7
+
+
+def rollout_rents(rent: Sequence[int], color_group: str) -> Tuple[int, ...]:
+    """rent of a property by development level as the rollouts (vectorized and scalar) charge it"""
+    return tuple(AVERAGE_ROLL * multiplier for multiplier in rent) if color_group == "utility" else tuple(rent)
+
+
+class BoardTable:
+    """static board definition as parallel read-only tuples, one entry per property (in board order).
+       built once per simulator and shared by every game state and fork played on it."""
+    __slots__ = ('names', 'positions', 'prices', 'rents', 'rollout_rents', 'color_groups', 'landing_frequencies',
+                 'group_ids', 'group_index', 'group_sizes', 'num_groups', 'group_members', 'house_values', 'by_price')
+
+    def __init__(self, names: Sequence[str], positions: Sequence[int], prices: Sequence[int], rents: Sequence[Sequence[int]],
+                 color_groups: Sequence[str], landing_frequencies: Sequence[float]):
+        self.names = tuple(names)
+        self.positions = tuple(positions)
+        self.prices = tuple(prices)
+        self.rents = tuple(tuple(rent) for rent in rents)  # [base, 1 house, 2 houses, 3 houses, 4 houses, hotel]
+        self.color_groups = tuple(color_groups)
+        self.rollout_rents = tuple(rollout_rents(rent, group) for rent, group in zip(self.rents, self.color_groups))
+        self.landing_frequencies = tuple(landing_frequencies)
+        # color group -> small integer id, used to index the per-player group counts
+        self.group_index: Dict[str, int] = {}
+        for group in self.color_groups:
+            self.group_index.setdefault(group.lower(), len(self.group_index))
+        self.group_ids = tuple(self.group_index[group.lower()] for group in self.color_groups)
+        self.num_groups = len(self.group_index)
+        self.group_sizes = tuple(self.group_ids.count(group) for group in range(self.num_groups))
+        self.group_members = tuple(tuple(i for i, g in enumerate(self.group_ids) if g == group)
+                                   for group in range(self.num_groups))
+        self.house_values = tuple(price // 2 for price in self.prices)  # what a house adds to a property's sale value
+        # property indices from the cheapest up (board order among equal prices): the order properties are sold in
+        self.by_price = tuple(sorted(range(len(self.names)), key=self.prices.__getitem__))
+
+    def __len__(self) -> int:
+        return len(self.names)
+
+
+EMPTY_BOARD = BoardTable([], [], [], [], [], [])
+
+
+class GameTables:
+    """dynamic state of one game as preallocated arrays (structure of arrays):
+        - owners: index of the player owning each property, -1 if unowned (int8)
+        - houses: houses on each property (int8)
+        - mortgaged: 1 for mortgaged properties (uint8, a bytearray so looking for any mortgage is a single scan)
+        - money: cash of each player (int64)
+        - positions: board position of each player (int8)
+        - jail_turns: 0 outside jail, otherwise the number of the player's next attempt to leave (int8)
+        - jail_cards: Get Out of Jail Free cards held by each player (int8)
+        - group_counts: properties owned per player and color group (int8), kept up to date by set_owner
+        - complete_sets: bitmask of the color groups each player owns completely (int64), also kept by set_owner
+       and running totals over each player's properties, kept up to date by set_owner and set_houses:
+        - property_values: sale value, the price plus half the price per house (int64). net worth is cash plus
+          this, and it is also everything selling off the properties can raise
+        - set_values: price, with a 50% premium for complete sets (double), the property value of a rollout score
+        - rent_incomes: landing frequency times rollout rent at the current development, doubled for complete sets
+          (double), the expected rent income of a rollout score per opponent turn
+       Player and Property objects are thin views into these arrays, so copying a game copies a few
+       hundred bytes of arrays and never touches the board definition."""
+    __slots__ = ('board', 'owners', 'houses', 'mortgaged', 'money', 'positions', 'jail_turns', 'jail_cards', 'group_counts',
+                 'complete_sets', 'property_values', 'set_values', 'rent_incomes', 'derived_cache', 'players', 'properties')
+
+    def __init__(self, board: BoardTable, num_players: int = 0):
+        self.board = board
+        self.owners = array('b', [-1]) * len(board)
+        self.houses = array('b', [0]) * len(board)
+        self.mortgaged = bytearray(len(board))
+        self.money = array('q', [0]) * num_players
+        self.positions = array('b', [0]) * num_players
+        self.jail_turns = array('b', [0]) * num_players
+        self.jail_cards = array('b', [0]) * num_players
+        self.group_counts = array('b', [0]) * (num_players * board.num_groups)
+        self.complete_sets = array('q', [0]) * num_players
+        self.property_values = array('q', [0]) * num_players
+        self.set_values = array('d', [0.0]) * num_players
+        self.rent_incomes = array('d', [0.0]) * num_players
+        self.derived_cache: List[tuple] = []  # (snapshot, counts and totals) of the last snapshots loaded
+        self.properties: List[Property] = [Property.view(self, i) for i in range(len(board))]
+        self.players: List[Player] = []
+
+    def copy(self) -> 'GameTables':
+        """independent copy of the dynamic state, with its own player and property views"""
+        tables = GameTables.__new__(GameTables)
+        tables.board = self.board
+        tables.owners = self.owners[:]
+        tables.houses = self.houses[:]
+        tables.mortgaged = self.mortgaged[:]
+        tables.money = self.money[:]
+        tables.positions = self.positions[:]
+        tables.jail_turns = self.jail_turns[:]
+        tables.jail_cards = self.jail_cards[:]
+        tables.group_counts = self.group_counts[:]
+        tables.complete_sets = self.complete_sets[:]
+        tables.property_values = self.property_values[:]
+        tables.set_values = self.set_values[:]
+        tables.rent_incomes = self.rent_incomes[:]
+        tables.derived_cache = self.derived_cache  # never changed in place, so a copy can share it
+        tables.properties = [Property.view(tables, i) for i in range(len(self.board))]
+        tables.players = [Player.view(tables, i, p.name) for i, p in enumerate(self.players)]
+        return tables
+
+    def nbytes(self) -> int:
+        """size of the dynamic state arrays in bytes"""
+        arrays = (self.owners, self.houses, self.mortgaged, self.money, self.positions, self.jail_turns, self.jail_cards,
+                  self.group_counts, self.complete_sets, self.property_values, self.set_values, self.rent_incomes)
+        return sum(memoryview(a).nbytes for a in arrays)
+
+    def set_owner(self, property_index: int, player_index: int):
+        """give a property to a player (-1 for nobody), keeping the group counts, complete sets and running
+           totals in sync"""
+        previous = self.owners[property_index]
+        if previous == player_index:
+            return
+        board = self.board
+        group = board.group_ids[property_index]
+        value = board.prices[property_index] + self.houses[property_index] * board.house_values[property_index]
+        # completing or breaking up a set changes the premium on the whole group, so the group's share of the
+        # totals is taken out before the change and put back after it
+        if previous >= 0:
+            self.tally_group(previous, group, -1)
+            self.group_counts[previous * board.num_groups + group] -= 1
+            self.complete_sets[previous] &= ~(1 << group)
+            self.property_values[previous] -= value
+        if player_index >= 0:
+            self.tally_group(player_index, group, -1)
+            slot = player_index * board.num_groups + group
+            self.group_counts[slot] += 1
+            if self.group_counts[slot] == board.group_sizes[group]:
+                self.complete_sets[player_index] |= 1 << group
+            self.property_values[player_index] += value
+        self.owners[property_index] = player_index
+        if previous >= 0:
+            self.tally_group(previous, group, 1)
+        if player_index >= 0:
+            self.tally_group(player_index, group, 1)
+
+    def set_houses(self, property_index: int, houses: int):
+        """set the houses on a property, keeping its owner's running totals in sync"""
+        owner = self.owners[property_index]
+        if owner < 0:
+            self.houses[property_index] = houses
+            return
+        group = self.board.group_ids[property_index]
+        self.tally_group(owner, group, -1)
+        self.property_values[owner] += (houses - self.houses[property_index]) * self.board.house_values[property_index]
+        self.houses[property_index] = houses
+        self.tally_group(owner, group, 1)
+
+    def tally_group(self, player_index: int, group: int, sign: int):
+        """add (sign 1) or remove (sign -1) the set values and rent incomes of a player's properties in one group"""
+        board = self.board
+        complete = self.complete_sets[player_index] >> group & 1
+        set_value = 0.0
+        rent_income = 0.0
+        for i in board.group_members[group]:
+            if self.owners[i] == player_index:
+                set_value += board.prices[i] * 1.5 if complete else board.prices[i]
+                rent_income += board.landing_frequencies[i] * board.rollout_rents[i][self.houses[i]] * (2 if complete else 1)
+        if set_value:
+            self.set_values[player_index] += sign * set_value
+            self.rent_incomes[player_index] += sign * rent_income
+
+    def count_totals(self) -> Tuple[List[int], List[float], List[float]]:
+        """property values, set values and rent incomes of every player, recomputed from scratch"""
+        board = self.board
+        num_players = len(self.money)
+        property_values = [0] * num_players
+        set_values = [0.0] * num_players
+        rent_incomes = [0.0] * num_players
+        complete_sets = self.complete_sets
+        for owner, houses, price, house_value, rents, frequency, group in zip(
+                self.owners, self.houses, board.prices, board.house_values, board.rollout_rents, board.landing_frequencies,
+                board.group_ids):
+            if owner < 0:
+                continue
+            property_values[owner] += price + houses * house_value
+            if complete_sets[owner] >> group & 1:
+                set_values[owner] += price * 1.5
+                rent_incomes[owner] += frequency * rents[houses] * 2
+            else:
+                set_values[owner] += price
+                rent_incomes[owner] += frequency * rents[houses]
+        return property_values, set_values, rent_incomes
+
+    def recount_totals(self):
+        property_values, set_values, rent_incomes = self.count_totals()
+        self.property_values = array('q', property_values)
+        self.set_values = array('d', set_values)
+        self.rent_incomes = array('d', rent_incomes)
+
+    def check_totals(self):
+        """debug check: raise AssertionError if a running total differs from a full recount"""
+        property_values, set_values, rent_incomes = self.count_totals()
+        for i in range(len(self.money)):
+            if (self.property_values[i] != property_values[i] or self.set_values[i] != set_values[i]
+                    or not math.isclose(self.rent_incomes[i], rent_incomes[i], rel_tol=1e-9, abs_tol=1e-9)):
+                raise AssertionError(f"Running totals of player {i} are out of sync: "
+                                     f"({self.property_values[i]}, {self.set_values[i]}, {self.rent_incomes[i]}) != "
+                                     f"({property_values[i]}, {set_values[i]}, {rent_incomes[i]})")
+
+    def attach_players(self, players: List['Player']):
+        """make `players` the players of this game. their money and position move into this game's arrays,
+           properties they were created with become theirs, and every other property becomes unowned."""
+        owned = [player.owned_indices(self.board) for player in players]
+        self.money = array('q', [player.money for player in players])
+        self.positions = array('b', [player.position for player in players])
+        self.jail_turns = array('b', [player.jail_turns for player in players])
+        self.jail_cards = array('b', [player.jail_cards for player in players])
+        self.group_counts = array('b', [0]) * (len(players) * self.board.num_groups)
+        self.complete_sets = array('q', [0]) * len(players)
+        self.owners = array('b', [-1]) * len(self.board)
+        self.mortgaged = bytearray(len(self.board))
+        self.property_values = array('q', [0]) * len(players)
+        self.set_values = array('d', [0.0]) * len(players)
+        self.rent_incomes = array('d', [0.0]) * len(players)
+        self.derived_cache = []
+        self.players = list(players)
+        for i, player in enumerate(players):
+            player.bind(self, i)
+            for property_index in owned[i]:
+                self.set_owner(property_index, i)
+
+    def snapshot(self) -> 'GameState':
+        return GameState(tuple(self.owners), tuple(self.houses), tuple(self.money), tuple(self.positions),
+                         tuple(self.mortgaged))
+
+    def load(self, state: 'GameState'):
+        """overwrite the dynamic state with a snapshot of a game with the same players. jail isn't part of
+           a snapshot and is left as it is"""
+        self.owners = array('b', state.owners)
+        self.houses = array('b', state.houses)
+        self.mortgaged = bytearray(state.mortgaged) if state.mortgaged else bytearray(len(self.board))
+        self.money = array('q', state.money)
+        self.positions = array('b', state.positions)
+        # rollouts restore the same couple of snapshots over and over, so the counts and totals derived from the
+        # last two are kept and copied instead of recomputed
+        for loaded, derived in self.derived_cache:
+            if loaded is state:
+                self.group_counts, self.complete_sets, self.property_values, self.set_values, self.rent_incomes = \
+                    [values[:] for values in derived]
+                return
+        self.group_counts = array('b', [0]) * (len(state.money) * self.board.num_groups)
+        self.complete_sets = array('q', [0]) * len(state.money)
+        for property_index, owner in enumerate(state.owners):
+            if owner >= 0:
+                slot = owner * self.board.num_groups + self.board.group_ids[property_index]
+                self.group_counts[slot] += 1
+                if self.group_counts[slot] == self.board.group_sizes[self.board.group_ids[property_index]]:
+                    self.complete_sets[owner] |= 1 << self.board.group_ids[property_index]
+        self.recount_totals()
+        derived = (self.group_counts, self.complete_sets, self.property_values, self.set_values, self.rent_incomes)
+        self.derived_cache = [(state, [values[:] for values in derived])] + self.derived_cache[:1]
+
 
-@dataclass
 class Property:
-    name: str
-    position: int
-    price: int
-    rent: List[int]  # [base, 1 house, 2 houses, 3 houses, 4 houses, hotel]
-    color_group: str
-    landing_frequency: float = 0.0
-    houses: int = 0
-    owner: Optional['Player'] = None
-
-@dataclass
+    """view of one property of a game: static data comes from the shared BoardTable, owner and houses
+       from the game's arrays"""
+    __slots__ = ('tables', 'index')
+
+    def __init__(self, name: str, position: int, price: int, rent: List[int], color_group: str,
+                 landing_frequency: float = 0.0, houses: int = 0, owner: Optional['Player'] = None):
+        # a standalone property, on a board of its own. the properties of a game are created by its GameTables
+        tables = GameTables(BoardTable([name], [position], [price], [rent], [color_group], [landing_frequency]))
+        tables.properties[0] = self
+        self.tables = tables
+        self.index = 0
+        self.houses = houses
+        if owner is not None:
+            self.owner = owner
+
+    @classmethod
+    def view(cls, tables: GameTables, index: int) -> 'Property':
+        prop = cls.__new__(cls)
+        prop.tables = tables
+        prop.index = index
+        return prop
+
+    @property
+    def name(self) -> str:
+        return self.tables.board.names[self.index]
+
+    @property
+    def position(self) -> int:
+        return self.tables.board.positions[self.index]
+
+    @property
+    def price(self) -> int:
+        return self.tables.board.prices[self.index]
+
+    @property
+    def rent(self) -> Tuple[int, ...]:
+        return self.tables.board.rents[self.index]
+
+    @property
+    def color_group(self) -> str:
+        return self.tables.board.color_groups[self.index]
+
+    @property
+    def landing_frequency(self) -> float:
+        return self.tables.board.landing_frequencies[self.index]
+
+    @property
+    def houses(self) -> int:
+        return self.tables.houses[self.index]
+
+    @houses.setter
+    def houses(self, houses: int):
+        self.tables.set_houses(self.index, houses)
+
+    @property
+    def mortgaged(self) -> bool:
+        return bool(self.tables.mortgaged[self.index])
+
+    @mortgaged.setter
+    def mortgaged(self, mortgaged: bool):
+        self.tables.mortgaged[self.index] = mortgaged
+
+    @property
+    def owner(self) -> Optional['Player']:
+        owner = self.tables.owners[self.index]
+        return self.tables.players[owner] if owner >= 0 else None
+
+    @owner.setter
+    def owner(self, player: Optional['Player']):
+        if player is None:
+            self.tables.set_owner(self.index, -1)
+        elif player.tables is self.tables:
+            self.tables.set_owner(self.index, player.index)
+        else:
+            raise ValueError(f"{player.name} is not playing the game {self.name} belongs to")
+
+    def __repr__(self) -> str:
+        owner = self.owner
+        return (f"Property(name={self.name!r}, position={self.position}, price={self.price}, houses={self.houses}, "
+                f"owner={owner.name if owner else None!r})")
+
+
 class Player:
-    name: str
-    money: int
-    properties: List[Property]
-    position: int = 0
-    
+    """view of one player of a game. a new Player keeps its money and position in arrays of its own until it is
+       assigned to MonopolySimulator.players, which moves it into the game's arrays"""
+    __slots__ = ('name', 'tables', 'index', 'pending')
+
+    def __init__(self, name: str, money: int, properties: Optional[List[Property]] = None, position: int = 0):
+        self.name = name
+        self.tables = GameTables(EMPTY_BOARD, 1)
+        self.tables.players.append(self)
+        self.index = 0
+        self.tables.money[0] = money
+        self.tables.positions[0] = position
+        # properties of a player that isn't in a game yet. None once the player has joined one
+        self.pending: Optional[List[Property]] = list(properties or [])
+
+    @classmethod
+    def view(cls, tables: GameTables, index: int, name: str) -> 'Player':
+        player = cls.__new__(cls)
+        player.name = name
+        player.bind(tables, index)
+        return player
+
+    def bind(self, tables: GameTables, index: int):
+        self.tables = tables
+        self.index = index
+        self.pending = None
+
+    def owned_indices(self, board: BoardTable) -> List[int]:
+        """indices of the player's properties on the given board"""
+        for prop in self.properties:
+            if prop.tables.board is not board:
+                raise ValueError(f"{prop.name} is not a property of this board")
+        return [prop.index for prop in self.properties]
+
+    @property
+    def money(self) -> int:
+        return self.tables.money[self.index]
+
+    @money.setter
+    def money(self, money: int):
+        self.tables.money[self.index] = money
+
+    @property
+    def position(self) -> int:
+        return self.tables.positions[self.index]
+
+    @position.setter
+    def position(self, position: int):
+        self.tables.positions[self.index] = position
+
+    @property
+    def jail_turns(self) -> int:
+        return self.tables.jail_turns[self.index]
+
+    @jail_turns.setter
+    def jail_turns(self, jail_turns: int):
+        self.tables.jail_turns[self.index] = jail_turns
+
+    @property
+    def jail_cards(self) -> int:
+        return self.tables.jail_cards[self.index]
+
+    @jail_cards.setter
+    def jail_cards(self, jail_cards: int):
+        self.tables.jail_cards[self.index] = jail_cards
+
+    @property
+    def properties(self) -> List[Property]:
+        """the player's properties, in board order"""
+        if self.pending is not None:
+            return list(self.pending)
+        index = self.index
+        return [prop for prop, owner in zip(self.tables.properties, self.tables.owners) if owner == index]
+
+    @property
+    def color_counts(self) -> Dict[str, int]:
+        """number of owned properties per color group"""
+        return {group: count for group in COLOR_GROUP_SIZES if (count := self.count_in_color_group(group))}
+
     def can_afford(self, amount: int) -> bool:
         return self.money >= amount
     
@@ -31,44 +448,155 @@ class Player:
     def receive(self, amount: int):
         self.money += amount
     
+    def add_property(self, prop: Property):
+        if self.pending is not None:
+            self.pending.append(prop)
+        else:
+            prop.owner = self
+    
+    def remove_property(self, prop: Property):
+        if self.pending is not None:
+            self.pending.remove(prop)
+        elif prop.owner is self:
+            prop.owner = None
+    
+    def clear_properties(self):
+        if self.pending is not None:
+            self.pending = []
+            return
+        for prop in self.properties:
+            prop.owner = None
+    
     def get_properties_in_color_group(self, color_group: str) -> List[Property]:
         return [p for p in self.properties if p.color_group == color_group]
     
+    def count_in_color_group(self, color_group: str) -> int:
+        if self.pending is not None:
+            return sum(1 for p in self.pending if p.color_group.lower() == color_group.lower())
+        board = self.tables.board
+        group = board.group_index.get(color_group.lower())
+        return self.tables.group_counts[self.index * board.num_groups + group] if group is not None else 0
+    
     def owns_complete_set(self, color_group: str) -> bool:
-        color_group_sizes = {
-            "brown": 2,
-            "light_blue": 3,
-            "pink": 3,
-            "orange": 3,
-            "red": 3,
-            "yellow": 3,
-            "green": 3,
-            "dark_blue": 2
-        }
-        owned = len(self.get_properties_in_color_group(color_group))
-        return owned == color_group_sizes.get(color_group.lower(), 0)
+        return self.count_in_color_group(color_group) == COLOR_GROUP_SIZES.get(color_group.lower(), 0)
     
+    def properties_by_price(self) -> List[Property]:
+        """the player's properties from the cheapest up, the order they are sold in"""
+        if self.pending is not None:
+            return sorted(self.pending, key=lambda p: p.price)
+        index = self.index
+        owners = self.tables.owners
+        properties = self.tables.properties
+        return [properties[i] for i in self.tables.board.by_price if owners[i] == index]
+
+    def property_value(self) -> int:
+        """what selling every property would raise: the price plus half the price per house"""
+        if self.pending is not None:
+            return sum(p.price + (p.houses * (p.price // 2)) for p in self.pending)
+        return self.tables.property_values[self.index]
+
     def calculate_net_worth(self) -> int:
-        property_value = sum(p.price + (p.houses * (p.price // 2)) for p in self.properties)
-        return self.money + property_value
+        return self.money + self.property_value()
+
+    def __repr__(self) -> str:
+        return (f"Player(name={self.name!r}, money={self.money}, position={self.position}, "
+                f"properties={[p.name for p in self.properties]!r})")
+
+
+@dataclass(frozen=True)
+class GameState:
+    """compact snapshot of the mutable parts of a game. the board definition (names, prices, rents)
+       is not included since it never changes and is shared by every fork of a simulator."""
+    owners: Tuple[int, ...]     # index into the player list for each property, -1 if unowned
+    houses: Tuple[int, ...]     # houses on each property
+    money: Tuple[int, ...]      # cash of each player
+    positions: Tuple[int, ...]  # board position of each player
+    mortgaged: Tuple[int, ...] = ()  # 1 for each mortgaged property, empty for none
+
+    def with_purchase(self, property_index: int, player_index: int, price: int) -> 'GameState':
+        """return the state after the given player buys the given property"""
+        owners = list(self.owners)
+        owners[property_index] = player_index
+        money = list(self.money)
+        money[player_index] -= price
+        return GameState(tuple(owners), self.houses, tuple(money), self.positions, self.mortgaged)
+
+
+@dataclass(frozen=True)
+class DecisionEstimate:
+    """outcome of the buy/no-buy Monte Carlo for one decision"""
+    should_buy: bool
+    value_difference: float  # mean buy-minus-no-buy score
+    iterations: int          # paired rollouts actually run
+    interval: Tuple[float, float]  # confidence interval of value_difference
+
+
+@dataclass(frozen=True)
+class Strategy:
+    """how one player makes buy decisions: the weights of the calculate_expected_property_value heuristic, and
+       the decision mode and rollout budget (None: the simulator's own)"""
+    frequency_baseline: float = 0.025      # average landing frequency, rent is scaled by (frequency / baseline)^2
+    complete_set_multiplier: float = 2.0   # value multiplier when the player owns the whole color group
+    group_member_bonus: float = 0.25       # value bonus per property of the color group the player owns
+    nearby_penalty: float = 0.1            # value penalty per opponent property within 5 spaces
+    low_cash_multiplier: float = 0.8       # value multiplier when the player has less than half the starting cash
+    decision_mode: Optional[str] = None
+    horizon: Optional[int] = None
+    iterations: Optional[int] = None
+
+
+DEFAULT_STRATEGY = Strategy()
+
+
+@dataclass(frozen=True)
+class PurchaseEvaluation:
+    """buy/no-buy estimate for one (player, square) query of MonopolySimulator.evaluate_purchases"""
+    player: str
+    position: int
+    property: str
+    should_buy: bool
+    value_difference: float
+    iterations: int
+    interval: Tuple[float, float]
     
     
-def property_to_dict(prop):
+def board_to_dict(board: BoardTable) -> dict:
+    """static description of every property square, keyed by board position. game state messages refer to squares
+       by position only, so this is sent once per connection"""
     return {
-        'name': prop.name,
-        'position': prop.position,
-        'price': prop.price,
-        'rent': prop.rent,
-        'color_group': prop.color_group,
-        'landing_frequency': prop.landing_frequency,
-        'houses': prop.houses,
-        'owner': prop.owner.name if prop.owner else None
+        position: {
+            'name': name,
+            'price': price,
+            'rent': rent,
+            'color_group': color_group,
+            'landing_frequency': float(landing_frequency)
+        }
+        for name, position, price, rent, color_group, landing_frequency in zip(
+            board.names, board.positions, board.prices, board.rents, board.color_groups, board.landing_frequencies)
     }
 
-def player_to_dict(player):
-    return {
-        'name': player.name,
-        'money': player.money,
-        'position': player.position,
-        'properties': [property_to_dict(prop) for prop in player.properties]
-    }
\ No newline at end of file
+if __name__ == '__main__':
+    # memory and copy time of one mid-game state, as compact arrays and as a deep copy of the object views
+    import copy
+    import timeit
+    import tracemalloc
+    from monopoly_sim import MonopolySimulator
+
+    sim = MonopolySimulator(seed=0, iterations=100)
+    sim.players = [Player(f"Player {i + 1}", 1500) for i in range(4)]
+    for _ in range(10):
+        sim.play_round()
+
+    def measure(name, copy_state, n=1000):
+        tracemalloc.start()
+        states = [copy_state() for _ in range(n)]
+        memory = tracemalloc.get_traced_memory()[0] / n
+        tracemalloc.stop()
+        seconds = min(timeit.repeat(copy_state, number=n, repeat=5)) / n
+        print(f"{name:<28} {memory:>8.0f} bytes/state {seconds * 1e6:>8.2f} us/copy")
+
+    print(f"dynamic arrays: {sim.tables.nbytes()} bytes")
+    measure("GameTables.copy", sim.tables.copy)
+    measure("GameState snapshot", sim.snapshot)
+    measure("MonopolySimulator.fork", sim.fork)
+    measure("deepcopy(players, properties)", lambda: copy.deepcopy((sim.players, sim.properties)))
@@ -0,0 +1,78 @@
+from concurrent.futures import ProcessPoolExecutor
+from typing import List, Tuple
+import os
+import time
+import numpy as np
+from monpoly_defs import GameState
+from rollout_engine import BoardArrays, ChunkTotals, run_chunks
+
+"""
+
+Process pool for running the rollouts of a single decision across several cores.
+
+The static board arrays are sent to each worker once, when the pool starts. Per decision, each worker gets
+one task holding the two compact GameState snapshots and the seeded chunks it should run, and sends back
+the per-chunk score sums which the parent reduces in chunk order.
+"""
+
+
+# board arrays of the worker process, set once by the pool initializer
+_worker_board = None
+
+
+def _init_worker(board: BoardArrays):
+    global _worker_board
+    _worker_board = board
+
+
+def _run_worker_chunks(buy_state: GameState, no_buy_state: GameState, player_index: int, num_turns: int,
+                       chunks: List[Tuple[int, int, np.random.SeedSequence]]) -> List[ChunkTotals]:
+    return run_chunks(_worker_board, buy_state, no_buy_state, player_index, num_turns, chunks)
+
+
+class RolloutPool:
+    """pool of worker processes that split the rollouts of a decision between them"""
+
+    def __init__(self, board: BoardArrays, workers: int):
+        self.workers = workers
+        self.executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker, initargs=(board,))
+
+    def run(self, buy_state: GameState, no_buy_state: GameState, player_index: int, num_turns: int,
+            chunks: List[Tuple[int, int, np.random.SeedSequence]]) -> List[ChunkTotals]:
+        """deal the chunks round-robin to the workers and gather the per-chunk totals, sorted by chunk index"""
+        futures = [
+            self.executor.submit(_run_worker_chunks, buy_state, no_buy_state, player_index, num_turns, chunks[w::self.workers])
+            for w in range(min(self.workers, len(chunks)))
+        ]
+        totals = [total for future in futures for total in future.result()]
+        return sorted(totals)
+
+    def close(self):
+        self.executor.shutdown()
+
+
+if __name__ == '__main__':
+    # scaling benchmark: time make_decision on a half-owned board for 1..cpu_count workers
+    from monopoly_sim import MonopolySimulator
+    from monpoly_defs import Player
+
+    iterations = 20000
+    results = {}
+    for workers in range(1, (os.cpu_count() or 1) + 1):
+        sim = MonopolySimulator({i: 0.025 for i in range(40)}, workers=workers, seed=0)
+        sim.players = [Player(f"Player {i + 1}", 1500, []) for i in range(4)]
+        for i, prop in enumerate(sim.properties[:-1]):
+            if i % 2:
+                prop.owner = sim.players[i % 4]
+                prop.owner.add_property(prop)
+        player = sim.players[0]
+        player.position = sim.properties[-1].position
+        sim.simulate_turn(player, iterations)  # warm up the pool
+
+        start = time.perf_counter()
+        for _ in range(5):
+            sim.simulate_turn(player, iterations)
+        elapsed = (time.perf_counter() - start) / 5
+        results[workers] = elapsed
+        sim.close()
+        print(f"workers={workers}: {elapsed * 1000:.1f} ms/decision, speedup {results[1] / elapsed:.2f}x")
@@ -0,0 +1,112 @@
+import time
+from typing import Callable, Dict, Optional
+from monpoly_defs import Player, Property, GameState
+from game_events import NO_EVENTS
+from rollout_engine import ChunkTotals
+
+"""
+
+Full-game rollouts with opponent policies.
+
+The board rollouts (rollout_engine.py and simulate_future_turns) only move the deciding player: opponents never
+move, buy or go bankrupt, which is only realistic for a few turns. A policy rollout plays the whole game forward
+instead, every player taking real turns with the simulator's own turn kernel and rules, and every buy decision in
+the rollout made by a cheap policy rather than a nested Monte Carlo:
+    - greedy: buy everything the player can afford
+    - threshold: buy if the player keeps at least THRESHOLD_RESERVE in cash afterwards
+    - heuristic: buy if calculate_expected_property_value rates the property at least at its base rent, i.e.
+      its landing frequency, color group, nearby opponents and the player's cash don't add up to a penalty
+
+A rollout lasts `horizon` rounds (turns of the deciding player, 40-200 is realistic) and is cut short as soon as
+any player goes bankrupt, since the game it was evaluating is over. It is scored like the board rollouts: the
+player's cash, property value with the complete-set premium, and the expected rent income over the turns left of
+the horizon (rent from the turns that were played is already in the cash).
+
+The buy and no-buy rollouts of a pair replay the same dice. A decision runs pairs until it has run `iterations`
+of them or its time budget runs out, so a deep evaluation still fits the latency limits of live games.
+"""
+
+
+THRESHOLD_RESERVE = 300  # cash the threshold policy keeps after buying, the line between 'Low' and 'High' risk
+
+
+def greedy_policy(simulator, player: Player, prop: Property) -> bool:
+    return player.can_afford(prop.price)
+
+
+def threshold_policy(simulator, player: Player, prop: Property) -> bool:
+    return player.money - prop.price >= THRESHOLD_RESERVE
+
+
+def heuristic_policy(simulator, player: Player, prop: Property) -> bool:
+    return player.can_afford(prop.price) and simulator.calculate_expected_property_value(prop, player) >= prop.rent[0]
+
+
+# buy decision of the players inside a rollout: (universe, player, property) -> buy
+OPPONENT_POLICIES: Dict[str, Callable[..., bool]] = {
+    'greedy': greedy_policy,
+    'threshold': threshold_policy,
+    'heuristic': heuristic_policy,
+}
+
+
+def rollout_score(universe, player: Player, turns_left: int) -> float:
+    """cash + property value (50% premium for complete sets) + expected rent income over the turns left"""
+    tables = universe.tables
+    opponents = sum(1 for p in universe.players if p is not player and p.money > 0)
+    return (player.money + tables.set_values[player.index]
+            + tables.rent_incomes[player.index] * opponents * (turns_left / 40))
+
+
+def play_rollout(universe, player_index: int, horizon: int) -> float:
+    """play rounds from the universe's current state until the horizon or the first bankruptcy, and score it.
+       every round starts with the player after the deciding one, so the deciding player's turn ends it"""
+    players = universe.players
+    order = players[player_index + 1:] + players[:player_index + 1]
+    solvent = sum(1 for p in players if p.money > 0)
+    for played in range(1, horizon + 1):
+        for p in order:
+            if p.money > 0:
+                universe.take_turn(p, NO_EVENTS)
+        if sum(1 for p in players if p.money > 0) < solvent:
+            return rollout_score(universe, players[player_index], horizon - played)
+    return rollout_score(universe, players[player_index], 0)
+
+
+def run_policy_rollouts(simulator, buy_state: GameState, no_buy_state: GameState, player_index: int, iterations: int,
+                        horizon: int, policy: str, rng, deadline: Optional[float] = None) -> ChunkTotals:
+    """run up to `iterations` paired policy rollouts, stopping early once time.perf_counter() passes `deadline`
+       (at least one pair always runs). returns their totals as a single chunk"""
+    universe = simulator.fork(rng)
+    universe.rollout_policy = OPPONENT_POLICIES[policy]
+    universe.metrics = None
+    universe.check_totals = False
+    # jail and the decks aren't part of a snapshot, so every rollout starts them over from the real game's
+    jail_turns = simulator.tables.jail_turns[:]
+    jail_cards = simulator.tables.jail_cards[:]
+
+    def reset(state: GameState):
+        universe.restore(state)
+        universe.tables.jail_turns = jail_turns[:]
+        universe.tables.jail_cards = jail_cards[:]
+        universe.decks = {deck: cards.copy() for deck, cards in simulator.decks.items()}
+
+    buy_score = 0.0
+    no_buy_score = 0.0
+    difference_sq_sum = 0.0
+    done = 0
+    while done < iterations:
+        reset(buy_state)
+        dice_state = rng.getstate()
+        buy_result = play_rollout(universe, player_index, horizon)
+        reset(no_buy_state)
+        rng.setstate(dice_state)
+        no_buy_result = play_rollout(universe, player_index, horizon)
+
+        buy_score += buy_result
+        no_buy_score += no_buy_result
+        difference_sq_sum += (buy_result - no_buy_result) ** 2
+        done += 1
+        if deadline is not None and time.perf_counter() >= deadline:
+            break
+    return ChunkTotals(0, done, buy_score, no_buy_score, difference_sq_sum)
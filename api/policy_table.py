@@ -0,0 +1,201 @@
+import argparse
+import dataclasses
+import itertools
+import json
+import os
+import time
+from typing import Optional, Tuple
+import numpy as np
+from monpoly_defs import Player
+from game_rules import GameRules
+
+"""
+
+Precomputed buy/no-buy policy table.
+
+Live decisions run a Monte Carlo in make_decision for every unowned landing, so a turn can take anything from
+microseconds to seconds. A policy table answers the same question with one array lookup. It is indexed by the
+features make_decision reports:
+    - property: index of the property on the board
+    - owned: properties of the same color group the player already owns (0-3)
+    - nearby: opponent properties within 5 spaces (capped at NEARBY_LEVELS - 1)
+    - cash: the player's cash in buckets of CASH_BUCKET (the last bucket holds everything above)
+    - blocked: 1 if an opponent owns part of the color group, so the player can't complete it
+
+Each cell holds the mean buy-minus-no-buy value difference of the Monte Carlo evaluator (float32), or NaN for
+combinations that can't happen on the board. The table is built offline by setting up a representative game for
+every cell and running estimate_purchase on it, and saved as a .npy file that is memory-mapped when loaded, so
+every process serving games shares one copy in the page cache. The values depend on the number of players and the
+rule set, which are saved next to the table (<table>.json). A table is only accepted by games with the same rules,
+and a lookup in a game with a different number of players is an error.
+
+A simulator created with decision_mode="table" and a policy_table looks decisions up, and only runs the live
+Monte Carlo for states outside the table (NaN cells).
+
+Building a table from the api directory (one table per rule set and number of players):
+    python policy_table.py --output policy_simplified.npy --iterations 1000 --workers 4
+    python policy_table.py --output policy_full.npy --rules full
+    python policy_table.py --output policy_sessions.npy --players 5  # the websocket servers play 5-player games
+"""
+
+
+CASH_BUCKET = 100
+CASH_BUCKETS = 16  # $0-99, $100-199, ... $1500 and up
+NEARBY_LEVELS = 7  # 0-6 opponent properties nearby
+MAX_OWNED = 4      # owned in group 0-3 (railroads are the largest group, with 4)
+NUM_PLAYERS = 4    # players a table is built for by default
+
+
+class PolicyTable:
+    """buy-minus-no-buy value difference by (property, owned, nearby, cash bucket, blocked)"""
+
+    def __init__(self, values: np.ndarray, players: int = NUM_PLAYERS, rules: Optional[GameRules] = None):
+        if values.ndim != 5 or values.shape[1:] != (MAX_OWNED, NEARBY_LEVELS, CASH_BUCKETS, 2):
+            raise ValueError(f"Policy table has shape {values.shape}, expected (properties, {MAX_OWNED}, "
+                             f"{NEARBY_LEVELS}, {CASH_BUCKETS}, 2)")
+        self.values = values
+        self.players = players  # number of players in the games the table was built from
+        self.rules = rules or GameRules()
+
+    @property
+    def num_properties(self) -> int:
+        return self.values.shape[0]
+
+    @classmethod
+    def load(cls, path: str) -> 'PolicyTable':
+        """memory-map a saved table (read only) and read the players and rules it was built for"""
+        try:
+            with open(metadata_path(path)) as f:
+                metadata = json.load(f)
+        except FileNotFoundError:
+            raise ValueError(f"Policy table {path} has no {metadata_path(path)}, rebuild it with policy_table.py")
+        return cls(np.load(path, mmap_mode='r'), metadata['players'], GameRules(**metadata['rules']))
+
+    def save(self, path: str):
+        np.save(path, np.ascontiguousarray(self.values, dtype=np.float32))
+        with open(metadata_path(path), 'w') as f:
+            json.dump({'players': self.players, 'rules': dataclasses.asdict(self.rules)}, f, indent=2)
+
+    def check(self, rules: GameRules, players: Optional[int] = None):
+        """raise a ValueError unless the table was built for the given rules (and number of players)"""
+        if rules != self.rules:
+            raise ValueError(f"Policy table was built for {self.rules}, this game is played with {rules}")
+        if players is not None and players != self.players:
+            raise ValueError(f"Policy table was built for {self.players}-player games, this game has {players} players")
+
+    def lookup(self, simulator, player: Player, index: int) -> Optional[float]:
+        """value difference of buying property `index`, None if the state is outside the table"""
+        if len(simulator.players) != self.players:
+            self.check(simulator.rules, len(simulator.players))
+        value = self.values[features(simulator, player, index)]
+        return None if value != value else float(value)  # NaN: no entry
+
+
+def metadata_path(path: str) -> str:
+    """file the players and rules of the table saved at `path` are kept in"""
+    return os.path.splitext(path)[0] + '.json'
+
+
+def features(simulator, player: Player, index: int) -> Tuple[int, int, int, int, int]:
+    """table coordinates of the decision to buy property `index`"""
+    tables = simulator.tables
+    board = tables.board
+    group = board.group_ids[index]
+    num_groups = board.num_groups
+    owned = tables.group_counts[player.index * num_groups + group]
+    blocked = any(tables.group_counts[other * num_groups + group]
+                  for other in range(len(tables.players)) if other != player.index)
+    nearby = simulator.count_nearby_opponent_properties(simulator.properties[index], player)
+    return (index, owned, min(nearby, NEARBY_LEVELS - 1), min(player.money // CASH_BUCKET, CASH_BUCKETS - 1), int(blocked))
+
+
+def set_up_cell(simulator, index: int, owned: int, nearby: int, cash: int, blocked: int) -> Optional[Player]:
+    """set the simulator up as a representative game for one cell of the table: player 1 stands on property `index`
+       and the other players hold just enough properties to match the features. returns player 1, or None if the
+       combination can't happen on the board"""
+    for prop in simulator.properties:
+        prop.owner = None
+    players = simulator.players
+    player = players[0]
+    opponents = itertools.cycle(players[1:])
+    board = simulator.tables.board
+    position = board.positions[index]
+    group = board.group_ids[index]
+
+    members = [i for i, g in enumerate(board.group_ids) if g == group and i != index]
+    if owned > len(members) or (blocked and owned == len(members)):
+        return None
+    for i in members[:owned]:
+        simulator.properties[i].owner = player
+    if blocked:
+        simulator.properties[members[owned]].owner = next(opponents)
+
+    # opponents fill the nearest squares first, leaving the player's color group alone
+    candidates = sorted((i for i in simulator.nearby_indices[position] if i != index and board.group_ids[i] != group),
+                        key=lambda i: min(abs(board.positions[i] - position), 40 - abs(board.positions[i] - position)))
+    already = simulator.count_nearby_opponent_properties(simulator.properties[index], player)
+    if nearby < already or nearby - already > len(candidates):
+        return None
+    for i in candidates[:nearby - already]:
+        simulator.properties[i].owner = next(opponents)
+
+    player.position = position
+    player.money = cash * CASH_BUCKET + CASH_BUCKET // 2
+    if player.money < board.prices[index] or features(simulator, player, index) != (index, owned, nearby, cash, blocked):
+        return None
+    return player
+
+
+def evaluate_property(index: int, rules: GameRules, iterations: int, seed: int, players: int) -> np.ndarray:
+    """the table slab of one property: the Monte Carlo value difference of every feasible cell"""
+    from monopoly_sim import MonopolySimulator
+
+    simulator = MonopolySimulator(seed=seed + index, rules=rules, iterations=iterations)
+    simulator.players = [Player(f"Player {i + 1}", 1500) for i in range(players)]
+    slab = np.full((MAX_OWNED, NEARBY_LEVELS, CASH_BUCKETS, 2), np.nan, dtype=np.float32)
+    for owned, nearby, cash, blocked in itertools.product(range(MAX_OWNED), range(NEARBY_LEVELS), range(CASH_BUCKETS), range(2)):
+        player = set_up_cell(simulator, index, owned, nearby, cash, blocked)
+        if player is not None:
+            slab[owned, nearby, cash, blocked] = simulator.estimate_purchase(player).value_difference
+    return slab
+
+
+def build_policy_table(rules: Optional[GameRules] = None, iterations: int = 1000, workers: int = 1, seed: int = 0,
+                       players: int = NUM_PLAYERS) -> PolicyTable:
+    """evaluate every cell of the table, one property per task. property i is evaluated with seed `seed + i`, so the
+       table doesn't depend on the number of workers"""
+    from monopoly_sim import MonopolySimulator
+
+    rules = rules or GameRules()
+    num_properties = MonopolySimulator(rules=rules).num_properties
+    indices = range(num_properties)
+    if workers > 1:
+        from concurrent.futures import ProcessPoolExecutor  # only building a table needs the process pool
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            slabs = list(executor.map(evaluate_property, indices, itertools.repeat(rules),
+                                      itertools.repeat(iterations), itertools.repeat(seed), itertools.repeat(players)))
+    else:
+        slabs = [evaluate_property(index, rules, iterations, seed, players) for index in indices]
+    return PolicyTable(np.stack(slabs), players, rules)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Build a buy/no-buy policy table offline")
+    parser.add_argument('--output', required=True, help=".npy file to write the table to")
+    parser.add_argument('--rules', choices=['simplified', 'full'], default='simplified', help="rule set the table is for")
+    parser.add_argument('--players', type=int, default=NUM_PLAYERS, help="players in the games the table is for")
+    parser.add_argument('--iterations', type=int, default=1000, help="rollouts per cell")
+    parser.add_argument('--workers', type=int, default=1, help="processes evaluating properties in parallel")
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    table = build_policy_table(GameRules.named(args.rules), args.iterations, args.workers, args.seed, args.players)
+    table.save(args.output)
+    feasible = int(np.count_nonzero(~np.isnan(table.values)))
+    print(f"Evaluated {feasible} of {table.values.size} cells in {time.perf_counter() - start:.1f}s, "
+          f"{table.values.nbytes / 1024:.0f} KiB written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,138 @@
+import json
+import random
+import struct
+import time
+from typing import Optional
+import numpy as np
+
+"""
+
+Seeded random streams and binary replay logs.
+
+Every MonopolySimulator owns its randomness. The master seed is split (with NumPy's SeedSequence) into
+independent sub-streams, so games, and the dice and rollouts within a game, never share a generator:
+    - dice: a random.Random that rolls the real dice and shuffles the Chance and Community Chest decks
+    - rollouts: a SeedSequence that every Monte Carlo decision spawns its own child seeds from
+
+A ReplayLog records everything random that happened in a game: every pair of dice, as one byte (0-35), and the
+outcome of every buy decision, as one byte (36 don't buy, 37 buy). A simulator created with replay=log reads its
+dice and decisions back from the log instead of rolling and running rollouts, so a replay plays exactly the same
+game, minus all the Monte Carlo work. The more rollouts a decision ran, the bigger the speedup.
+
+File format: the magic b'MPRL', a format version byte, the length of the JSON metadata (uint32, little endian),
+the metadata (seed, rules and starting players) and then the event bytes.
+
+Replaying a recorded game from the api directory:
+    python replay.py game.mprl
+"""
+
+
+MAGIC = b'MPRL'
+VERSION = 1
+NO_BUY = 36
+BUY = 37
+
+
+def stream_random(seed_sequence: np.random.SeedSequence) -> random.Random:
+    """a random.Random seeded from a SeedSequence"""
+    return random.Random(int(seed_sequence.generate_state(1, np.uint64)[0]))
+
+
+class ReplayFinished(Exception):
+    """raised when a replay asks for more events than the log holds"""
+
+
+class ReplayLog:
+    """dice and decisions of one game, in the order they happened"""
+
+    def __init__(self, metadata: Optional[dict] = None, events: bytes = b''):
+        self.metadata = metadata or {}
+        self.events = bytearray(events)
+        self.cursor = 0  # next event to read back during a replay
+
+    def __len__(self) -> int:
+        return len(self.events)
+
+    @property
+    def finished(self) -> bool:
+        """whether a replay has read back every event"""
+        return self.cursor >= len(self.events)
+
+    def record_roll(self, code: int):
+        self.events.append(code)
+
+    def record_decision(self, buy: bool):
+        self.events.append(BUY if buy else NO_BUY)
+
+    def _next(self) -> int:
+        if self.cursor >= len(self.events):
+            raise ReplayFinished(f"Replay log ended after {len(self.events)} events")
+        event = self.events[self.cursor]
+        self.cursor += 1
+        return event
+
+    def next_roll(self) -> int:
+        event = self._next()
+        if event >= NO_BUY:
+            raise ValueError(f"Replay out of sync: expected dice at event {self.cursor - 1}, found a decision")
+        return event
+
+    def next_decision(self) -> bool:
+        event = self._next()
+        if event < NO_BUY:
+            raise ValueError(f"Replay out of sync: expected a decision at event {self.cursor - 1}, found dice")
+        return event == BUY
+
+    def save(self, path: str):
+        metadata = json.dumps(self.metadata).encode()
+        with open(path, 'wb') as f:
+            f.write(MAGIC + struct.pack('<BI', VERSION, len(metadata)))
+            f.write(metadata)
+            f.write(self.events)
+
+    @classmethod
+    def load(cls, path: str) -> 'ReplayLog':
+        with open(path, 'rb') as f:
+            data = f.read()
+        if data[:4] != MAGIC:
+            raise ValueError(f"{path} is not a replay log")
+        version, length = struct.unpack_from('<BI', data, 4)
+        if version != VERSION:
+            raise ValueError(f"Unsupported replay log version {version}")
+        start = 4 + struct.calcsize('<BI')
+        return cls(json.loads(data[start:start + length]), data[start + length:])
+
+
+def replay_game(log: ReplayLog):
+    """re-play a recorded game from its log and return the simulator in its final state"""
+    from monopoly_sim import MonopolySimulator
+    from monpoly_defs import Player
+    from game_rules import GameRules
+
+    simulator = MonopolySimulator(seed=log.metadata['seed'], rules=GameRules(**log.metadata['rules']), replay=log)
+    simulator.players = [Player(name, money) for name, money in log.metadata['players']]
+    # every game ends after a full round, whether it ended on a bankruptcy, a round limit or a stop, so the replay
+    # simply plays rounds until the log runs out
+    while not log.finished:
+        simulator.play_round()
+        simulator.round += 1
+    return simulator
+
+
+def main():
+    import argparse
+    parser = argparse.ArgumentParser(description="Replay a recorded Monopoly game")
+    parser.add_argument('path', help="replay log to play back")
+    args = parser.parse_args()
+
+    log = ReplayLog.load(args.path)
+    start = time.perf_counter()
+    simulator = replay_game(log)
+    seconds = time.perf_counter() - start
+    print(f"Replayed {len(log)} events ({simulator.round - 1} rounds) in {seconds * 1000:.1f} ms")
+    for player in simulator.players:
+        print(f"{player.name}: ${player.money}, {len(player.properties)} properties, net worth ${player.calculate_net_worth()}")
+
+
+if __name__ == '__main__':
+    main()
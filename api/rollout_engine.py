@@ -0,0 +1,297 @@
+from dataclasses import dataclass
+from typing import List, Tuple, NamedTuple
+import math
+import numpy as np
+from monpoly_defs import Property, GameState, rollout_rents
+
+"""
+
+Vectorized Monte Carlo rollout engine for the Monopoly simulator.
+
+Instead of rolling out one future at a time, every rollout of a decision is run together as NumPy arrays:
+    - dice for all rollouts and turns are drawn in a single call
+    - positions are advanced with a cumulative sum mod 40
+    - rent is looked up through a precomputed position -> rent table built from the game state
+
+Inside a rollout only the deciding player moves and ownership never changes, so the rent owed on every square
+is fixed for the whole rollout. The only sequential part left is the player's cash, which is advanced one turn
+at a time across all rollouts at once.
+
+The buy and no-buy universes of a decision are rolled out on the same dice (common random numbers): the deciding
+player's path doesn't depend on who owns what, so each rollout produces a paired buy-minus-no-buy difference with
+much lower variance than two independent samples.
+
+run_batch evaluates many candidate decisions against one game state in a single pass: the rent tables and static
+scores of every candidate's buy and no-buy states are built as stacked arrays from the shared base state, and
+every candidate is rolled out on the same dice, so differences between candidates aren't dice noise either.
+"""
+
+
+BOARD_SIZE = 40
+CHUNK_SIZE = 100  # rollouts per seeded chunk, the unit of work for parallel workers and early stopping
+
+
+@dataclass(frozen=True)
+class BoardArrays:
+    """static board definition as arrays, indexed by property index (the order of MonopolySimulator.properties)"""
+    square_to_property: np.ndarray  # (40,) property index on each square, -1 for non-property squares
+    positions: np.ndarray           # (n,) board position of each property
+    prices: np.ndarray              # (n,) purchase price
+    rents: np.ndarray               # (n, 6) rent at each development level (railroads and utilities: by number owned)
+    groups: np.ndarray              # (n,) color group id
+    group_sizes: np.ndarray         # (g,) number of properties in each color group
+    landing_frequencies: np.ndarray # (n,) landing frequency
+
+
+def rent_row(prop: Property) -> List[int]:
+    """rollout rent of a property by development level, padded to 6 levels"""
+    rent = list(rollout_rents(prop.rent, prop.color_group))
+    return rent + rent[-1:] * (6 - len(rent))
+
+
+def build_board_arrays(properties: List[Property]) -> BoardArrays:
+    """build the static lookup arrays for a list of properties"""
+    group_names = sorted({p.color_group.lower() for p in properties})
+    groups = np.array([group_names.index(p.color_group.lower()) for p in properties], dtype=np.int64)
+    square_to_property = np.full(BOARD_SIZE, -1, dtype=np.int64)
+    for i, prop in enumerate(properties):
+        square_to_property[prop.position] = i
+
+    return BoardArrays(
+        square_to_property=square_to_property,
+        positions=np.array([p.position for p in properties], dtype=np.int64),
+        prices=np.array([p.price for p in properties], dtype=np.int64),
+        rents=np.array([rent_row(p) for p in properties], dtype=np.int64),
+        groups=groups,
+        group_sizes=np.bincount(groups),
+        landing_frequencies=np.array([p.landing_frequency for p in properties], dtype=np.float64),
+    )
+
+
+def complete_sets(board: BoardArrays, owners: np.ndarray, num_players: int) -> np.ndarray:
+    """(players, groups) boolean array, True where the player owns every property of the color group"""
+    owned = owners >= 0
+    counts = np.zeros((num_players, len(board.group_sizes)), dtype=np.int64)
+    np.add.at(counts, (owners[owned], board.groups[owned]), 1)
+    return counts == board.group_sizes
+
+
+def draw_positions(start: int, num_turns: int, iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """(iterations, num_turns) board positions after each turn, drawing every die for every rollout at once"""
+    dice = rng.integers(1, 7, size=(iterations, num_turns)) + rng.integers(1, 7, size=(iterations, num_turns))
+    return (start + np.cumsum(dice, axis=1)) % BOARD_SIZE
+
+
+class RolloutSetup(NamedTuple):
+    """everything about a game state that stays fixed for the whole of a rollout"""
+    square_rent: np.ndarray  # (40,) rent the deciding player owes on each square
+    money: int               # starting cash of the deciding player
+    static_score: float      # property value and expected rent income, which don't depend on the dice
+
+
+def prepare_rollouts(board: BoardArrays, state: GameState, player_index: int, num_turns: int) -> RolloutSetup:
+    """precompute the rent table and dice-independent part of the score for rollouts from the given state"""
+    owners = np.asarray(state.owners, dtype=np.int64)
+    houses = np.asarray(state.houses, dtype=np.int64)
+    num_players = len(state.money)
+    complete = complete_sets(board, owners, num_players)
+    owned = owners >= 0
+
+    # rent owed by the player on each property: doubled if the owner has the complete set,
+    # zero if the property is unowned or owned by the player
+    owner_has_set = np.zeros(len(owners), dtype=bool)
+    owner_has_set[owned] = complete[owners[owned], board.groups[owned]]
+    rent = board.rents[np.arange(len(owners)), houses] * np.where(owner_has_set, 2, 1)
+    rent[~owned | (owners == player_index)] = 0
+    if state.mortgaged:
+        rent[np.asarray(state.mortgaged, dtype=bool)] = 0
+    square_rent = np.zeros(BOARD_SIZE, dtype=np.int64)
+    square_rent[board.positions] = rent
+
+    # property value (50% premium for complete sets) and expected rent income over the horizon
+    mine = owners == player_index
+    mine_has_set = complete[player_index, board.groups[mine]]
+    property_value = np.sum(board.prices[mine] * np.where(mine_has_set, 1.5, 1.0))
+    expected_landings = board.landing_frequencies[mine] * (num_players - 1) * (num_turns / BOARD_SIZE)
+    expected_rent = board.rents[mine, houses[mine]] * np.where(mine_has_set, 2, 1)
+    static_score = float(property_value + np.sum(expected_landings * expected_rent))
+
+    return RolloutSetup(square_rent, state.money[player_index], static_score)
+
+
+def score_paths(setup: RolloutSetup, positions: np.ndarray) -> np.ndarray:
+    """score the rollouts along the given (iterations, num_turns) position paths"""
+    iterations, num_turns = positions.shape
+    rent_due = setup.square_rent[positions]
+
+    # rent is only paid when the player can afford it, so cash is advanced turn by turn
+    money = np.full(iterations, setup.money, dtype=np.int64)
+    for turn in range(num_turns):
+        due = rent_due[:, turn]
+        money -= np.where(money >= due, due, 0)
+
+    return money + setup.static_score
+
+
+def score_rollouts(board: BoardArrays, state: GameState, player_index: int, positions: np.ndarray) -> np.ndarray:
+    """score the rollouts along the given position paths for the given player.
+       the score matches MonopolySimulator.simulate_future_turns: cash + property value (50% premium for
+       complete sets) + expected rent income over the horizon."""
+    return score_paths(prepare_rollouts(board, state, player_index, positions.shape[1]), positions)
+
+
+def rollout_scores(board: BoardArrays, state: GameState, player_index: int, num_turns: int,
+                   iterations: int, rng: np.random.Generator) -> np.ndarray:
+    """run `iterations` rollouts of `num_turns` turns for the given player and return the score of each rollout"""
+    positions = draw_positions(state.positions[player_index], num_turns, iterations, rng)
+    return score_rollouts(board, state, player_index, positions)
+
+
+class ChunkTotals(NamedTuple):
+    """sums over the paired rollouts of one chunk"""
+    index: int
+    size: int
+    buy_sum: float
+    no_buy_sum: float
+    difference_sq_sum: float  # sum of squared buy-minus-no-buy differences
+
+
+class PairedEstimate:
+    """running mean and variance of the paired buy-minus-no-buy difference, accumulated chunk by chunk"""
+
+    def __init__(self):
+        self.iterations = 0
+        self.buy_sum = 0.0
+        self.no_buy_sum = 0.0
+        self.difference_sq_sum = 0.0
+
+    def add(self, totals: ChunkTotals):
+        self.iterations += totals.size
+        self.buy_sum += totals.buy_sum
+        self.no_buy_sum += totals.no_buy_sum
+        self.difference_sq_sum += totals.difference_sq_sum
+
+    @property
+    def mean_difference(self) -> float:
+        return (self.buy_sum - self.no_buy_sum) / self.iterations
+
+    def standard_error(self) -> float:
+        if self.iterations < 2:
+            return math.inf
+        mean = self.mean_difference
+        variance = max(self.difference_sq_sum - self.iterations * mean * mean, 0.0) / (self.iterations - 1)
+        return math.sqrt(variance / self.iterations)
+
+    def interval(self, z: float) -> Tuple[float, float]:
+        """confidence interval of the mean difference for the given normal quantile"""
+        half_width = z * self.standard_error()
+        return self.mean_difference - half_width, self.mean_difference + half_width
+
+    def is_decided(self, z: float) -> bool:
+        """True once the confidence interval excludes zero (or there is no variance left to resolve)"""
+        low, high = self.interval(z)
+        return low > 0 or high < 0 or self.standard_error() == 0
+
+
+def plan_chunks(iterations: int, seed_sequence: np.random.SeedSequence) -> List[Tuple[int, int, np.random.SeedSequence]]:
+    """split `iterations` rollouts into fixed-size chunks, each with its own child seed. because seeds are tied to
+       chunks rather than to workers, the results are identical whatever the number of workers."""
+    num_chunks = -(-iterations // CHUNK_SIZE)
+    seeds = seed_sequence.spawn(num_chunks)
+    return [(i, min(CHUNK_SIZE, iterations - i * CHUNK_SIZE), seeds[i]) for i in range(num_chunks)]
+
+
+def run_chunks(board: BoardArrays, buy_state: GameState, no_buy_state: GameState, player_index: int,
+               num_turns: int, chunks: List[Tuple[int, int, np.random.SeedSequence]]) -> List[ChunkTotals]:
+    """run the paired buy and no-buy rollouts of each chunk on common dice and return their totals"""
+    buy_setup = prepare_rollouts(board, buy_state, player_index, num_turns)
+    no_buy_setup = prepare_rollouts(board, no_buy_state, player_index, num_turns)
+    totals = []
+    for index, size, seed in chunks:
+        positions = draw_positions(buy_state.positions[player_index], num_turns, size, np.random.default_rng(seed))
+        buy = score_paths(buy_setup, positions)
+        no_buy = score_paths(no_buy_setup, positions)
+        difference = buy - no_buy
+        totals.append(ChunkTotals(index, size, float(buy.sum()), float(no_buy.sum()), float(difference @ difference)))
+    return totals
+
+
+class BatchTotals(NamedTuple):
+    """sums over the paired rollouts of every query of a batch, as (queries,) arrays"""
+    size: int
+    buy_sum: np.ndarray
+    no_buy_sum: np.ndarray
+    difference_sq_sum: np.ndarray
+
+
+def prepare_batch(board: BoardArrays, state: GameState, owners: np.ndarray, money: np.ndarray,
+                  player_indices: np.ndarray, num_turns: int) -> RolloutSetup:
+    """prepare_rollouts for a stack of states that only differ from `state` in their (states, n) owners and
+       (states,) cash of the deciding player. returns (states, 40) rent tables, cash and static scores"""
+    num_states, num_properties = owners.shape
+    num_players = len(state.money)
+    houses = np.asarray(state.houses, dtype=np.int64)
+    rows = np.arange(num_states)[:, None]
+    groups = np.broadcast_to(board.groups, owners.shape)
+    owned = owners >= 0
+
+    # complete sets of every player in every state
+    counts = np.zeros((num_states, num_players, len(board.group_sizes)), dtype=np.int64)
+    np.add.at(counts, (np.broadcast_to(rows, owners.shape)[owned], owners[owned], groups[owned]), 1)
+    complete = counts == board.group_sizes
+    owner_has_set = np.where(owned, complete[rows, np.maximum(owners, 0), groups], False)
+
+    base_rent = board.rents[np.arange(num_properties), houses]
+    rent = base_rent * np.where(owner_has_set, 2, 1)
+    rent[~owned | (owners == player_indices[:, None])] = 0
+    if state.mortgaged:
+        rent[:, np.asarray(state.mortgaged, dtype=bool)] = 0
+    square_rent = np.zeros((num_states, BOARD_SIZE), dtype=np.int64)
+    square_rent[:, board.positions] = rent
+
+    mine = owners == player_indices[:, None]
+    mine_has_set = complete[rows, player_indices[:, None], groups]
+    property_value = np.sum(np.where(mine, board.prices * np.where(mine_has_set, 1.5, 1.0), 0.0), axis=1)
+    expected_landings = board.landing_frequencies * (num_players - 1) * (num_turns / BOARD_SIZE)
+    expected_rent = np.where(mine, expected_landings * base_rent * np.where(mine_has_set, 2, 1), 0.0)
+    return RolloutSetup(square_rent, money, property_value + np.sum(expected_rent, axis=1))
+
+
+def run_batch(board: BoardArrays, state: GameState, queries: List[Tuple[int, int]], num_turns: int,
+              chunks: List[Tuple[int, int, np.random.SeedSequence]]) -> BatchTotals:
+    """paired buy/no-buy rollouts for a batch of (player index, property index) queries against one state: the
+       player stands on the property and either buys it or not. every query is rolled out on the same dice, chunk
+       by chunk, so a query gets exactly the totals run_chunks gives it on its own"""
+    players = np.array([player for player, _ in queries], dtype=np.int64)
+    properties = np.array([prop for _, prop in queries], dtype=np.int64)
+    num_queries = len(queries)
+
+    # rows 0..q-1 are the buy states, rows q..2q-1 the no-buy states: the base state plus one purchase
+    owners = np.tile(np.asarray(state.owners, dtype=np.int64), (2 * num_queries, 1))
+    owners[np.arange(num_queries), properties] = players
+    money = np.asarray(state.money, dtype=np.int64)[np.concatenate([players, players])]
+    money[:num_queries] -= board.prices[properties]
+    setup = prepare_batch(board, state, owners, money, np.concatenate([players, players]), num_turns)
+    starts = np.concatenate([board.positions[properties]] * 2)[:, None, None]
+    rows = np.arange(2 * num_queries)[:, None, None]
+
+    buy_sum = np.zeros(num_queries)
+    no_buy_sum = np.zeros(num_queries)
+    difference_sq_sum = np.zeros(num_queries)
+    iterations = 0
+    for _, size, seed in chunks:
+        # one set of dice for the chunk: the paths of all queries are the same walk from different squares
+        paths = draw_positions(0, num_turns, size, np.random.default_rng(seed))
+        rent_due = setup.square_rent[rows, (starts + paths) % BOARD_SIZE]
+        cash = np.repeat(setup.money[:, None], size, axis=1)
+        for turn in range(num_turns):
+            due = rent_due[:, :, turn]
+            cash -= np.where(cash >= due, due, 0)
+        scores = cash + setup.static_score[:, None]
+        buy, no_buy = scores[:num_queries], scores[num_queries:]
+        difference = buy - no_buy
+        buy_sum += buy.sum(axis=1)
+        no_buy_sum += no_buy.sum(axis=1)
+        difference_sq_sum += np.einsum('ij,ij->i', difference, difference)
+        iterations += size
+    return BatchTotals(iterations, buy_sum, no_buy_sum, difference_sq_sum)
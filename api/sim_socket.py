@@ -1,162 +1,102 @@
-from flask import Flask
-from flask_sock import Sock
-from flask_cors import CORS
-from monopoly_sim import MonopolySimulator
-from monpoly_defs import Player, property_to_dict, player_to_dict
-import threading
-import time
+from game_sessions import SessionManager, SessionClient
+from game_rules import GameRules
+from metrics import Metrics
+from policy_table import PolicyTable
 import json
+import os
 
 """
 
 This file contains the websocket server for the Monopoly simulator.
 
 Wraps the MonopolySimulator class defined in monopoly_sim.py to run and return data through
-a websocket connection to the react frontend. 
+a websocket connection to the react frontend. Every game runs in its own session (see game_sessions.py),
+so several clients can run and watch different games at the same time.
+
+Messages a client can send:
+    - start_game: start a new game in the client's session (creating and joining a session if it has none)
+    - stop_game: stop the game in the client's session
+    - create_session: create a new session and join it
+    - join_session {session_id}: watch an existing session
+    - leave_session: stop watching the current session
+    - list_sessions: get the id and status of every session
+    - resync: get a fresh snapshot of the current session (delta protocol)
+    - get_stats: get the server's metrics (see metrics.py) and session counts
+    - evaluate_purchases {player?, seed?}: get the ranked value of buying every unowned property from the current
+      state of the session's game, for every solvent player or only `player` (see game_sessions.py)
+
+Every client first gets a 'board' message describing the property squares, which the game state messages only
+refer to by position. Clients connecting with ?protocol=delta get one full 'state_update' snapshot when they join a
+session and then 'state_patch' messages holding only what changed. Clients connecting without a protocol keep
+getting a full 'state_update' after every turn. ?encoding=json|orjson|msgpack picks how messages are encoded (see
+wire_encoding.py), WIRE_ENCODING sets the default (orjson when it is installed).
+
+The number of games running at once is capped by the MAX_CONCURRENT_GAMES environment variable (default 32), and
+games are played with the rule set named by GAME_RULES ('simplified' by default, or 'full').
+
+Instrumentation is off unless SIM_METRICS=1, which records decision, rollout, broadcast and send metrics. They are
+returned by the get_stats message and served in the Prometheus text format at /metrics. PROFILE_DIR=<dir> runs
+every game under cProfile and writes one profile per session into that directory. REPLAY_DIR=<dir> saves a replay
+log of every game there (see replay.py), and EVENT_DIR=<dir> streams the events of every game to JSONL files there
+(see game_events.py). POLICY_TABLE=<file.npy> makes games decide from a precomputed policy table (see
+policy_table.py), built for the same rule set and for 5 players (--players 5), which the server checks at startup.
+
+async_server.py serves the same protocol from an asyncio server with per-client backpressure.
+
+The app is built by create_app(), so importing this module doesn't start anything. Run from the api directory:
+    python sim_socket.py
+    flask --app sim_socket run --port 5000
 """
 
-app = Flask(__name__)
-CORS(app, origins="*", supports_credentials=True)
-sock = Sock(app)
-
-# global game state dictionary that contains:
-# - simulator: the MonopolySimulator instance
-# - game_log: a list of game logs
-# - ai_log: a list of ai logs
-# - is_running: a boolean indicating if the game is running
-# - clients: a set of WebSocket connections
-game_state = {
-    'simulator': None,
-    'game_log': [],
-    'ai_log': [],
-    'is_running': False,
-    'clients': set()  # Store WebSocket connections
-}
-
-def broadcast_state():
-    """broadcast the current game state to all connected clients"""
-    
-    # if the simulator is running, send the current state to the clients
-    if game_state['simulator']:
-        state_data = {
-            'type': 'state_update',
-            'data': {
-                'players': [player_to_dict(p) for p in game_state['simulator'].players],
-                'game_log': game_state['game_log'],
-                'ai_log': game_state['ai_log'],
-                'is_running': game_state['is_running']
-            }
-        }
-        message = json.dumps(state_data)
-        dead_clients = set()
-        for ws in game_state['clients']:
-            try:
-                ws.send(message)
-            except Exception:
-                dead_clients.add(ws)
-        
-        # Clean up dead connections
-        game_state['clients'] -= dead_clients
-
-def game_loop():
-    """game loop that simulates the game until only one player remains solvent"""
-    
-    # while the game is running, simulate the game  
-    while game_state['is_running']:
-        # if only one player remains solvent, end the game
-        if len([p for p in game_state['simulator'].players if p.money > 0]) <= 1:
-            game_state['is_running'] = False
-            update = 'Game Over!'
-            game_state['game_log'].insert(0, update)
-            broadcast_state()
-            break
-
-        # log the current round
-        game_state['ai_log'].append(f"@@@@ Round {game_state['simulator'].round} @@@@")
-        game_state['simulator'].round += 1
-        game_state['ai_log'].append("")
-
-        for player in game_state['simulator'].players:
-            if player.money > 0:
-                old_position = player.position
-                turn_logs = game_state['simulator'].take_turn(player)
-                
-                game_update = f"{player.name} moved from {old_position} to {player.position}"
-                game_state['game_log'].insert(0, game_update)
-                game_state['ai_log'].extend(turn_logs)
-                
-                # truncate logs
-                if len(game_state['game_log']) > 20:
-                    game_state['game_log'].pop()
-                if len(game_state['ai_log']) > 100:
-                    game_state['ai_log'] = game_state['ai_log'][-100:]
-                
-                broadcast_state()
-                time.sleep(0)
-
-def reset_game_state():
-    """reset the game state"""
-    
-    global game_state
-    game_state = {
-        'simulator': None,
-        'game_log': [],
-        'ai_log': [],
-        'is_running': False,
-        'clients': game_state['clients'] if 'clients' in game_state else set()  # Preserve client connections
-    }
-
-@sock.route('/ws')
-def handle_websocket(ws):
-    """handle a websocket connection"""
-    
-    game_state['clients'].add(ws)
-    try:
-        while True:
-            message = ws.receive()
-            data = json.loads(message)
-            
-            if data['type'] == 'start_game':
-                # reset the game state before starting a new game
-                reset_game_state()
-                game_state['clients'].add(ws)  # re-add the current client
-                
-                landing_frequencies = {
-                    0: 0.02907, 1: 0.02005, 2: 0.01769, 3: 0.02034, 4: 0.02187,
-                    5: 0.02797, 6: 0.02124, 7: 0.00814, 8: 0.02179, 9: 0.02163,
-                    10: 0.01724, 11: 0.02550, 12: 0.02610, 13: 0.02171, 14: 0.02424,
-                    15: 0.02633, 16: 0.02681, 17: 0.02295, 18: 0.02822, 19: 0.02809,
-                    20: 0.02826, 21: 0.02611, 22: 0.01045, 23: 0.02563, 24: 0.02990,
-                    25: 0.02889, 26: 0.02536, 27: 0.02515, 28: 0.02650, 29: 0.02434,
-                    30: 0.00000, 31: 0.02519, 32: 0.02468, 33: 0.02224, 34: 0.02349,
-                    35: 0.02287, 36: 0.00815, 37: 0.02057, 38: 0.02047, 39: 0.02480
-                }
-
-                # initialize the simulator with the landing frequencies and 5 players
-                game_state['simulator'] = MonopolySimulator(landing_frequencies)
-                game_state['simulator'].players = [
-                    Player("Player 1", 1500, []),
-                    Player("Player 2", 1500, []),
-                    Player("Player 3", 1500, []),
-                    Player("Player 4", 1500, []),
-                    Player("Player 5", 1500, [])
-                ]
-                game_state['game_log'] = ['Game started!']
-                game_state['is_running'] = True
-                
-                thread = threading.Thread(target=game_loop)
-                thread.daemon = True
-                thread.start()
-
-            elif data['type'] == 'stop_game':
-                if game_state['is_running']:
-                    game_state['is_running'] = False
-
-            broadcast_state()
-    except Exception as e:
-        print(f"WebSocket error: {e}")
-    finally:
-        game_state['clients'].remove(ws)
+def create_app():
+    """build the Flask app, its routes and the session manager, configured from the environment"""
+    # the web framework is only imported here, so importing this module (e.g. as the main module of a spawned
+    # worker process) doesn't load it
+    from flask import Flask, Response, request
+    from flask_sock import Sock
+    from flask_cors import CORS
+
+    app = Flask(__name__)
+    CORS(app, origins="*", supports_credentials=True)
+    sock = Sock(app)
+
+    metrics = Metrics() if os.environ.get('SIM_METRICS') == '1' else None
+    sessions = SessionManager(max_games=int(os.environ.get('MAX_CONCURRENT_GAMES', 32)),
+                              rules=GameRules.named(os.environ.get('GAME_RULES', 'simplified')),
+                              metrics=metrics, profile_dir=os.environ.get('PROFILE_DIR'),
+                              replay_dir=os.environ.get('REPLAY_DIR'), event_dir=os.environ.get('EVENT_DIR'),
+                              policy_table=PolicyTable.load(os.environ['POLICY_TABLE']) if os.environ.get('POLICY_TABLE') else None,
+                              encoding=os.environ.get('WIRE_ENCODING'))
+
+    @app.route('/metrics')
+    def serve_metrics():
+        """metrics in the Prometheus text format, 404 when instrumentation is off"""
+        if metrics is None:
+            return Response("Metrics are disabled, set SIM_METRICS=1\n", status=404, mimetype='text/plain')
+        return Response(metrics.prometheus_text(), mimetype='text/plain; version=0.0.4')
+
+    @sock.route('/ws')
+    def handle_websocket(ws):
+        """handle a websocket connection"""
+
+        protocol = 'delta' if request.args.get('protocol') == 'delta' else 'full'
+        try:
+            client = SessionClient(sessions, ws, protocol, request.args.get('encoding'))
+        except ValueError as e:
+            ws.send(json.dumps({'type': 'error', 'message': str(e)}))
+            return
+        client.send_board()
+        try:
+            while True:
+                message = ws.receive()
+                client.handle(json.loads(message))
+        except Exception as e:
+            print(f"WebSocket error: {e}")
+        finally:
+            client.leave()
+
+    return app
+
 
 if __name__ == '__main__':
-    app.run(debug=True, host='0.0.0.0', port=5000)
\ No newline at end of file
+    create_app().run(debug=True, host='0.0.0.0', port=5000)
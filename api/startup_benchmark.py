@@ -0,0 +1,113 @@
+import argparse
+import compileall
+import json
+import os
+import subprocess
+import sys
+import time
+from typing import Dict, List
+
+"""
+
+Cold-start benchmark: how long a fresh worker process takes to get going, and how much memory it holds.
+
+Batch, tuning and policy table workers are new Python processes (with the spawn and forkserver start methods they
+don't inherit the parent's imports), so every one of them pays for its imports and the first game setup. Each
+target below runs in a fresh interpreter, and for each the benchmark reports:
+    - process_ms: wall time of the whole process, interpreter startup included
+    - work_ms: time spent in the target's own code (imports and setup)
+    - peak_rss_mb: peak resident memory of the process
+    - modules: modules loaded
+
+To keep this short, monopoly_sim.py takes its landing frequencies precomputed from board_tables.py, and the policy
+table, the parallel rollout pool, the policy rollouts, the metrics, the decision cache's pickle and the statistics
+behind confidence intervals are imported by the first game that uses them. The command line tools among the
+engine's modules (markov_board.py, replay.py) import argparse only when run as scripts.
+
+The bytecode caches of this directory are brought up to date first, as they would be in a deployment, so no run
+compiles any source. Every target runs --repeats times and its fastest run counts. The run fails if any target
+loads a web framework module, which the engine must never need, or goes over --max-ms or --max-rss-mb.
+
+Run from the api directory:
+    python startup_benchmark.py
+    python startup_benchmark.py --repeats 10 --max-ms 400 --max-rss-mb 80
+"""
+
+
+# what each target runs in its fresh interpreter
+TARGETS = {
+    'engine import': "import monopoly_sim",
+    'first game': "from monopoly_sim import MonopolySimulator; MonopolySimulator(seed=0)",
+    'batch worker': "from batch import play_headless_game; play_headless_game(0, 0, 4, 10, decision_mode='heuristic')",
+    'tuning worker': "import tuning; tuning.play_block({}, 0, 1, {'players': 4, 'seed': 0, 'max_rounds': 10, "
+                     "'rules': 'simplified', 'decisions': 'heuristic', 'engine': 'vectorized', 'iterations': 100, "
+                     "'horizon': 20})",
+}
+# modules of the web servers, which no engine process should ever import
+WEB_MODULES = ('flask', 'flask_sock', 'flask_cors', 'werkzeug', 'websockets', 'simple_websocket')
+
+CHILD = """
+import time
+start = time.perf_counter()
+{code}
+work = time.perf_counter() - start
+import json, resource, sys
+rss = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+print(json.dumps({{'work_ms': work * 1000, 'peak_rss_mb': rss / (1024 * 1024 if sys.platform == 'darwin' else 1024),
+                  'modules': len(sys.modules), 'web_modules': sorted(m for m in {web} if m in sys.modules)}}))
+"""
+
+
+def measure(code: str) -> dict:
+    """run `code` in a fresh interpreter in this directory"""
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-c', CHILD.format(code=code, web=WEB_MODULES)], capture_output=True,
+                            text=True, check=True, cwd=os.path.dirname(os.path.abspath(__file__)))
+    process_ms = (time.perf_counter() - start) * 1000
+    return {'process_ms': process_ms, **json.loads(result.stdout.splitlines()[-1])}
+
+
+def best_runs(targets: Dict[str, str], repeats: int) -> Dict[str, dict]:
+    """fastest of `repeats` runs of each target. the targets take turns, so they see the same machine load"""
+    best: Dict[str, dict] = {}
+    for _ in range(repeats):
+        for name, code in targets.items():
+            run = measure(code)
+            if name not in best or run['process_ms'] < best[name]['process_ms']:
+                best[name] = run
+    return best
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Measure the cold-start time and memory of worker processes")
+    parser.add_argument('--repeats', type=int, default=5, help="runs of each target, the fastest one counts")
+    parser.add_argument('--filter', help="only targets whose name contains this")
+    parser.add_argument('--max-ms', type=float, help="fail if a target's process takes longer")
+    parser.add_argument('--max-rss-mb', type=float, help="fail if a target's process peaks above this")
+    parser.add_argument('--output', help="write the results to this JSON file")
+    args = parser.parse_args()
+
+    targets = {name: code for name, code in TARGETS.items() if not args.filter or args.filter in name}
+    compileall.compile_dir(os.path.dirname(os.path.abspath(__file__)), maxlevels=0, quiet=1)
+    results = best_runs(targets, args.repeats)
+    failures: List[str] = []
+    print(f"{'target':<15} {'process ms':>10} {'work ms':>8} {'peak RSS MB':>11} {'modules':>8}")
+    for name, run in results.items():
+        print(f"{name:<15} {run['process_ms']:>10.1f} {run['work_ms']:>8.1f} {run['peak_rss_mb']:>11.1f} {run['modules']:>8}")
+        if run['web_modules']:
+            failures.append(f"{name} imports {', '.join(run['web_modules'])}")
+        if args.max_ms is not None and run['process_ms'] > args.max_ms:
+            failures.append(f"{name} took {run['process_ms']:.0f}ms (limit {args.max_ms:.0f}ms)")
+        if args.max_rss_mb is not None and run['peak_rss_mb'] > args.max_rss_mb:
+            failures.append(f"{name} peaked at {run['peak_rss_mb']:.1f}MB (limit {args.max_rss_mb:.1f}MB)")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(results, f, indent=2)
+    for failure in failures:
+        print(failure)
+    if failures:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,50 @@
+import threading
+from game_events import EventLog, render, TURN_START, ROLL_AGAIN
+
+"""
+
+Checks that an EventLog can be read by one thread while another adds events to it, the way the websocket
+sessions use it: the game thread logs every turn while connection threads render the log for new clients.
+
+Run from the api directory:
+    python -m pytest -q test_game_events.py
+"""
+
+
+EVENTS = 50_000
+
+
+def event(i: int) -> tuple:
+    return (TURN_START, f"Player {i % 4 + 1}", i % 40, 1500) if i % 3 == 0 else (ROLL_AGAIN, f"Player {i % 4 + 1}")
+
+
+def test_lines_while_events_are_added():
+    log = EventLog(EVENTS, line_capacity=3 * EVENTS)
+    errors = []
+
+    def write():
+        for i in range(0, EVENTS, 2):
+            log.append(event(i))
+            log.extend([event(i + 1)])
+
+    def read():
+        try:
+            while writer.is_alive():
+                log.lines()
+        except Exception as error:
+            errors.append(error)
+
+    writer = threading.Thread(target=write)
+    readers = [threading.Thread(target=read) for _ in range(2)]
+    writer.start()
+    for reader in readers:
+        reader.start()
+    writer.join()
+    for reader in readers:
+        reader.join()
+
+    assert errors == []
+    # every event was rendered exactly once, in order
+    expected = [line for i in range(EVENTS) for line in render(event(i))]
+    assert log.lines() == expected
+    assert log.text_total == len(expected)
@@ -0,0 +1,105 @@
+import math
+import random
+import numpy as np
+from monopoly_sim import MonopolySimulator
+from monpoly_defs import Player
+from game_rules import GameRules
+from rollout_engine import BOARD_SIZE, rollout_scores, score_rollouts, plan_chunks, run_chunks, PairedEstimate
+
+"""
+
+Checks that the vectorized rollout engine scores rollouts the way the scalar reference loop
+(MonopolySimulator.simulate_future_turns) does: exactly on the same dice, and with the same score distribution
+when each engine draws its own seeded dice.
+
+Run from the api directory:
+    python -m pytest -q test_rollout_engine.py
+"""
+
+
+HORIZON = 20
+ITERATIONS = 4000
+
+
+class ScriptedDice:
+    """stands in for the scalar engine's random.Random, rolling the given dice in order"""
+
+    def __init__(self, dice):
+        self.dice = iter(dice)
+
+    def randint(self, low: int, high: int) -> int:
+        return next(self.dice)
+
+
+def full_game() -> MonopolySimulator:
+    """a game under the official rules where the rollout player (0) lands on every kind of rent: developed and
+       unimproved streets of complete sets, railroads, utilities, and a mortgaged property that charges nothing"""
+    simulator = MonopolySimulator(seed=0, rules=GameRules.full())
+    simulator.players = [Player(f"Player {i + 1}", 1500, []) for i in range(3)]
+    index = {prop.name: i for i, prop in enumerate(simulator.properties)}
+    tables = simulator.tables
+    tables.set_owner(index['Oriental Avenue'], 0)
+    for name in ('Electric Company', 'Water Works', 'Reading Railroad', 'Pennsylvania Railroad', 'B. & O. Railroad',
+                 'St. James Place', 'Tennessee Avenue', 'New York Avenue'):
+        tables.set_owner(index[name], 1)
+    tables.set_houses(index['New York Avenue'], 3)
+    for name in ('Kentucky Avenue', 'Indiana Avenue', 'Illinois Avenue'):
+        tables.set_owner(index[name], 2)
+    tables.mortgaged[index['Illinois Avenue']] = 1
+    tables.money[0] = 600
+    return simulator
+
+
+def scalar_scores(simulator: MonopolySimulator, rng) -> np.ndarray:
+    """score ITERATIONS rollouts of player 0 from the simulator's current state through simulate_future_turns"""
+    state = simulator.snapshot()
+    universe = simulator.fork()
+    scores = []
+    for _ in range(ITERATIONS):
+        universe.restore(state)
+        scores.append(simulator.simulate_future_turns(universe, universe.players[0], HORIZON, rng))
+    return np.array(scores)
+
+
+def test_engines_agree_on_the_same_dice():
+    simulator = full_game()
+    state = simulator.snapshot()
+    dice = np.random.default_rng(1).integers(1, 7, size=(ITERATIONS, HORIZON, 2))
+    positions = (state.positions[0] + np.cumsum(dice.sum(axis=2), axis=1)) % BOARD_SIZE
+
+    scalar = scalar_scores(simulator, ScriptedDice(dice.reshape(-1).tolist()))
+    vectorized = score_rollouts(simulator.board, state, 0, positions)
+
+    np.testing.assert_allclose(vectorized, scalar, rtol=1e-12)
+    # the state is only a good test if rent was actually owed on some of the paths
+    assert len(np.unique(scalar)) > 10
+
+
+def test_score_distributions_match():
+    simulator = full_game()
+    scalar = scalar_scores(simulator, random.Random(2))
+    vectorized = rollout_scores(simulator.board, simulator.snapshot(), 0, HORIZON, ITERATIONS,
+                                np.random.default_rng(3))
+
+    standard_error = math.sqrt(scalar.var() / len(scalar) + vectorized.var() / len(vectorized))
+    assert abs(scalar.mean() - vectorized.mean()) < 4 * standard_error
+    assert 0.9 < vectorized.std() / scalar.std() < 1.1
+    for quantile in (0.1, 0.25, 0.5, 0.75, 0.9):
+        assert abs(np.quantile(scalar, quantile) - np.quantile(vectorized, quantile)) < 0.1 * scalar.std()
+
+
+def test_buy_estimates_match():
+    # the buy-minus-no-buy difference the decisions are made on, from each engine's own seeded stream
+    simulator = full_game()
+    no_buy_state = simulator.snapshot()
+    boardwalk = next(i for i, prop in enumerate(simulator.properties) if prop.name == 'Boardwalk')
+    buy_state = no_buy_state.with_purchase(boardwalk, 0, simulator.properties[boardwalk].price)
+
+    scalar, vectorized = PairedEstimate(), PairedEstimate()
+    scalar.add(simulator._scalar_rollouts(buy_state, no_buy_state, 0, ITERATIONS, HORIZON))
+    for totals in run_chunks(simulator.board, buy_state, no_buy_state, 0, HORIZON,
+                             plan_chunks(ITERATIONS, np.random.SeedSequence(4))):
+        vectorized.add(totals)
+
+    standard_error = math.hypot(scalar.standard_error(), vectorized.standard_error())
+    assert abs(scalar.mean_difference - vectorized.mean_difference) < 4 * standard_error
@@ -0,0 +1,235 @@
+import argparse
+import itertools
+import json
+import math
+import os
+import random
+import time
+from typing import List, Optional, Tuple
+from monpoly_defs import Strategy
+from game_rules import GameRules
+from batch import play_headless_game
+
+"""
+
+Parameter sweeps over player strategies.
+
+A configuration is a set of Strategy parameters (see monpoly_defs.py): the weights of the
+calculate_expected_property_value heuristic, the rollout horizon and the iterations per decision. Each
+configuration plays a tournament in which one candidate player uses it and every other player the default
+strategy, and configurations are ranked by how often their candidate wins. Games still running at --max-rounds
+(most games under the simplified rules, which never pay a salary) are won by the richest player by net worth,
+and counted as draws as well.
+
+    - common random numbers: game i of every configuration is played with seed `seed + i`, with the candidate in
+      seat i % players, so configurations are compared on exactly the same dice and seats
+    - parallel: tournaments are split into blocks of games that run on a process pool across all cores
+    - checkpoint and resume: every finished block is appended to the checkpoint file (JSON lines). Re-running the
+      same command skips the blocks already in it, so an interrupted sweep carries on where it stopped
+    - ranking: by win rate (with its standard error), then by cost in games per second of one core. The default
+      strategy always plays too, as the reference (its win rate is about 1 / players)
+
+The heuristic weights only matter for decisions that use the heuristic (--decisions heuristic, or the heuristic
+opponent policy of --engine policy), the horizon and iterations only for decisions that run rollouts
+(--decisions live).
+
+Run from the api directory:
+    python tuning.py --grid nearby_penalty=0,0.1,0.2 --grid complete_set_multiplier=1.5,2,3 --games 2000 --checkpoint sweep.jsonl
+    python tuning.py --random 50 --range frequency_baseline=0.02:0.03 --range group_member_bonus=0:0.5 --checkpoint random.jsonl
+    python tuning.py --decisions live --grid horizon=10,20,40 --grid iterations=100,1000 --games 200 --checkpoint budget.jsonl
+"""
+
+
+# parameters that can be tuned, and their types
+PARAMETERS = {
+    'frequency_baseline': float,
+    'complete_set_multiplier': float,
+    'group_member_bonus': float,
+    'nearby_penalty': float,
+    'low_cash_multiplier': float,
+    'horizon': int,
+    'iterations': int,
+}
+
+
+def config_key(params: dict) -> str:
+    """canonical name of a configuration"""
+    return json.dumps(params, sort_keys=True)
+
+
+def parse_parameter(text: str) -> Tuple[str, str]:
+    name, _, values = text.partition('=')
+    if name not in PARAMETERS or not values:
+        raise ValueError(f"Expected <parameter>=<values> with a parameter out of {', '.join(PARAMETERS)}, got {text!r}")
+    return name, values
+
+
+def grid_configs(grid: List[str]) -> List[dict]:
+    """every combination of the values of --grid name=v1,v2,..."""
+    axes = []
+    for text in grid:
+        name, values = parse_parameter(text)
+        axes.append([(name, PARAMETERS[name](value)) for value in values.split(',')])
+    return [dict(combination) for combination in itertools.product(*axes)]
+
+
+def random_configs(ranges: List[str], count: int, seed: int) -> List[dict]:
+    """`count` configurations drawn uniformly from the --range name=low:high intervals"""
+    rng = random.Random(seed)
+    bounds = []
+    for text in ranges:
+        name, values = parse_parameter(text)
+        low, high = (PARAMETERS[name](value) for value in values.split(':'))
+        bounds.append((name, low, high))
+    return [{name: rng.randint(low, high) if PARAMETERS[name] is int else rng.uniform(low, high)
+             for name, low, high in bounds} for _ in range(count)]
+
+
+def play_block(params: dict, start: int, games: int, settings: dict) -> dict:
+    """play games start..start+games-1 of one configuration's tournament and count its candidate's wins"""
+    players = settings['players']
+    wins = 0
+    draws = 0
+    clock = time.perf_counter()
+    for game in range(start, start + games):
+        candidate = f"Player {game % players + 1}"
+        row = play_headless_game(game, settings['seed'] + game, players, settings['max_rounds'],
+                                 strategies={candidate: Strategy(**params)}, rules=GameRules.named(settings['rules']),
+                                 decision_mode=settings['decisions'], engine=settings['engine'],
+                                 iterations=settings['iterations'], horizon=settings['horizon'])
+        winner = row['winner']
+        if not winner:
+            # the round limit was reached first: the richest player wins on net worth
+            draws += 1
+            richest = max(range(players), key=lambda i: row[f'net_worth_{i + 1}'])
+            winner = f"Player {richest + 1}"
+        wins += winner == candidate
+    return {'config': config_key(params), 'start': start, 'games': games, 'wins': wins, 'draws': draws,
+            'seconds': time.perf_counter() - clock}
+
+
+def read_checkpoint(path: str, settings: dict) -> List[dict]:
+    """blocks finished by an earlier run with the same settings"""
+    if not os.path.exists(path):
+        return []
+    lines = []
+    with open(path) as f:
+        for line in f:
+            try:
+                lines.append(json.loads(line))
+            except json.JSONDecodeError:
+                pass  # a block cut off by a crash mid-write is simply played again
+    if not lines or lines[0].get('settings') != settings:
+        raise ValueError(f"{path} was written by a sweep with different settings, use another checkpoint file")
+    return lines[1:]
+
+
+def rank(configs: List[dict], blocks: List[dict]) -> List[dict]:
+    """per-configuration totals, best first"""
+    totals = {config_key(params): {'params': params, 'games': 0, 'wins': 0, 'draws': 0, 'seconds': 0.0}
+              for params in configs}
+    for block in blocks:
+        if block['config'] in totals:
+            total = totals[block['config']]
+            for field in ('games', 'wins', 'draws', 'seconds'):
+                total[field] += block[field]
+    ranking = []
+    for total in totals.values():
+        games = total['games']
+        win_rate = total['wins'] / games if games else 0.0
+        total['win_rate'] = win_rate
+        total['win_rate_error'] = math.sqrt(win_rate * (1 - win_rate) / games) if games else 0.0
+        total['games_per_second'] = games / total['seconds'] if total['seconds'] else 0.0
+        ranking.append(total)
+    ranking.sort(key=lambda total: (-total['win_rate'], -total['games_per_second']))
+    return ranking
+
+
+def sweep(configs: List[dict], settings: dict, games: int, block_size: int, workers: int,
+          checkpoint: Optional[str] = None) -> List[dict]:
+    """play every configuration's tournament (skipping blocks already in the checkpoint) and return the ranking"""
+    blocks = read_checkpoint(checkpoint, settings) if checkpoint else []
+    done = {(block['config'], block['start']) for block in blocks}
+    # block by block across the configurations, so an interrupted sweep has comparable results for all of them
+    tasks = [(params, start, min(block_size, games - start))
+             for start in range(0, games, block_size) for params in configs
+             if (config_key(params), start) not in done]
+    print(f"{len(configs)} configurations, {len(tasks)} blocks of up to {block_size} games to play "
+          f"({len(done)} already in the checkpoint)")
+
+    log = None
+    if checkpoint:
+        new_file = not os.path.exists(checkpoint)
+        log = open(checkpoint, 'a')
+        if new_file:
+            log.write(json.dumps({'settings': settings}) + "\n")
+        else:
+            with open(checkpoint, 'rb') as f:
+                content = f.read()
+                cut_off = content and not content.endswith(b"\n")
+            if cut_off:
+                log.write("\n")  # end the line a crash cut off, so the next block starts a line of its own
+    from concurrent.futures import ProcessPoolExecutor, as_completed  # not needed by the worker processes
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            futures = [executor.submit(play_block, params, start, count, settings) for params, start, count in tasks]
+            try:
+                for finished, future in enumerate(as_completed(futures), 1):
+                    block = future.result()
+                    blocks.append(block)
+                    if log:
+                        log.write(json.dumps(block) + "\n")
+                        log.flush()
+                    if finished % max(1, len(tasks) // 20) == 0:
+                        print(f"{finished}/{len(tasks)} blocks played", flush=True)
+            except KeyboardInterrupt:
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise
+    finally:
+        if log:
+            log.close()
+    return rank(configs, blocks)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Tune player strategies with tournaments across all cores")
+    parser.add_argument('--grid', action='append', default=[], help="<parameter>=<v1>,<v2>,... (repeatable)")
+    parser.add_argument('--random', type=int, help="sample this many configurations from the --range intervals")
+    parser.add_argument('--range', action='append', default=[], help="<parameter>=<low>:<high> (repeatable)")
+    parser.add_argument('--games', type=int, default=1000, help="games per configuration")
+    parser.add_argument('--block', type=int, default=25, help="games per task")
+    parser.add_argument('--players', type=int, default=4)
+    parser.add_argument('--seed', type=int, default=0, help="seed of the first game (and of the random search)")
+    parser.add_argument('--max-rounds', type=int, default=200)
+    parser.add_argument('--decisions', choices=['heuristic', 'live'], default='heuristic', help="decision mode")
+    parser.add_argument('--engine', choices=['vectorized', 'scalar', 'policy'], default='vectorized')
+    parser.add_argument('--iterations', type=int, default=1000, help="iterations of the default strategy")
+    parser.add_argument('--horizon', type=int, default=20, help="horizon of the default strategy")
+    parser.add_argument('--rules', choices=['simplified', 'full'], default='simplified')
+    parser.add_argument('--workers', type=int, default=os.cpu_count(), help="processes playing blocks")
+    parser.add_argument('--checkpoint', help="JSON lines file of finished blocks, resumed from if it exists")
+    parser.add_argument('--output', help="write the full ranking to this JSON file")
+    parser.add_argument('--top', type=int, default=10, help="configurations to print")
+    args = parser.parse_args()
+
+    configs = random_configs(args.range, args.random, args.seed) if args.random else grid_configs(args.grid)
+    if {} not in configs:
+        configs.insert(0, {})  # the default strategy, as the reference
+    settings = {'players': args.players, 'seed': args.seed, 'max_rounds': args.max_rounds, 'decisions': args.decisions,
+                'engine': args.engine, 'iterations': args.iterations, 'horizon': args.horizon, 'rules': args.rules,
+                'block': args.block}
+
+    start = time.perf_counter()
+    ranking = sweep(configs, settings, args.games, args.block, args.workers, args.checkpoint)
+    print(f"Swept {len(configs)} configurations in {time.perf_counter() - start:.1f}s\n")
+    print(f"{'win rate':>14} {'games':>7} {'games/s':>9}  configuration")
+    for total in ranking[:args.top]:
+        print(f"{total['win_rate']:>7.1%} ±{total['win_rate_error']:>5.1%} {total['games']:>7} "
+              f"{total['games_per_second']:>9.1f}  {config_key(total['params']) if total['params'] else 'default'}")
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(ranking, f, indent=2)
+
+
+if __name__ == '__main__':
+    main()
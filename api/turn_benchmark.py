@@ -0,0 +1,95 @@
+import argparse
+import statistics
+import sys
+import time
+from typing import Callable, Dict, List, Optional
+from monopoly_sim import MonopolySimulator
+from monpoly_defs import Player
+from game_rules import GameRules
+
+"""
+
+Turn kernel benchmark: turns per second of take_turn under the simplified rules and under the full rule set.
+
+Every property is owned from the start (each color group by one player) and the players have plenty of cash, so
+no turn stops for a buy decision and the benchmark only measures the turn itself: moving, rent, cards, jail,
+building and mortgages. Each rule set is run several times and its median run counts.
+
+The full rules have to stay within --max-slowdown of the take_turn the simulator had before the rule engine (the
+simplified game only, logging text), measured with this setup at BASELINE_TURNS_PER_SECOND. That code no longer
+exists, so the reference is scaled to the machine by a fixed pure-Python calibration loop, which ran at
+BASELINE_CALIBRATION_PER_SECOND in the same measurement. Exits with status 1 if the full rules are slower than that.
+
+Run from the api directory:
+    python turn_benchmark.py --turns 50000 --repeats 5
+"""
+
+
+# the take_turn from before the rule engine and the calibration loop, medians of interleaved runs on one machine
+BASELINE_TURNS_PER_SECOND = 187_878
+BASELINE_CALIBRATION_PER_SECOND = 7_953_679
+
+
+def saturated_game(rules: GameRules, players: int = 4, money: int = 10 ** 9, seed: Optional[int] = None) -> MonopolySimulator:
+    """a game in which every property is owned, each color group by a single player"""
+    simulator = MonopolySimulator(rules=rules, seed=seed)
+    simulator.players = [Player(f"Player {i + 1}", money) for i in range(players)]
+    for prop, group in zip(simulator.properties, simulator.tables.board.group_ids):
+        prop.owner = simulator.players[group % players]
+    return simulator
+
+
+def turns_per_second(rules: GameRules, turns: int, seed: int) -> float:
+    simulator = saturated_game(rules, seed=seed)
+    players = simulator.players
+    start = time.perf_counter()
+    for turn in range(turns):
+        simulator.take_turn(players[turn % len(players)])
+    return turns / (time.perf_counter() - start)
+
+
+def calibration_per_second(rounds: int = 200_000) -> float:
+    """rounds per second of a fixed pure-Python loop (indexing, arithmetic and a loop, like a turn), the yardstick
+       the baseline is scaled to this machine by"""
+    board = list(range(40))
+    position = total = 0
+    start = time.perf_counter()
+    for i in range(rounds):
+        position = (position + i % 11 + 2) % 40
+        total += board[position]
+    return rounds / (time.perf_counter() - start)
+
+
+def median_rates(runs: Dict[str, Callable[[], float]], repeats: int) -> Dict[str, float]:
+    """median of `repeats` calls of each run. the runs take turns, so they see the same machine load"""
+    rates: Dict[str, List[float]] = {name: [] for name in runs}
+    for _ in range(repeats):
+        for name, run in runs.items():
+            rates[name].append(run())
+    return {name: statistics.median(values) for name, values in rates.items()}
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark take_turn under the simplified and the full rules")
+    parser.add_argument('--turns', type=int, default=50_000, help="turns per run")
+    parser.add_argument('--repeats', type=int, default=7, help="runs of each rule set, the median one counts")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--max-slowdown', type=float, default=2.0,
+                        help="allowed time per turn of the full rules, relative to the baseline take_turn")
+    args = parser.parse_args()
+
+    rates = median_rates({'simplified': lambda: turns_per_second(GameRules(), args.turns, args.seed),
+                          'full': lambda: turns_per_second(GameRules.full(), args.turns, args.seed),
+                          'calibration': calibration_per_second}, args.repeats)
+    baseline = BASELINE_TURNS_PER_SECOND * rates['calibration'] / BASELINE_CALIBRATION_PER_SECOND
+    slowdown = baseline / rates['full']
+    print(f"baseline:         {baseline:,.0f} turns/s (scaled to this machine)")
+    print(f"simplified rules: {rates['simplified']:,.0f} turns/s")
+    print(f"full rules:       {rates['full']:,.0f} turns/s")
+    print(f"slowdown:         {slowdown:.2f}x (limit {args.max_slowdown:.2f}x)")
+    if slowdown > args.max_slowdown:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+import json
+from typing import Callable, Dict, Optional, Union
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+try:
+    import msgpack
+except ImportError:
+    msgpack = None
+
+"""
+
+Encoders for the messages the websocket servers send.
+
+Every connection picks an encoding with ?encoding=<name> (the server's default otherwise):
+    - json: the standard library, compact separators
+    - orjson: the same JSON, several times faster to encode. the default when orjson is installed
+    - msgpack: MessagePack, a compact binary format sent as binary websocket frames (when msgpack is installed)
+
+Text encoders return str and binary encoders bytes, which both servers send as is. Messages coming from the
+clients are JSON whatever the encoding. More encoders can be added with register_encoder().
+"""
+
+
+class Encoder:
+    """a named message encoder"""
+
+    def __init__(self, name: str, encode: Callable[[dict], Union[str, bytes]], binary: bool = False):
+        self.name = name
+        self.encode = encode
+        self.binary = binary
+
+    def __repr__(self) -> str:
+        return f"Encoder({self.name!r})"
+
+
+ENCODERS: Dict[str, Encoder] = {}
+
+
+def register_encoder(name: str, encode: Callable[[dict], Union[str, bytes]], binary: bool = False) -> Encoder:
+    encoder = ENCODERS[name] = Encoder(name, encode, binary)
+    return encoder
+
+
+register_encoder('json', lambda message: json.dumps(message, separators=(',', ':')))
+if orjson is not None:
+    # the patches key players and squares by integer index, which plain orjson refuses
+    register_encoder('orjson', lambda message: orjson.dumps(message, option=orjson.OPT_NON_STR_KEYS).decode())
+if msgpack is not None:
+    register_encoder('msgpack', msgpack.packb, binary=True)
+
+DEFAULT_ENCODING = 'orjson' if 'orjson' in ENCODERS else 'json'
+
+
+def get_encoder(name: Optional[str] = None) -> Encoder:
+    """the encoder called `name`, the default one for None"""
+    encoder = ENCODERS.get(name or DEFAULT_ENCODING)
+    if encoder is None:
+        raise ValueError(f"Unknown or unavailable encoding {name!r}, expected one of {', '.join(ENCODERS)}")
+    return encoder
+
+
+def wire_size(message: Union[str, bytes]) -> int:
+    """bytes an encoded message takes on the wire. text frames are UTF-8, so a str can be longer than its length"""
+    return len(message.encode()) if isinstance(message, str) else len(message)
@@ -3,7 +3,9 @@ import { Card } from './card';
 import { DollarSign, User, Building2 } from 'lucide-react';
 import PlayerPositionChart from './PlayerPositionChart';
 
-const WS_URL = 'ws://127.0.0.1:5000/ws';
+const WS_URL = 'ws://127.0.0.1:5000/ws?protocol=delta';
+const GAME_LOG_SIZE = 20;
+const AI_LOG_SIZE = 100;
 
 const PROPERTY_DETAILS = {
   1: { name: 'Mediterranean Ave', color: 'brown', price: 60 },
@@ -50,16 +52,70 @@ const PLAYER_COLORS = [
 
 const INITIAL_GAME_STATE = {
   players: [],
+  squares: {},
   gameLog: [],
   isRunning: false,
   aiReasoningLog: []
 };
 
+// Attach the squares each player owns, with their details from the board message, to the players
+const withProperties = (players, squares, board) => players.map((player, idx) => ({
+  ...player,
+  properties: Object.entries(squares)
+    .filter(([, square]) => square.owner === idx)
+    .map(([position, square]) => ({ ...board[position], ...square, position: Number(position) }))
+}));
+
+// Apply a state_patch message (only what changed since the previous broadcast) to the current game state
+const applyStatePatch = (state, patch, board) => {
+  let squares = state.squares;
+  if (patch.squares) {
+    squares = { ...state.squares };
+    Object.entries(patch.squares).forEach(([position, square]) => {
+      if (square.owner === null) {
+        delete squares[position];
+      } else {
+        squares[position] = square;
+      }
+    });
+  }
+  let players = state.players;
+  if (patch.players || patch.squares) {
+    players = withProperties(state.players.map((player, idx) => ({ ...player, ...(patch.players?.[idx] ?? {}) })),
+      squares, board);
+  }
+  return {
+    players,
+    squares,
+    gameLog: patch.game_log ? [...patch.game_log, ...state.gameLog].slice(0, GAME_LOG_SIZE) : state.gameLog,
+    isRunning: patch.is_running ?? state.isRunning,
+    aiReasoningLog: patch.ai_log ? [...state.aiReasoningLog, ...patch.ai_log].slice(-AI_LOG_SIZE) : state.aiReasoningLog
+  };
+};
+
+// Best evaluation of each square from a purchase_evaluations message (evaluations arrive ranked, best first)
+const bestBuyBySquare = (evaluations) => {
+  const best = {};
+  evaluations.forEach(evaluation => {
+    if (evaluation.should_buy && !(evaluation.position in best)) {
+      best[evaluation.position] = evaluation;
+    }
+  });
+  return best;
+};
+
 const MonopolySimulation = () => {
   const [gameState, setGameState] = useState(INITIAL_GAME_STATE);
   const [connectionStatus, setConnectionStatus] = useState('disconnected');
   const [isConnecting, setIsConnecting] = useState(false);
+  const [sessionId, setSessionId] = useState(null);
+  const [joinSessionId, setJoinSessionId] = useState('');
+  const [bestBuys, setBestBuys] = useState({});
   const ws = useRef(null);
+  const currentSession = useRef(null);
+  const lastSeq = useRef(null);
+  const awaitingResync = useRef(false);
+  const board = useRef({});
 
   const connectWebSocket = useCallback(() => {
     // Don't create a new connection if we're already connecting or connected
@@ -86,13 +142,57 @@ const MonopolySimulation = () => {
     ws.current.onmessage = (event) => {
       try {
         const message = JSON.parse(event.data);
+        if (message.type === 'board') {
+          // static square details, sent once per connection: state messages only refer to squares by position
+          board.current = message.squares;
+          return;
+        }
+        if (message.type === 'session_created' || message.type === 'session_joined') {
+          // state from the previous session no longer applies
+          currentSession.current = message.session_id;
+          lastSeq.current = null;
+          awaitingResync.current = false;
+          setSessionId(message.session_id);
+          setGameState(INITIAL_GAME_STATE);
+          setBestBuys({});
+          return;
+        }
+        if (message.type === 'error') {
+          console.error('Server error:', message.message);
+          return;
+        }
+        // ignore anything still in flight from a session we already left
+        if (message.session_id && message.session_id !== currentSession.current) {
+          return;
+        }
         if (message.type === 'state_update') {
+          lastSeq.current = message.seq;
+          awaitingResync.current = false;
           setGameState({
-            players: message.data.players,
+            players: withProperties(message.data.players, message.data.squares, board.current),
+            squares: message.data.squares,
             gameLog: message.data.game_log,
             isRunning: message.data.is_running,
             aiReasoningLog: message.data.ai_log
           });
+        } else if (message.type === 'state_patch') {
+          // patches already covered by a newer snapshot can be dropped
+          if (lastSeq.current !== null && message.seq <= lastSeq.current) {
+            return;
+          }
+          // a gap in the sequence means a patch was missed, ask for a fresh snapshot instead
+          if (lastSeq.current === null || message.seq !== lastSeq.current + 1) {
+            lastSeq.current = null;
+            if (!awaitingResync.current) {
+              awaitingResync.current = true;
+              ws.current.send(JSON.stringify({ type: 'resync' }));
+            }
+            return;
+          }
+          lastSeq.current = message.seq;
+          setGameState(prev => applyStatePatch(prev, message, board.current));
+        } else if (message.type === 'purchase_evaluations') {
+          setBestBuys(bestBuyBySquare(message.evaluations));
         }
       } catch (error) {
         console.error('Error parsing WebSocket message:', error);
@@ -103,6 +203,8 @@ const MonopolySimulation = () => {
       console.log('WebSocket connection closed');
       setConnectionStatus('disconnected');
       setGameState(INITIAL_GAME_STATE);
+      lastSeq.current = null;
+      awaitingResync.current = false;
       setIsConnecting(false);
     };
 
@@ -144,6 +246,18 @@ const MonopolySimulation = () => {
     }
   };
 
+  const joinSession = () => {
+    if (connectionStatus === 'connected' && joinSessionId.trim()) {
+      sendWebSocketMessage({ type: 'join_session', session_id: joinSessionId.trim() });
+    }
+  };
+
+  const evaluatePurchases = () => {
+    if (connectionStatus === 'connected' && sessionId) {
+      sendWebSocketMessage({ type: 'evaluate_purchases' });
+    }
+  };
+
   // Rest of the render functions remain the same...
   const renderPlayer = (playerIndex, position) => {
     if (gameState.players[playerIndex]?.position === position) {
@@ -163,12 +277,9 @@ const MonopolySimulation = () => {
     const property = PROPERTY_DETAILS[position];
     if (!property) return null;
 
-    const owner = gameState.players.find(player => 
-      player.properties.some(prop => prop.position === position)
-    );
+    const playerIndex = gameState.squares[position]?.owner;
 
-    if (owner) {
-      const playerIndex = gameState.players.indexOf(owner);
+    if (playerIndex !== undefined) {
       return (
         <Building2 
           className={`${PLAYER_COLORS[playerIndex]} h-4 w-4 absolute bottom-1 left-1/2 transform -translate-x-1/2`}
@@ -189,9 +300,19 @@ const MonopolySimulation = () => {
   
     const baseClasses = "relative h-20 border border-gray-300 p-2 text-xs flex flex-col";
     const cornerClasses = isCorner ? "items-center justify-center" : "";
+    // best buy heatmap: shade each square by its value relative to the best buy on the board
+    const bestBuy = bestBuys[position];
+    const topValue = Math.max(0, ...Object.values(bestBuys).map(evaluation => evaluation.value_difference));
   
     return (
       <div className={`${baseClasses} ${cornerClasses}`}>
+        {bestBuy && topValue > 0 && (
+          <div
+            className="absolute inset-0 bg-green-400 pointer-events-none"
+            style={{ opacity: 0.6 * bestBuy.value_difference / topValue }}
+            title={`Best buy for ${bestBuy.player}: +$${bestBuy.value_difference.toFixed(0)}`}
+          />
+        )}
         {propertyDetails && (
           <>
             <div className={`h-3 ${PROPERTY_COLORS[propertyDetails.color]} w-full -mt-2`} />
@@ -385,6 +506,24 @@ const MonopolySimulation = () => {
              connectionStatus === 'error' ? 'Connection Error' :
              'Disconnected'}
           </div>
+          <div className="text-sm text-gray-600">
+            Session: {sessionId ?? 'none'}
+          </div>
+          <div className="flex items-center gap-2">
+            <input
+              value={joinSessionId}
+              onChange={(e) => setJoinSessionId(e.target.value)}
+              placeholder="Session ID"
+              className="px-2 py-1 border border-gray-300 rounded text-sm w-28"
+            />
+            <button
+              onClick={joinSession}
+              disabled={connectionStatus !== 'connected' || !joinSessionId.trim()}
+              className="px-3 py-1 bg-blue-500 text-white rounded text-sm disabled:bg-gray-300"
+            >
+              Join
+            </button>
+          </div>
           <div className="space-x-4">
             <button
               onClick={startGame}
@@ -400,6 +539,13 @@ const MonopolySimulation = () => {
             >
               Stop Game
             </button>
+            <button
+              onClick={evaluatePurchases}
+              disabled={!sessionId || connectionStatus !== 'connected'}
+              className="px-4 py-2 bg-blue-500 text-white rounded disabled:bg-gray-300"
+            >
+              Best Buys
+            </button>
           </div>
         </div>
       </div>